@@ -1,28 +1,66 @@
+import os
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_login import LoginManager
-from config import Config
+from config import config_by_name
+from app.cache import Cache
+from app.broker import Broker
+from app.pool import pool_metrics, apply_sqlite_pragmas
 
 db = SQLAlchemy()
 migrate = Migrate()
 login = LoginManager()
 login.login_view = 'auth.login'
+cache = Cache()
+broker = Broker()
+
+def create_app(config_class=None):
+    # A config class, or its name in config_by_name; SOFTBALL_CONFIG picks the
+    # default ('mysql' unless set)
+    if config_class is None:
+        config_class = os.environ.get('SOFTBALL_CONFIG', 'mysql')
+    if isinstance(config_class, str):
+        config_class = config_by_name[config_class]
 
-def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    if 'SQLALCHEMY_ENGINE_OPTIONS' not in app.config and hasattr(config_class, 'engine_options'):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = config_class.engine_options()
 
     db.init_app(app)
+    with app.app_context():
+        pool_metrics.install(db.engine)
+        if app.config.get('SQLITE_PRAGMAS'):
+            apply_sqlite_pragmas(db.engine, app.config['SQLITE_PRAGMAS'])
     migrate.init_app(app, db)
     login.init_app(app)
+    cache.init_app(app)
+    broker.init_app(app)
+
+    from app.leaderboard import leaderboards
+    from app.query_stats import query_stats
+    from app.metrics import metrics
+    leaderboards.init_app(app)
+    query_stats.init_app(app)
+    metrics.init_app(app)
+
+    from app.generator import generate_league_command
+    from app.scorebook import import_scorebook_command
+    from app.export import export_plays_command
+    app.cli.add_command(generate_league_command)
+    app.cli.add_command(import_scorebook_command)
+    app.cli.add_command(export_plays_command)
+
+    from app.routes import games, metrics as metrics_routes
+    app.register_blueprint(games.bp)
+    app.register_blueprint(metrics_routes.bp)
 
     # Comment out routes for now
-    # from app.routes import main, auth, teams, games
+    # from app.routes import main, auth, teams
     # app.register_blueprint(main.bp)
     # app.register_blueprint(auth.bp)
     # app.register_blueprint(teams.bp)
-    # app.register_blueprint(games.bp)
 
     return app
 
@@ -0,0 +1,232 @@
+from app import db
+from app.leaderboard import leaderboards
+from app.models import Game, GameStats, Inning, AtBat, Out, Steal
+from sqlalchemy import select, update, insert, func, case
+from typing import Dict, List
+
+# How AtBat results map onto GameStats. 'runs' is not derivable from the
+# event rows (runners are not tracked per base) and stays hand-maintained.
+HIT_RESULTS = {'single', 'double', 'triple', 'home_run'}
+EXTRA_BASE_HITS = {'double': 'doubles', 'triple': 'triples', 'home_run': 'home_runs'}
+NON_AT_BAT_RESULTS = {'walk', 'hit_by_pitch', 'sacrifice_fly', 'sacrifice_bunt'}
+WALK_RESULTS = {'walk'}
+
+# Strikeouts are counted from Out rows, stolen bases and caught stealing from
+# Steal rows, so a caught-stealing Out is not counted twice.
+STRIKEOUT_OUT_TYPES = {'strikeout'}
+
+DERIVED_COLUMNS = ('at_bats', 'hits', 'doubles', 'triples', 'home_runs', 'rbis',
+                   'strikeouts', 'walks', 'stolen_bases', 'caught_stealing')
+
+# The Game line score. Runs are summed from Inning rows; the team's hits and
+# the opponent's errors (our batters reaching on one) come from AtBat
+# results. The opponent's hits and the team's own errors have no event rows
+# and, like 'runs', are hand-maintained.
+LINE_SCORE_COLUMNS = ('team_runs', 'team_hits', 'team_errors', 'opponent_runs', 'opponent_hits',
+                      'opponent_errors')
+DERIVED_LINE_SCORE_COLUMNS = ('team_runs', 'team_hits', 'opponent_runs', 'opponent_errors')
+ERROR_RESULTS = {'error'}
+
+# Event deltas
+def result_deltas(result: str, rbis: int = 0) -> Dict[str, int]:
+    deltas = {}
+    if result not in NON_AT_BAT_RESULTS:
+        deltas['at_bats'] = 1
+    if result in HIT_RESULTS:
+        deltas['hits'] = 1
+    if result in EXTRA_BASE_HITS:
+        deltas[EXTRA_BASE_HITS[result]] = 1
+    if result in WALK_RESULTS:
+        deltas['walks'] = 1
+    if rbis:
+        deltas['rbis'] = rbis
+    return deltas
+
+def at_bat_deltas(at_bat: AtBat) -> Dict[str, int]:
+    return result_deltas(at_bat.result, at_bat.rbis)
+
+def out_type_deltas(out_type: str) -> Dict[str, int]:
+    if out_type in STRIKEOUT_OUT_TYPES:
+        return {'strikeouts': 1}
+    return {}
+
+def out_deltas(out: Out) -> Dict[str, int]:
+    return out_type_deltas(out.out_type)
+
+def steal_result_deltas(success: bool) -> Dict[str, int]:
+    return {'stolen_bases': 1} if success else {'caught_stealing': 1}
+
+def steal_deltas(steal: Steal) -> Dict[str, int]:
+    return steal_result_deltas(steal.success)
+
+def line_score_deltas(result: str) -> Dict[str, int]:
+    if result in HIT_RESULTS:
+        return {'team_hits': 1}
+    if result in ERROR_RESULTS:
+        return {'opponent_errors': 1}
+    return {}
+
+def inning_runs_deltas(inning: Inning) -> Dict[str, int]:
+    return {'team_runs': inning.team_runs or 0, 'opponent_runs': inning.opponent_runs or 0}
+
+def apply_deltas(game_id: int, player_id: int, deltas: Dict[str, int], sign: int = 1) -> None:
+    """Add (or with sign=-1 subtract) deltas to one GameStats row.
+
+    Issues a single UPDATE ... SET col = col + n, and an INSERT only when the
+    player has no stats row for the game yet. The change is also staged for
+    the leaderboards.
+    """
+    if not deltas or player_id is None:
+        return
+    result = db.session.execute(
+        update(GameStats)
+        .where(GameStats.game_id == game_id, GameStats.player_id == player_id)
+        .values({getattr(GameStats, name): getattr(GameStats, name) + sign * value
+                 for name, value in deltas.items()})
+    )
+    if result.rowcount == 0:
+        values = {name: 0 for name in DERIVED_COLUMNS}
+        values['runs'] = 0
+        values.update({name: sign * value for name, value in deltas.items()})
+        db.session.execute(insert(GameStats).values(game_id=game_id, player_id=player_id, **values))
+    leaderboards.stage(game_id, player_id, deltas, sign)
+
+def apply_line_score(game_id: int, deltas: Dict[str, int], sign: int = 1) -> None:
+    """Add (or with sign=-1 subtract) deltas to a game's line score in one UPDATE."""
+    deltas = {name: value for name, value in deltas.items() if value}
+    if not deltas or game_id is None:
+        return
+    db.session.execute(
+        update(Game)
+        .where(Game.id == game_id)
+        .values({getattr(Game, name): getattr(Game, name) + sign * value for name, value in deltas.items()})
+    )
+
+# Incremental updates, one per recorded or reversed event
+def _game_id_for_inning(inning_id: int) -> int:
+    return db.session.get(Inning, inning_id).game_id
+
+def _game_id_for_at_bat(at_bat_id: int) -> int:
+    return _game_id_for_inning(db.session.get(AtBat, at_bat_id).inning_id)
+
+def apply_at_bat(at_bat: AtBat, sign: int = 1) -> int:
+    """Count an at-bat in GameStats and the line score; returns its game id."""
+    game_id = _game_id_for_inning(at_bat.inning_id)
+    apply_deltas(game_id, at_bat.batter_id, at_bat_deltas(at_bat), sign)
+    apply_line_score(game_id, line_score_deltas(at_bat.result), sign)
+    return game_id
+
+def apply_out(out: Out, sign: int = 1) -> int:
+    """Count an out in GameStats; returns its game id."""
+    game_id = _game_id_for_at_bat(out.at_bat_id)
+    apply_deltas(game_id, out.player_id, out_deltas(out), sign)
+    return game_id
+
+def apply_steal(steal: Steal, sign: int = 1) -> int:
+    """Count a steal in GameStats; returns its game id."""
+    game_id = _game_id_for_at_bat(steal.at_bat_id)
+    apply_deltas(game_id, steal.player_id, steal_deltas(steal), sign)
+    return game_id
+
+# Full rebuild
+def compute_game_totals(game_id: int) -> Dict[int, Dict[str, int]]:
+    """Recount the derived GameStats columns for a game from its event rows."""
+    totals: Dict[int, Dict[str, int]] = {}
+
+    def row_for(player_id):
+        return totals.setdefault(player_id, {name: 0 for name in DERIVED_COLUMNS})
+
+    at_bat_rows = db.session.execute(
+        select(
+            AtBat.batter_id,
+            func.sum(case((AtBat.result.in_(NON_AT_BAT_RESULTS), 0), else_=1)),
+            func.sum(case((AtBat.result.in_(HIT_RESULTS), 1), else_=0)),
+            *[func.sum(case((AtBat.result == result, 1), else_=0)) for result in EXTRA_BASE_HITS],
+            func.sum(case((AtBat.result.in_(WALK_RESULTS), 1), else_=0)),
+            func.sum(func.coalesce(AtBat.rbis, 0)),
+        )
+        .join(Inning, AtBat.inning_id == Inning.id)
+        .where(Inning.game_id == game_id)
+        .group_by(AtBat.batter_id)
+    )
+    for player_id, at_bats, hits, doubles, triples, home_runs, walks, rbis in at_bat_rows:
+        if player_id is None:
+            continue
+        row_for(player_id).update(at_bats=int(at_bats), hits=int(hits), doubles=int(doubles),
+                                  triples=int(triples), home_runs=int(home_runs),
+                                  walks=int(walks), rbis=int(rbis))
+
+    out_rows = db.session.execute(
+        select(Out.player_id, func.count(Out.id))
+        .join(AtBat, Out.at_bat_id == AtBat.id)
+        .join(Inning, AtBat.inning_id == Inning.id)
+        .where(Inning.game_id == game_id, Out.out_type.in_(STRIKEOUT_OUT_TYPES))
+        .group_by(Out.player_id)
+    )
+    for player_id, strikeouts in out_rows:
+        if player_id is not None:
+            row_for(player_id)['strikeouts'] = int(strikeouts)
+
+    steal_rows = db.session.execute(
+        select(
+            Steal.player_id,
+            func.sum(case((Steal.success, 1), else_=0)),
+            func.sum(case((Steal.success, 0), else_=1)),
+        )
+        .join(AtBat, Steal.at_bat_id == AtBat.id)
+        .join(Inning, AtBat.inning_id == Inning.id)
+        .where(Inning.game_id == game_id)
+        .group_by(Steal.player_id)
+    )
+    for player_id, stolen_bases, caught_stealing in steal_rows:
+        if player_id is not None:
+            row_for(player_id).update(stolen_bases=int(stolen_bases), caught_stealing=int(caught_stealing))
+
+    return totals
+
+def rebuild_game_stats(game_id: int) -> List[GameStats]:
+    """Overwrite a game's derived GameStats columns with a full recount.
+
+    Rows for players with no events are zeroed rather than deleted, and the
+    hand-maintained 'runs' column is left untouched. The caller commits.
+    """
+    totals = compute_game_totals(game_id)
+    existing = {stats.player_id: stats for stats in
+                GameStats.query.filter_by(game_id=game_id).all()}
+    for player_id, stats in existing.items():
+        values = totals.get(player_id, {})
+        leaderboards.stage(game_id, player_id, {name: values.get(name, 0) - (getattr(stats, name) or 0)
+                                                for name in DERIVED_COLUMNS})
+        for name in DERIVED_COLUMNS:
+            setattr(stats, name, values.get(name, 0))
+    for player_id, values in totals.items():
+        if player_id not in existing:
+            stats = GameStats(game_id=game_id, player_id=player_id, runs=0, **values)
+            db.session.add(stats)
+            existing[player_id] = stats
+            leaderboards.stage(game_id, player_id, values)
+    db.session.flush()
+    return list(existing.values())
+
+def compute_line_score(game_id: int) -> Dict[str, int]:
+    """Recount the derived line score columns for a game from its innings and at-bats."""
+    team_runs, opponent_runs = db.session.execute(
+        select(func.coalesce(func.sum(Inning.team_runs), 0), func.coalesce(func.sum(Inning.opponent_runs), 0))
+        .where(Inning.game_id == game_id)
+    ).one()
+    team_hits, opponent_errors = db.session.execute(
+        select(
+            func.coalesce(func.sum(case((AtBat.result.in_(HIT_RESULTS), 1), else_=0)), 0),
+            func.coalesce(func.sum(case((AtBat.result.in_(ERROR_RESULTS), 1), else_=0)), 0),
+        )
+        .join(Inning, AtBat.inning_id == Inning.id)
+        .where(Inning.game_id == game_id)
+    ).one()
+    return {'team_runs': int(team_runs), 'team_hits': int(team_hits), 'opponent_runs': int(opponent_runs),
+            'opponent_errors': int(opponent_errors)}
+
+def rebuild_line_score(game_id: int) -> Dict[str, int]:
+    """Overwrite a game's derived line score with a full recount; the caller commits."""
+    line = compute_line_score(game_id)
+    db.session.execute(update(Game).where(Game.id == game_id).values(**line))
+    return line
@@ -0,0 +1,182 @@
+from app import db
+from app.models import Team, Player, Game, Inning, BattingOrder, GameStats, AtBat, Out, Steal
+from sqlalchemy import select
+from datetime import datetime
+from typing import NamedTuple, Optional, Tuple, Dict, List
+
+# Immutable box score structure. Everything is a NamedTuple of plain values
+# and tuples, so a loaded box score is safe to cache or share across threads.
+class OutLine(NamedTuple):
+    id: int
+    player_id: Optional[int]
+    out_type: str
+    base: Optional[int]
+    fielder_id: Optional[int]
+    # Order among the at-bat's outs and steals; None on rows stored without one
+    sequence: Optional[int]
+
+class StealLine(NamedTuple):
+    id: int
+    player_id: Optional[int]
+    from_base: int
+    to_base: int
+    success: bool
+    sequence: Optional[int]
+
+class AtBatLine(NamedTuple):
+    id: int
+    batter_id: Optional[int]
+    batter_name: Optional[str]
+    result: str
+    rbis: int
+    balls: int
+    strikes: int
+    bases_advanced: int
+    runners_advanced: int
+    outs: Tuple[OutLine, ...]
+    steals: Tuple[StealLine, ...]
+
+class InningLine(NamedTuple):
+    id: int
+    inning_number: int
+    team_runs: int
+    opponent_runs: int
+    at_bats: Tuple[AtBatLine, ...]
+
+class LineupSlot(NamedTuple):
+    order_number: int
+    player_id: int
+    name: str
+    number: Optional[int]
+
+class StatLine(NamedTuple):
+    player_id: int
+    name: str
+    at_bats: int
+    hits: int
+    doubles: int
+    triples: int
+    home_runs: int
+    runs: int
+    rbis: int
+    strikeouts: int
+    walks: int
+    stolen_bases: int
+    caught_stealing: int
+
+class BoxScore(NamedTuple):
+    game_id: int
+    date: datetime
+    opponent: str
+    team_id: Optional[int]
+    team_name: Optional[str]
+    team_runs: int
+    opponent_runs: int
+    innings: Tuple[InningLine, ...]
+    lineup: Tuple[LineupSlot, ...]
+    stats: Tuple[StatLine, ...]
+
+def _group(rows, key_index: int) -> Dict[int, List]:
+    grouped: Dict[int, List] = {}
+    for row in rows:
+        grouped.setdefault(row[key_index], []).append(row)
+    return grouped
+
+def load_box_score(game_id: int) -> Optional[BoxScore]:
+    """Load a game's whole tree with a fixed number of set-based queries.
+
+    One query each for the game, innings, at-bats, outs, steals, lineup and
+    stat lines, no matter how many innings or at-bats the game has.
+    """
+    session = db.session
+    game = session.execute(
+        select(Game.id, Game.date, Game.opponent, Game.team_id, Team.name)
+        .outerjoin(Team, Game.team_id == Team.id)
+        .where(Game.id == game_id)
+    ).first()
+    if game is None:
+        return None
+
+    innings = session.execute(
+        select(Inning.id, Inning.inning_number, Inning.team_runs, Inning.opponent_runs)
+        .where(Inning.game_id == game_id)
+        .order_by(Inning.inning_number, Inning.id)
+    ).all()
+
+    at_bats = session.execute(
+        select(AtBat.id, AtBat.inning_id, AtBat.batter_id, Player.name, AtBat.result, AtBat.rbis,
+               AtBat.balls, AtBat.strikes, AtBat.bases_advanced, AtBat.runners_advanced)
+        .join(Inning, AtBat.inning_id == Inning.id)
+        .outerjoin(Player, AtBat.batter_id == Player.id)
+        .where(Inning.game_id == game_id)
+        .order_by(AtBat.id)
+    ).all()
+
+    outs = _group(session.execute(
+        select(Out.at_bat_id, Out.id, Out.player_id, Out.out_type, Out.base, Out.fielder_id, Out.sequence)
+        .join(AtBat, Out.at_bat_id == AtBat.id)
+        .join(Inning, AtBat.inning_id == Inning.id)
+        .where(Inning.game_id == game_id)
+        .order_by(Out.id)
+    ), 0)
+
+    steals = _group(session.execute(
+        select(Steal.at_bat_id, Steal.id, Steal.player_id, Steal.from_base, Steal.to_base, Steal.success,
+               Steal.sequence)
+        .join(AtBat, Steal.at_bat_id == AtBat.id)
+        .join(Inning, AtBat.inning_id == Inning.id)
+        .where(Inning.game_id == game_id)
+        .order_by(Steal.id)
+    ), 0)
+
+    lineup = session.execute(
+        select(BattingOrder.order_number, Player.id, Player.name, Player.number)
+        .join(Player, BattingOrder.player_id == Player.id)
+        .where(BattingOrder.game_id == game_id)
+        .order_by(BattingOrder.order_number)
+    ).all()
+
+    stats = session.execute(
+        select(GameStats.player_id, Player.name, GameStats.at_bats, GameStats.hits, GameStats.doubles,
+               GameStats.triples, GameStats.home_runs, GameStats.runs, GameStats.rbis,
+               GameStats.strikeouts, GameStats.walks, GameStats.stolen_bases,
+               GameStats.caught_stealing)
+        .join(Player, GameStats.player_id == Player.id)
+        .where(GameStats.game_id == game_id)
+        .order_by(GameStats.player_id)
+    ).all()
+
+    at_bats_by_inning = _group(at_bats, 1)
+    inning_lines = tuple(
+        InningLine(
+            id=inning_id,
+            inning_number=inning_number,
+            team_runs=team_runs or 0,
+            opponent_runs=opponent_runs or 0,
+            at_bats=tuple(
+                AtBatLine(
+                    id=row.id, batter_id=row.batter_id, batter_name=row.name, result=row.result,
+                    rbis=row.rbis or 0, balls=row.balls or 0, strikes=row.strikes or 0,
+                    bases_advanced=row.bases_advanced or 0,
+                    runners_advanced=row.runners_advanced or 0,
+                    outs=tuple(OutLine(*out[1:]) for out in outs.get(row.id, ())),
+                    steals=tuple(StealLine(*steal[1:]) for steal in steals.get(row.id, ())),
+                )
+                for row in at_bats_by_inning.get(inning_id, ())
+            ),
+        )
+        for inning_id, inning_number, team_runs, opponent_runs in innings
+    )
+
+    return BoxScore(
+        game_id=game.id,
+        date=game.date,
+        opponent=game.opponent,
+        team_id=game.team_id,
+        team_name=game.name,
+        team_runs=sum(inning.team_runs for inning in inning_lines),
+        opponent_runs=sum(inning.opponent_runs for inning in inning_lines),
+        innings=inning_lines,
+        lineup=tuple(LineupSlot(*row) for row in lineup),
+        stats=tuple(StatLine(row[0], row[1], *(value or 0 for value in row[2:])) for row in stats),
+    )
@@ -0,0 +1,190 @@
+import json
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+# In-process publish/subscribe for live game feeds. A change is published
+# once per topic (a game id) and encoded once as a Server-Sent Events frame;
+# the same string is then handed to every subscriber's ring buffer, so
+# fanning out to N viewers costs N deque appends and no database reads.
+#
+# Buffers are bounded: a client that stops reading loses its oldest frames
+# rather than growing without limit. Every 'state' frame carries the whole
+# scoreboard, so a lagging client catches up with the next one.
+#
+# A topic's latest state is kept only while it has subscribers. crud drops
+# it whenever a write touches the game (see invalidate()), so a viewer who
+# connects afterwards never starts from a stale scoreboard.
+
+def sse_frame(event: str, data: Any, event_id: Optional[int] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'), default=str)}")
+    return '\n'.join(lines) + '\n\n'
+
+class Subscription:
+    """One client's bounded buffer of frames for a topic."""
+
+    __slots__ = ('topic', 'buffer', 'dropped', 'closed', '_ready')
+
+    def __init__(self, topic: Hashable, buffer_size: int):
+        self.topic = topic
+        self.buffer = deque(maxlen=buffer_size)
+        self.dropped = 0
+        self.closed = False
+        self._ready = threading.Condition(threading.Lock())
+
+    def put(self, frame: str) -> None:
+        with self._ready:
+            if len(self.buffer) == self.buffer.maxlen:
+                self.dropped += 1
+            self.buffer.append(frame)
+            self._ready.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Next frame, or None if none arrived within timeout or the subscription closed."""
+        with self._ready:
+            if not self.buffer and not self.closed:
+                self._ready.wait(timeout)
+            return self.buffer.popleft() if self.buffer else None
+
+    def drain(self) -> List[str]:
+        with self._ready:
+            frames = list(self.buffer)
+            self.buffer.clear()
+        return frames
+
+    def close(self) -> None:
+        with self._ready:
+            self.closed = True
+            self._ready.notify_all()
+
+class Broker:
+    """Flask extension fanning published frames out to topic subscribers.
+
+    FEED_BUFFER_SIZE caps the frames held per client (default 64) and
+    FEED_HEARTBEAT is the seconds between keep-alive comments (default 15).
+    """
+
+    def __init__(self, app=None):
+        self.buffer_size = 64
+        self.heartbeat = 15.0
+        self._reset()
+        if app is not None:
+            self.init_app(app)
+
+    def _reset(self) -> None:
+        self._lock = threading.Lock()
+        self._topics: Dict[Hashable, Set[Subscription]] = {}
+        self._latest: Dict[Hashable, str] = {}
+        self._sequence: Dict[Hashable, int] = {}
+        self._loading: Dict[Hashable, threading.Lock] = {}
+        self.published = 0
+        self.delivered = 0
+
+    def init_app(self, app):
+        self.buffer_size = app.config.get('FEED_BUFFER_SIZE', 64)
+        self.heartbeat = app.config.get('FEED_HEARTBEAT', 15.0)
+        self._reset()
+        app.extensions['broker'] = self
+
+    # Publishing
+    def publish(self, topic: Hashable, event: str, data: Any) -> int:
+        """Send one frame to every subscriber of topic; returns how many got it.
+
+        While the topic has subscribers its 'state' frames are also kept as
+        its latest, which new subscribers receive first.
+        """
+        return self._publish(topic, event, data)[1]
+
+    def _publish(self, topic: Hashable, event: str, data: Any) -> Tuple[str, int]:
+        with self._lock:
+            subscribers = self._topics.get(topic, ())
+            sequence = self._sequence.get(topic, 0) + 1
+            frame = sse_frame(event, data, sequence)
+            # A topic nobody watches keeps nothing; its next viewer loads afresh
+            if subscribers:
+                self._sequence[topic] = sequence
+                if event == 'state':
+                    self._latest[topic] = frame
+            # Delivered under the lock so every client sees frames in order;
+            # a put is one deque append
+            for subscription in subscribers:
+                subscription.put(frame)
+            self.published += 1
+            self.delivered += len(subscribers)
+            return frame, len(subscribers)
+
+    def latest(self, topic: Hashable, loader: Optional[Callable[[], Any]] = None) -> Optional[str]:
+        """The topic's latest 'state' frame.
+
+        If there is none yet, loader() is called once, however many
+        subscribers ask concurrently, and a non-None result is published as
+        the state.
+        """
+        frame = self._latest.get(topic)
+        if frame is not None or loader is None:
+            return frame
+        with self._lock:
+            loading = self._loading.setdefault(topic, threading.Lock())
+        with loading:
+            frame = self._latest.get(topic)
+            if frame is None:
+                data = loader()
+                if data is not None:
+                    frame = self._publish(topic, 'state', data)[0]
+        with self._lock:
+            if topic not in self._topics:
+                self._loading.pop(topic, None)
+        return frame
+
+    def invalidate(self, topic: Hashable) -> None:
+        """Forget the topic's latest state, after the data behind it changed.
+
+        Current subscribers keep their frames; the next latest() call loads
+        the state again and publishes it to all of them.
+        """
+        with self._lock:
+            self._latest.pop(topic, None)
+
+    # Subscribing
+    def subscribe(self, topic: Hashable, buffer_size: Optional[int] = None) -> Subscription:
+        subscription = Subscription(topic, buffer_size or self.buffer_size)
+        with self._lock:
+            self._topics.setdefault(topic, set()).add(subscription)
+            frame = self._latest.get(topic)
+            if frame is not None:
+                subscription.put(frame)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscription.close()
+        with self._lock:
+            subscribers = self._topics.get(subscription.topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    # The last viewer left: nothing is kept for the topic
+                    del self._topics[subscription.topic]
+                    self._latest.pop(subscription.topic, None)
+                    self._sequence.pop(subscription.topic, None)
+                    self._loading.pop(subscription.topic, None)
+
+    def subscriber_count(self, topic: Optional[Hashable] = None) -> int:
+        with self._lock:
+            if topic is not None:
+                return len(self._topics.get(topic, ()))
+            return sum(len(subscribers) for subscribers in self._topics.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            subscribers = [subscription for group in self._topics.values() for subscription in group]
+            return {
+                'topics': len(self._topics),
+                'subscribers': len(subscribers),
+                'published': self.published,
+                'delivered': self.delivered,
+                'dropped': sum(subscription.dropped for subscription in subscribers),
+            }
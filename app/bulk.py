@@ -0,0 +1,77 @@
+from app import db
+from sqlalchemy import select, func
+from typing import Any, Dict, Iterable, List, Optional
+
+# Helpers for high-volume writes that bypass the ORM unit of work. Rows are
+# plain dicts sent through Core executemany on the session's connection, so
+# they share the session's transaction.
+
+def next_id(model) -> int:
+    """Return the first primary key above every existing row of model.
+
+    Lets callers assign ids up front and link parent and child rows without
+    reading keys back. The MAX(id) read takes a lock (SELECT ... FOR UPDATE
+    on MySQL) that blocks other inserts into the table until the transaction
+    ends, so insert the rows and commit soon after.
+    """
+    current = db.session.execute(select(func.max(model.id)).with_for_update()).scalar()
+    return (current or 0) + 1
+
+class Ids:
+    """Hands out primary keys from next_id, per model.
+
+    A commit releases the locks behind the reserved ids; call reserve()
+    again before handing out more.
+    """
+
+    def __init__(self, models: Iterable):
+        self.next: Dict[Any, int] = {model: 0 for model in models}
+        self.reserve()
+
+    def reserve(self) -> None:
+        for model, value in self.next.items():
+            self.next[model] = max(value, next_id(model))
+
+    def __call__(self, model) -> int:
+        value = self.next[model]
+        self.next[model] = value + 1
+        return value
+
+def insert_rows(model, rows: List[Dict[str, Any]]) -> None:
+    """INSERT rows with a single executemany; every row needs the same keys."""
+    if rows:
+        db.session.connection().execute(model.__table__.insert(), rows)
+
+class ChunkedWriter:
+    """Buffer rows per model and write them in executemany batches.
+
+    Buffers are flushed together, in the order models were passed in, so
+    parents always land before the children that reference them. Given the
+    Ids the rows are keyed from, each full chunk is also committed and the
+    ids reserved again, so the next_id locks last one chunk rather than the
+    whole run.
+    """
+
+    def __init__(self, models: Iterable, chunk_size: int = 5000, ids: Optional[Ids] = None):
+        self.models = list(models)
+        self.chunk_size = chunk_size
+        self.ids = ids
+        self.buffers: Dict[Any, List[Dict[str, Any]]] = {model: [] for model in self.models}
+        self.counts: Dict[str, int] = {model.__tablename__: 0 for model in self.models}
+
+    def add(self, model, row: Dict[str, Any]) -> None:
+        buffer = self.buffers[model]
+        buffer.append(row)
+        if len(buffer) >= self.chunk_size:
+            self.flush()
+            if self.ids is not None:
+                db.session.commit()
+                self.ids.reserve()
+
+    def flush(self) -> None:
+        for model in self.models:
+            buffer = self.buffers[model]
+            if buffer:
+                insert_rows(model, buffer)
+                self.counts[model.__tablename__] += len(buffer)
+                self.buffers[model] = []
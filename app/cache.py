@@ -0,0 +1,205 @@
+import pickle
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+# Returned by backends on a miss, so that falsy values can still be cached
+MISSING = object()
+
+class CacheBackend(ABC):
+    """Interface every cache backend implements.
+
+    Keys are strings. Backends count their own hits and misses; ``stats()``
+    reports them so the cache can be sized.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    def get(self, key: str) -> Any:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, *keys: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    def __len__(self) -> int:
+        return 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'backend': type(self).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': len(self),
+        }
+
+class NullCache(CacheBackend):
+    """Caches nothing; every lookup is a miss."""
+
+    def get(self, key):
+        self.misses += 1
+        return MISSING
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+    def clear(self):
+        pass
+
+class LRUCache(CacheBackend):
+    """Thread-safe in-process LRU cache with a per-entry time to live."""
+
+    def __init__(self, maxsize: int = 1024, default_ttl: Optional[float] = 300,
+                 clock: Callable[[], float] = time.monotonic):
+        super().__init__()
+        self.maxsize = maxsize
+        self.default_ttl = default_ttl
+        self.clock = clock
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return MISSING
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = self.clock() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+class RedisCache(CacheBackend):
+    """Shared cache for several workers, backed by Redis.
+
+    Needs the optional ``redis`` package unless a client is passed in.
+    Values are pickled, so only cache trusted, plain data.
+    """
+
+    def __init__(self, url: str = 'redis://localhost:6379/0', default_ttl: Optional[float] = 300,
+                 key_prefix: str = 'softball:', client=None):
+        super().__init__()
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.default_ttl = default_ttl
+        self.key_prefix = key_prefix
+
+    def get(self, key):
+        payload = self.client.get(self.key_prefix + key)
+        if payload is None:
+            self.misses += 1
+            return MISSING
+        self.hits += 1
+        return pickle.loads(payload)
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        self.client.set(self.key_prefix + key, pickle.dumps(value),
+                        ex=int(ttl) if ttl else None)
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*[self.key_prefix + key for key in keys])
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.key_prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+    def __len__(self):
+        return sum(1 for _ in self.client.scan_iter(match=self.key_prefix + '*'))
+
+class Cache:
+    """Flask extension choosing a cache backend from the app config.
+
+    CACHE_TYPE is 'lru' (default), 'redis' or 'null'; CACHE_MAXSIZE,
+    CACHE_DEFAULT_TTL, CACHE_REDIS_URL and CACHE_KEY_PREFIX tune it.
+    """
+
+    def __init__(self, app=None):
+        self.backend: CacheBackend = NullCache()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        cache_type = app.config.get('CACHE_TYPE', 'lru')
+        ttl = app.config.get('CACHE_DEFAULT_TTL', 300)
+        if cache_type == 'lru':
+            self.backend = LRUCache(maxsize=app.config.get('CACHE_MAXSIZE', 1024), default_ttl=ttl)
+        elif cache_type == 'redis':
+            self.backend = RedisCache(url=app.config.get('CACHE_REDIS_URL', 'redis://localhost:6379/0'),
+                                      default_ttl=ttl,
+                                      key_prefix=app.config.get('CACHE_KEY_PREFIX', 'softball:'))
+        elif cache_type == 'null':
+            self.backend = NullCache()
+        else:
+            raise ValueError(f'Unknown CACHE_TYPE {cache_type!r}')
+        app.extensions['cache'] = self
+
+    def get(self, key: str) -> Any:
+        return self.backend.get(key)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.backend.set(key, value, ttl)
+
+    def delete(self, *keys: str) -> None:
+        self.backend.delete(*keys)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.backend.stats()
+
+    def get_or_load(self, key: str, loader: Callable[[], Any], ttl: Optional[float] = None,
+                    store: bool = True) -> Any:
+        """Return the cached value, or call loader() and cache its non-None result."""
+        value = self.backend.get(key)
+        if value is MISSING:
+            value = loader()
+            if store and value is not None:
+                self.backend.set(key, value, ttl)
+        return value
@@ -1,15 +1,159 @@
-from app import db
+from app import db, cache, broker, aggregation
+from app.leaderboard import leaderboards
 from app.models import User, Team, Player, Game, GameStats, BattingOrder, Inning, AtBat, Out, Steal
+from app.models import principal_cache_key, COUNT_COLUMNS
+from app.metrics import metrics, instrument_module
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, NamedTuple, Sequence, Tuple
+from contextlib import contextmanager
+from sqlalchemy import insert, delete, func, select, tuple_
+from sqlalchemy.orm import make_transient_to_detached
 from werkzeug.security import generate_password_hash
 
+# Unit of work
+_UOW_DEPTH = 'crud_unit_of_work_depth'
+_UOW_STALE_KEYS = 'crud_unit_of_work_stale_keys'
+_UOW_STALE_FEEDS = 'crud_unit_of_work_stale_feeds'
+
+@contextmanager
+def unit_of_work():
+    """Group crud calls into a single transaction committed on exit.
+
+    Inside the block crud functions flush instead of committing, so new rows
+    still get their ids. Blocks may be nested; only the outermost one commits,
+    and any exception rolls the whole transaction back.
+    """
+    session = db.session
+    depth = session.info.get(_UOW_DEPTH, 0)
+    session.info[_UOW_DEPTH] = depth + 1
+    try:
+        yield session
+        if depth == 0:
+            session.commit()
+            # Drop keys and feed states again in case a concurrent read
+            # reloaded them between the write and the commit
+            cache.delete(*session.info.pop(_UOW_STALE_KEYS, ()))
+            for game_id in session.info.pop(_UOW_STALE_FEEDS, ()):
+                broker.invalidate(game_id)
+    except Exception:
+        if depth == 0:
+            session.rollback()
+            session.info.pop(_UOW_STALE_KEYS, None)
+            session.info.pop(_UOW_STALE_FEEDS, None)
+        raise
+    finally:
+        session.info[_UOW_DEPTH] = depth
+
+def in_unit_of_work() -> bool:
+    return db.session.info.get(_UOW_DEPTH, 0) > 0
+
+def _commit(flush: bool = False) -> None:
+    if in_unit_of_work():
+        if flush:
+            db.session.flush()
+    else:
+        db.session.commit()
+
+# Read-through cache for teams, rosters and schedules. Entries hold plain
+# column dicts; reads turn them back into session-attached instances without
+# touching the database.
+def _team_key(team_id: int) -> str:
+    return f'team:{team_id}'
+
+def _team_players_key(team_id: int) -> str:
+    return f'team:{team_id}:players'
+
+def _team_games_key(team_id: int) -> str:
+    return f'team:{team_id}:games'
+
+def _to_row(obj) -> Dict[str, Any]:
+    return {attr.key: getattr(obj, attr.key) for attr in obj.__mapper__.column_attrs}
+
+def _from_row(model, row: Dict[str, Any]):
+    obj = db.session.identity_map.get(db.session.identity_key(model, row['id']))
+    if obj is None:
+        obj = model(**row)
+        make_transient_to_detached(obj)
+        obj = db.session.merge(obj, load=False)
+    return obj
+
+def _dump(value):
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return [_to_row(obj) for obj in value]
+    return _to_row(value)
+
+def _cached(key: str, model, loader):
+    # Inside a unit of work the session may hold uncommitted writes, so read
+    # through to the database and leave the cache alone
+    if in_unit_of_work():
+        return loader()
+    value = cache.get_or_load(key, lambda: _dump(loader()))
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return [_from_row(model, row) for row in value]
+    return _from_row(model, value)
+
+def _invalidate(*keys: str) -> None:
+    cache.delete(*keys)
+    if in_unit_of_work():
+        db.session.info.setdefault(_UOW_STALE_KEYS, set()).update(keys)
+
+def _invalidate_line_score(game_id: int) -> None:
+    # Cached schedules hold each game's line score
+    game = db.session.get(Game, game_id)
+    if game is not None:
+        _invalidate(_team_games_key(game.team_id))
+
+def _invalidate_feed(game_id: int) -> None:
+    # Live feeds (app.broker) keep the scoreboard of every watched game
+    broker.invalidate(game_id)
+    if in_unit_of_work():
+        db.session.info.setdefault(_UOW_STALE_FEEDS, set()).add(game_id)
+
+# Keyset pages. A page seeks past the previous page's last row through the
+# index its ordering matches, so page 500 costs what page 1 does where an
+# OFFSET would walk every row before it. Pass the previous page's
+# next_cursor as after; with columns, pages hold lightweight rows of just
+# those columns (plus the ordering ones) instead of ORM instances. Pages
+# read through to the database rather than the cache.
+class Page(NamedTuple):
+    items: List[Any]
+    # None on the last page
+    next_cursor: Optional[Tuple[Any, ...]]
+
+def _page(model, criteria, order_by: Sequence[str], after: Optional[Sequence[Any]], limit: int,
+          columns: Optional[Sequence[str]]) -> Page:
+    if limit < 1:
+        raise ValueError('limit must be at least 1')
+    keys = [getattr(model, name) for name in order_by]
+    if columns is None:
+        statement = select(model)
+    else:
+        unknown = set(columns).difference(model.__table__.columns.keys())
+        if unknown:
+            raise ValueError(f"unknown {model.__tablename__} columns: {', '.join(sorted(unknown))}")
+        # The cursor is read off the last row
+        names = list(columns) + [name for name in order_by if name not in columns]
+        statement = select(*(getattr(model, name) for name in names))
+    statement = statement.where(*criteria).order_by(*keys).limit(limit + 1)
+    if after is not None:
+        statement = statement.where(tuple_(*keys) > tuple(after))
+    result = db.session.execute(statement)
+    items = result.scalars().all() if columns is None else result.all()
+    if len(items) <= limit:
+        return Page(items, None)
+    items = items[:limit]
+    return Page(items, tuple(getattr(items[-1], name) for name in order_by))
+
 # User CRUD operations
 def create_user(username: str, email: str, password: str) -> User:
     user = User(username=username, email=email)
     user.set_password(password)
     db.session.add(user)
-    db.session.commit()
+    _commit(flush=True)
     return user
 
 def get_user_by_id(user_id: int) -> Optional[User]:
@@ -30,14 +174,16 @@ def update_user(user_id: int, data: Dict[str, Any]) -> Optional[User]:
             user.email = data['email']
         if 'password' in data:
             user.set_password(data['password'])
-        db.session.commit()
+        _commit()
+        _invalidate(principal_cache_key(user_id))
     return user
 
 def delete_user(user_id: int) -> bool:
     user = get_user_by_id(user_id)
     if user:
         db.session.delete(user)
-        db.session.commit()
+        _commit()
+        _invalidate(principal_cache_key(user_id))
         return True
     return False
 
@@ -45,43 +191,80 @@ def delete_user(user_id: int) -> bool:
 def create_team(name: str, user_id: int) -> Team:
     team = Team(name=name, user_id=user_id)
     db.session.add(team)
-    db.session.commit()
+    _commit(flush=True)
     return team
 
 def get_team_by_id(team_id: int) -> Optional[Team]:
-    return db.session.get(Team, team_id)
+    return _cached(_team_key(team_id), Team, lambda: db.session.get(Team, team_id))
 
 def get_teams_by_user(user_id: int) -> List[Team]:
-    return Team.query.filter_by(user_id=user_id).all()
+    return Team.query.filter_by(user_id=user_id).order_by(Team.name, Team.id).all()
+
+def page_teams_by_user(user_id: int, after: Optional[Sequence[Any]] = None, limit: int = 50,
+                       columns: Optional[Sequence[str]] = None) -> Page:
+    """A user's teams in (name, id) order, limit at a time."""
+    return _page(Team, [Team.user_id == user_id], ('name', 'id'), after, limit, columns)
 
 def update_team(team_id: int, data: Dict[str, Any]) -> Optional[Team]:
     team = get_team_by_id(team_id)
     if team:
         if 'name' in data:
             team.name = data['name']
-        db.session.commit()
+        _commit()
+        _invalidate(_team_key(team_id))
     return team
 
 def delete_team(team_id: int) -> bool:
     team = get_team_by_id(team_id)
     if team:
         db.session.delete(team)
-        db.session.commit()
+        _commit()
+        _invalidate(_team_key(team_id), _team_players_key(team_id), _team_games_key(team_id))
         return True
     return False
 
+def invalidate_team_cache(team_id: int) -> None:
+    """Drop a team's cached row, roster and schedule.
+
+    For bulk writers (the scorebook import, the league generator) that
+    insert rows without going through crud.
+    """
+    _invalidate(_team_key(team_id), _team_players_key(team_id), _team_games_key(team_id))
+
 # Player CRUD operations
 def create_player(name: str, team_id: int, number: Optional[int] = None) -> Player:
     player = Player(name=name, team_id=team_id, number=number)
     db.session.add(player)
-    db.session.commit()
+    _commit(flush=True)
+    _invalidate(_team_players_key(team_id))
     return player
 
+def bulk_create_players(team_id: int, rows: Iterable[Dict[str, Any]]) -> int:
+    """Insert many players with one executemany; returns the number inserted.
+
+    Each row is a dict with a ``name`` and an optional ``number``.
+    """
+    params = [
+        {'name': row['name'], 'number': row.get('number'), 'team_id': team_id}
+        for row in rows
+    ]
+    if params:
+        db.session.execute(insert(Player), params)
+    _commit()
+    _invalidate(_team_players_key(team_id))
+    return len(params)
+
 def get_player_by_id(player_id: int) -> Optional[Player]:
     return db.session.get(Player, player_id)
 
 def get_players_by_team(team_id: int) -> List[Player]:
-    return Player.query.filter_by(team_id=team_id).all()
+    return _cached(_team_players_key(team_id), Player,
+                   lambda: Player.query.filter_by(team_id=team_id).order_by(Player.name, Player.id).all())
+
+def page_players_by_team(team_id: int, after: Optional[Sequence[Any]] = None, limit: int = 50,
+                         columns: Optional[Sequence[str]] = None) -> Page:
+    """A team's roster in (name, id) order, limit at a time."""
+    return _page(Player, [Player.team_id == team_id], ('name', 'id'), after, limit, columns)
 
 def update_player(player_id: int, data: Dict[str, Any]) -> Optional[Player]:
     player = get_player_by_id(player_id)
@@ -90,14 +273,19 @@ def update_player(player_id: int, data: Dict[str, Any]) -> Optional[Player]:
             player.name = data['name']
         if 'number' in data:
             player.number = data['number']
-        db.session.commit()
+        team_id = player.team_id
+        _commit()
+        _invalidate(_team_players_key(team_id))
     return player
 
 def delete_player(player_id: int) -> bool:
     player = get_player_by_id(player_id)
     if player:
+        team_id = player.team_id
         db.session.delete(player)
-        db.session.commit()
+        leaderboards.stage_reset()
+        _commit()
+        _invalidate(_team_players_key(team_id))
         return True
     return False
 
@@ -105,38 +293,62 @@ def delete_player(player_id: int) -> bool:
 def create_game(date: datetime, opponent: str, team_id: int) -> Game:
     game = Game(date=date, opponent=opponent, team_id=team_id)
     db.session.add(game)
-    db.session.commit()
+    _commit(flush=True)
+    _invalidate(_team_games_key(team_id))
     return game
 
 def get_game_by_id(game_id: int) -> Optional[Game]:
     return db.session.get(Game, game_id)
 
 def get_games_by_team(team_id: int) -> List[Game]:
-    return Game.query.filter_by(team_id=team_id).all()
+    return _cached(_team_games_key(team_id), Game,
+                   lambda: Game.query.filter_by(team_id=team_id).order_by(Game.date, Game.id).all())
+
+def page_games_by_team(team_id: int, after: Optional[Sequence[Any]] = None, limit: int = 50,
+                       columns: Optional[Sequence[str]] = None) -> Page:
+    """A team's schedule in (date, id) order, limit at a time."""
+    return _page(Game, [Game.team_id == team_id], ('date', 'id'), after, limit, columns)
 
 def update_game(game_id: int, data: Dict[str, Any]) -> Optional[Game]:
     game = get_game_by_id(game_id)
     if game:
         if 'date' in data:
             game.date = data['date']
+            # Its stats may move to another season
+            leaderboards.stage_reset()
         if 'opponent' in data:
             game.opponent = data['opponent']
-        db.session.commit()
+        # The rest of the line score follows the innings and at-bats
+        for name in ('team_errors', 'opponent_hits'):
+            if name in data:
+                setattr(game, name, data[name])
+        team_id = game.team_id
+        _commit()
+        _invalidate(_team_games_key(team_id))
+        _invalidate_feed(game_id)
     return game
 
 def delete_game(game_id: int) -> bool:
     game = get_game_by_id(game_id)
     if game:
+        team_id = game.team_id
         db.session.delete(game)
-        db.session.commit()
+        leaderboards.stage_reset()
+        _commit()
+        _invalidate(_team_games_key(team_id))
+        _invalidate_feed(game_id)
         return True
     return False
 
+def invalidate_game_feed(game_id: int) -> None:
+    """Drop the game's live feed state; for code that writes its rows without crud."""
+    _invalidate_feed(game_id)
+
 # Game Stats CRUD operations
 def create_game_stats(game_id: int, player_id: int) -> GameStats:
     stats = GameStats(game_id=game_id, player_id=player_id)
     db.session.add(stats)
-    db.session.commit()
+    _commit(flush=True)
     return stats
 
 def get_game_stats(game_id: int, player_id: int) -> Optional[GameStats]:
@@ -145,19 +357,45 @@ def get_game_stats(game_id: int, player_id: int) -> Optional[GameStats]:
 def update_game_stats(game_id: int, player_id: int, data: Dict[str, Any]) -> Optional[GameStats]:
     stats = get_game_stats(game_id, player_id)
     if stats:
+        deltas = {}
         for key, value in data.items():
             if hasattr(stats, key):
+                if key in COUNT_COLUMNS:
+                    deltas[key] = (value or 0) - (getattr(stats, key) or 0)
                 setattr(stats, key, value)
-        db.session.commit()
+        leaderboards.stage(game_id, player_id, deltas)
+        _commit()
+    return stats
+
+def recount_game_stats(game_id: int) -> List[GameStats]:
+    """Rebuild a game's derived stats and line score from its Inning/AtBat/Out/Steal rows."""
+    stats = aggregation.rebuild_game_stats(game_id)
+    aggregation.rebuild_line_score(game_id)
+    _commit()
+    _invalidate_line_score(game_id)
+    _invalidate_feed(game_id)
     return stats
 
 # Batting Order CRUD operations
 def create_batting_order(game_id: int, player_id: int, order_number: int) -> BattingOrder:
     batting_order = BattingOrder(game_id=game_id, player_id=player_id, order_number=order_number)
     db.session.add(batting_order)
-    db.session.commit()
+    _commit(flush=True)
+    _invalidate_feed(game_id)
     return batting_order
 
+def set_batting_order(game_id: int, player_ids: List[int]) -> List[BattingOrder]:
+    """Replace a game's lineup atomically; order numbers follow list order."""
+    db.session.execute(delete(BattingOrder).where(BattingOrder.game_id == game_id))
+    if player_ids:
+        db.session.execute(insert(BattingOrder), [
+            {'game_id': game_id, 'player_id': player_id, 'order_number': order_number}
+            for order_number, player_id in enumerate(player_ids, start=1)
+        ])
+    _commit()
+    _invalidate_feed(game_id)
+    return get_batting_order(game_id)
+
 def get_batting_order(game_id: int) -> List[BattingOrder]:
     return BattingOrder.query.filter_by(game_id=game_id).order_by(BattingOrder.order_number).all()
 
@@ -165,13 +403,152 @@ def update_batting_order(batting_order_id: int, order_number: int) -> Optional[B
     batting_order = db.session.get(BattingOrder, batting_order_id)
     if batting_order:
         batting_order.order_number = order_number
-        db.session.commit()
+        game_id = batting_order.game_id
+        _commit()
+        _invalidate_feed(game_id)
     return batting_order
 
 def delete_batting_order(batting_order_id: int) -> bool:
     batting_order = db.session.get(BattingOrder, batting_order_id)
     if batting_order:
+        game_id = batting_order.game_id
         db.session.delete(batting_order)
-        db.session.commit()
+        _commit()
+        _invalidate_feed(game_id)
+        return True
+    return False 
+
+# Inning CRUD operations
+def create_inning(game_id: int, inning_number: int) -> Inning:
+    inning = Inning(game_id=game_id, inning_number=inning_number, team_runs=0, opponent_runs=0)
+    db.session.add(inning)
+    _commit(flush=True)
+    _invalidate_feed(game_id)
+    return inning
+
+def get_innings(game_id: int) -> List[Inning]:
+    return Inning.query.filter_by(game_id=game_id).order_by(Inning.inning_number).all()
+
+def update_inning(inning_id: int, data: Dict[str, Any]) -> Optional[Inning]:
+    inning = db.session.get(Inning, inning_id)
+    if inning:
+        before = aggregation.inning_runs_deltas(inning)
+        if 'team_runs' in data:
+            inning.team_runs = data['team_runs']
+        if 'opponent_runs' in data:
+            inning.opponent_runs = data['opponent_runs']
+        after = aggregation.inning_runs_deltas(inning)
+        game_id = inning.game_id
+        aggregation.apply_line_score(game_id, {name: after[name] - before[name] for name in after})
+        _commit()
+        if after != before:
+            _invalidate_line_score(game_id)
+            _invalidate_feed(game_id)
+    return inning
+
+def delete_inning(inning_id: int) -> bool:
+    inning = db.session.get(Inning, inning_id)
+    if inning:
+        with unit_of_work():
+            for at_bat in inning.at_bats.all():
+                delete_at_bat(at_bat.id)
+            aggregation.apply_line_score(inning.game_id, aggregation.inning_runs_deltas(inning), sign=-1)
+            _invalidate_line_score(inning.game_id)
+            _invalidate_feed(inning.game_id)
+            db.session.delete(inning)
         return True
-    return False 
\ No newline at end of file
+    return False
+
+# At Bat CRUD operations
+# Recording or deleting at-bats, outs and steals keeps GameStats in step
+# incrementally; see app.aggregation.
+def create_at_bat(inning_id: int, batter_id: int, result: str, rbis: int = 0,
+                  balls: int = 0, strikes: int = 0, bases_advanced: int = 0,
+                  runners_advanced: int = 0, pitches: Optional[bytes] = None) -> AtBat:
+    at_bat = AtBat(inning_id=inning_id, batter_id=batter_id, result=result, rbis=rbis,
+                   balls=balls, strikes=strikes, bases_advanced=bases_advanced,
+                   runners_advanced=runners_advanced, pitches=pitches)
+    db.session.add(at_bat)
+    game_id = aggregation.apply_at_bat(at_bat)
+    _commit(flush=True)
+    if aggregation.line_score_deltas(result):
+        _invalidate_line_score(game_id)
+    _invalidate_feed(game_id)
+    return at_bat
+
+def get_at_bat_by_id(at_bat_id: int) -> Optional[AtBat]:
+    return db.session.get(AtBat, at_bat_id)
+
+def get_at_bats(inning_id: int) -> List[AtBat]:
+    return AtBat.query.filter_by(inning_id=inning_id).order_by(AtBat.id).all()
+
+def delete_at_bat(at_bat_id: int) -> bool:
+    at_bat = get_at_bat_by_id(at_bat_id)
+    if at_bat:
+        for out in at_bat.outs.all():
+            aggregation.apply_out(out, sign=-1)
+            db.session.delete(out)
+        for steal in at_bat.steals.all():
+            aggregation.apply_steal(steal, sign=-1)
+            db.session.delete(steal)
+        game_id = aggregation.apply_at_bat(at_bat, sign=-1)
+        line_score_changed = bool(aggregation.line_score_deltas(at_bat.result))
+        db.session.delete(at_bat)
+        _commit()
+        if line_score_changed:
+            _invalidate_line_score(game_id)
+        _invalidate_feed(game_id)
+        return True
+    return False
+
+def _next_sequence(at_bat_id: int) -> int:
+    # Outs and steals after an at-bat are numbered together, in recording order
+    last_out = select(func.max(Out.sequence)).where(Out.at_bat_id == at_bat_id).scalar_subquery()
+    last_steal = select(func.max(Steal.sequence)).where(Steal.at_bat_id == at_bat_id).scalar_subquery()
+    return max(value or 0 for value in db.session.execute(select(last_out, last_steal)).one()) + 1
+
+# Out CRUD operations
+def create_out(at_bat_id: int, player_id: int, out_type: str, base: Optional[int] = None,
+               fielder_id: Optional[int] = None) -> Out:
+    out = Out(at_bat_id=at_bat_id, player_id=player_id, out_type=out_type, base=base,
+              fielder_id=fielder_id, sequence=_next_sequence(at_bat_id))
+    db.session.add(out)
+    game_id = aggregation.apply_out(out)
+    _commit(flush=True)
+    _invalidate_feed(game_id)
+    return out
+
+def delete_out(out_id: int) -> bool:
+    out = db.session.get(Out, out_id)
+    if out:
+        game_id = aggregation.apply_out(out, sign=-1)
+        db.session.delete(out)
+        _commit()
+        _invalidate_feed(game_id)
+        return True
+    return False
+
+# Steal CRUD operations
+def create_steal(at_bat_id: int, player_id: int, from_base: int, to_base: int,
+                 success: bool) -> Steal:
+    steal = Steal(at_bat_id=at_bat_id, player_id=player_id, from_base=from_base,
+                  to_base=to_base, success=success, sequence=_next_sequence(at_bat_id))
+    db.session.add(steal)
+    game_id = aggregation.apply_steal(steal)
+    _commit(flush=True)
+    _invalidate_feed(game_id)
+    return steal
+
+def delete_steal(steal_id: int) -> bool:
+    steal = db.session.get(Steal, steal_id)
+    if steal:
+        game_id = aggregation.apply_steal(steal, sign=-1)
+        db.session.delete(steal)
+        _commit()
+        _invalidate_feed(game_id)
+        return True
+    return False
+
+# Latency histograms and query stats per crud function (see app/metrics.py
+# and app/query_stats.py)
+instrument_module(globals(), metrics.crud_seconds, exclude=('unit_of_work', 'in_unit_of_work'))
@@ -0,0 +1,135 @@
+import csv
+import io
+import json
+import sys
+from datetime import datetime
+from typing import Iterable, Iterator, Optional, Sequence, TextIO
+
+import click
+from flask import Response, stream_with_context
+from flask.cli import with_appcontext
+from sqlalchemy import select, literal
+
+from app import db
+from app.models import Team, Player, Game, Inning, AtBat
+
+# Play-by-play export. Rows are streamed off a server-side cursor in
+# partitions of column tuples, so memory stays constant however many
+# at-bats the season has. Only at-bats are exported. The CSV names its
+# columns as the scorebook import (app.scorebook) does, so those at-bats
+# can be imported again, but outs, steals, inning runs and pitches are
+# lost on the way.
+
+EXPORT_COLUMNS = ('game_id', 'date', 'team', 'opponent', 'inning', 'at_bat_id', 'event', 'batter',
+                  'batter_number', 'result', 'rbis', 'balls', 'strikes', 'bases_advanced',
+                  'runners_advanced')
+FORMATS = ('csv', 'ndjson')
+MIMETYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+PARTITION_SIZE = 10000
+
+def play_by_play_query(team_id: Optional[int] = None, season: Optional[int] = None):
+    query = (
+        select(Game.id, Game.date, Team.name, Game.opponent, Inning.inning_number, AtBat.id,
+               literal('at_bat'), Player.name, Player.number, AtBat.result, AtBat.rbis, AtBat.balls,
+               AtBat.strikes, AtBat.bases_advanced, AtBat.runners_advanced)
+        .join(Inning, AtBat.inning_id == Inning.id)
+        .join(Game, Inning.game_id == Game.id)
+        .outerjoin(Team, Game.team_id == Team.id)
+        .outerjoin(Player, AtBat.batter_id == Player.id)
+        .order_by(Game.date, Game.id, Inning.inning_number, Inning.id, AtBat.id)
+    )
+    if team_id is not None:
+        query = query.where(Game.team_id == team_id)
+    if season is not None:
+        query = query.where(Game.date >= datetime(season, 1, 1), Game.date < datetime(season + 1, 1, 1))
+    return query
+
+def iter_partitions(team_id: Optional[int] = None, season: Optional[int] = None,
+                    partition_size: int = PARTITION_SIZE) -> Iterator[Sequence[tuple]]:
+    """Yield the play-by-play as lists of at most partition_size column tuples.
+
+    Uses a server-side cursor (stream_results), so the driver never buffers
+    the whole result; the connection stays checked out until the generator
+    is exhausted or closed.
+    """
+    connection = db.session.connection().execution_options(stream_results=True,
+                                                           yield_per=partition_size)
+    result = connection.execute(play_by_play_query(team_id, season))
+    try:
+        for partition in result.partitions():
+            yield partition
+    finally:
+        result.close()
+
+# Serializers, one text chunk per partition
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+def csv_chunks(partitions: Iterable[Sequence[tuple]], header: bool = True) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    for partition in partitions:
+        writer.writerows(partition)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def ndjson_chunks(partitions: Iterable[Sequence[tuple]]) -> Iterator[str]:
+    encode = json.JSONEncoder(default=_json_default, separators=(',', ':')).encode
+    for partition in partitions:
+        yield ''.join([encode(dict(zip(EXPORT_COLUMNS, row))) + '\n' for row in partition])
+
+def serialize(fmt: str, partitions: Iterable[Sequence[tuple]]) -> Iterator[str]:
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; use one of {', '.join(FORMATS)}")
+    return csv_chunks(partitions) if fmt == 'csv' else ndjson_chunks(partitions)
+
+def export_chunks(fmt: str, team_id: Optional[int] = None, season: Optional[int] = None,
+                  partition_size: int = PARTITION_SIZE) -> Iterator[str]:
+    return serialize(fmt, iter_partitions(team_id, season, partition_size))
+
+def write_export(f: TextIO, fmt: str, team_id: Optional[int] = None, season: Optional[int] = None,
+                 partition_size: int = PARTITION_SIZE) -> int:
+    """Write the play-by-play to an open text file; returns the at-bats written."""
+    written = 0
+
+    def counted(partitions):
+        nonlocal written
+        for partition in partitions:
+            written += len(partition)
+            yield partition
+
+    for chunk in serialize(fmt, counted(iter_partitions(team_id, season, partition_size))):
+        f.write(chunk)
+    return written
+
+def export_response(fmt: str, team_id: Optional[int] = None, season: Optional[int] = None) -> Response:
+    """A streaming HTTP response of the play-by-play, for use in a view."""
+    filename = f"play-by-play{f'-{season}' if season else ''}.{fmt}"
+    return Response(
+        stream_with_context(export_chunks(fmt, team_id, season)),
+        mimetype=MIMETYPES[fmt],
+        headers={'Content-Disposition': f'attachment; filename={filename}'},
+    )
+
+@click.command('export-plays')
+@click.argument('path', default='-')
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), default='csv', show_default=True)
+@click.option('--team-id', type=int)
+@click.option('--season', type=int)
+@with_appcontext
+def export_plays_command(path, fmt, team_id, season):
+    """Stream the play-by-play to PATH (default stdout)."""
+    if path == '-':
+        count = write_export(sys.stdout, fmt, team_id, season)
+    else:
+        with open(path, 'w', newline='') as f:
+            count = write_export(f, fmt, team_id, season)
+        click.echo(f'{count:,} at-bats written to {path}')
@@ -0,0 +1,489 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from app import crud, broker
+from app.box_score import OutLine, StealLine, load_box_score
+from app.pitches import PITCH_CODES, PITCH_TYPES, BALL_CODES, FULL_STRIKE_CODES, FOUL_CODES, MAX_PITCHES, \
+    pitch_code, pack_codes
+
+# Live game state. A GameState holds where a game stands (inning, half,
+# outs, runners, count, score) and applies each scoring event in constant
+# time. Rows are not written as events arrive: each event queues the
+# writes it implies, and flush() sends them through crud in one unit of
+# work (write-behind). restore() rebuilds the state from the database.
+#
+# Only the team's own plate appearances are stored (AtBat/Out/Steal); for
+# the opponent's half the state just keeps their runs, which land in
+# Inning.opponent_runs.
+
+HIT_BASES = {'single': 1, 'double': 2, 'triple': 3, 'home_run': 4}
+REACH_RESULTS = {'walk', 'hit_by_pitch', 'error'}
+OUT_RESULTS = {'strikeout', 'groundout', 'flyout', 'lineout', 'popout', 'sacrifice_fly', 'sacrifice_bunt'}
+RESULTS = set(HIT_BASES) | REACH_RESULTS | OUT_RESULTS
+# Pitch names are those of app.pitches (or their letters); 'strike' means a called strike
+PITCH_ALIASES = {'strike': 'called_strike'}
+IN_PLAY = PITCH_CODES['in_play']
+HIT_BY_PITCH = PITCH_CODES['hit_by_pitch']
+# Results that end an at-bat without the ball being put in play
+NOT_IN_PLAY_RESULTS = {'walk', 'strikeout', 'hit_by_pitch'}
+DELETES = ('delete_out', 'delete_steal', 'delete_at_bat', 'delete_inning')
+
+TOP, BOTTOM = 0, 1
+
+class Event(NamedTuple):
+    """One scoring event; which fields matter depends on kind.
+
+    pitch:         pitch, e.g. 'ball', 'swinging_strike', 'foul' or 'in_play'
+    at_bat:        result, rbis (defaults to the runs driven in)
+    steal:         base the runner leaves, success
+    runner_out:    base the runner is on, result (the out type)
+    opponent_runs: runs
+    end_half:      no fields
+    """
+    kind: str
+    result: Optional[str] = None
+    pitch: Optional[str] = None
+    base: Optional[int] = None
+    success: bool = True
+    runs: Optional[int] = None
+    rbis: Optional[int] = None
+
+class Write:
+    """A row an event implies, queued until the next flush.
+
+    row_id is filled in once the row has been written.
+    """
+    __slots__ = ('kind', 'inning', 'values', 'row_id')
+
+    def __init__(self, kind: str, inning: int, values: Tuple = ()):
+        self.kind = kind
+        self.inning = inning
+        self.values = values
+        self.row_id: Optional[int] = None
+
+    def __repr__(self):
+        return f'<Write {self.kind} inning={self.inning} {self.values} id={self.row_id}>'
+
+class GameStateError(ValueError):
+    """An event that cannot happen in the current state."""
+
+class GameState:
+    """Where one game stands. Not thread-safe: one scorekeeper drives a game."""
+
+    __slots__ = ('game_id', 'lineup', 'team_bats_first', 'inning', 'half', 'outs', 'bases', 'balls',
+                 'strikes', 'sequence', 'batter', 'plate_appearances', 'team_runs', 'opponent_runs', 'line_team',
+                 'line_opponent', 'pending', 'dirty_innings', 'inning_ids', 'last_at_bat_id', 'persist')
+
+    def __init__(self, game_id: int, lineup: Sequence[int], team_bats_first: bool = True):
+        self.game_id = game_id
+        self.lineup = tuple(lineup)
+        self.team_bats_first = team_bats_first
+        self.inning = 1
+        self.half = TOP
+        self.outs = 0
+        # Runner player ids on first, second and third
+        self.bases: List[Optional[int]] = [None, None, None]
+        self.balls = 0
+        self.strikes = 0
+        # Pitch codes of the plate appearance in progress
+        self.sequence: List[int] = []
+        # Index of the next batter in lineup
+        self.batter = 0
+        self.plate_appearances = 0
+        self.team_runs = 0
+        self.opponent_runs = 0
+        # Runs per inning, index 0 is the first inning
+        self.line_team: List[int] = [0]
+        self.line_opponent: List[int] = [0]
+        self.pending: List[Write] = []
+        self.dirty_innings = set()
+        self.inning_ids: Dict[int, int] = {}
+        self.last_at_bat_id: Optional[int] = None
+        self.persist = True
+        self._queue('inning')
+
+    # Read-only views
+    @property
+    def team_batting(self) -> bool:
+        return (self.half == TOP) == self.team_bats_first
+
+    @property
+    def batter_id(self) -> Optional[int]:
+        return self.lineup[self.batter] if self.lineup else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'game_id': self.game_id,
+            'inning': self.inning,
+            'half': 'top' if self.half == TOP else 'bottom',
+            'batting': 'team' if self.team_batting else 'opponent',
+            'outs': self.outs,
+            'balls': self.balls,
+            'strikes': self.strikes,
+            'pitches': [PITCH_TYPES[code - 1] for code in self.sequence],
+            'bases': list(self.bases),
+            'batter_id': self.batter_id,
+            'team_runs': self.team_runs,
+            'opponent_runs': self.opponent_runs,
+            'line_score': {'team': list(self.line_team), 'opponent': list(self.line_opponent)},
+        }
+
+    def copy(self) -> 'GameState':
+        """An independent copy of the scoring state; queued writes are not copied."""
+        other = GameState.__new__(GameState)
+        for name in self.__slots__:
+            setattr(other, name, getattr(self, name))
+        other.bases = list(self.bases)
+        other.sequence = list(self.sequence)
+        other.line_team = list(self.line_team)
+        other.line_opponent = list(self.line_opponent)
+        other.pending = []
+        other.dirty_innings = set()
+        other.inning_ids = dict(self.inning_ids)
+        return other
+
+    # Events
+    def apply(self, event: Event) -> None:
+        handler = self._HANDLERS.get(event.kind)
+        if handler is None:
+            raise GameStateError(f'Unknown event {event.kind!r}')
+        handler(self, event)
+
+    def pitch(self, pitch: str) -> None:
+        self.apply(Event('pitch', pitch=pitch))
+
+    def at_bat(self, result: str, rbis: Optional[int] = None) -> None:
+        self.apply(Event('at_bat', result=result, rbis=rbis))
+
+    def steal(self, base: int, success: bool = True) -> None:
+        self.apply(Event('steal', base=base, success=success))
+
+    def runner_out(self, base: int, out_type: str = 'pickoff') -> None:
+        self.apply(Event('runner_out', base=base, result=out_type))
+
+    def opponent_scores(self, runs: int = 1) -> None:
+        self.apply(Event('opponent_runs', runs=runs))
+
+    def end_half(self) -> None:
+        self.apply(Event('end_half'))
+
+    def _require_team_batting(self, event: Event) -> None:
+        if not self.team_batting:
+            raise GameStateError(f'{event.kind} while the opponent is batting')
+
+    def _on_pitch(self, event: Event) -> None:
+        self._require_team_batting(event)
+        try:
+            code = pitch_code(PITCH_ALIASES.get(event.pitch, event.pitch))
+        except ValueError:
+            raise GameStateError(f'Unknown pitch {event.pitch!r}') from None
+        if len(self.sequence) == MAX_PITCHES:
+            raise GameStateError(f'An at-bat holds at most {MAX_PITCHES} pitches')
+        self.sequence.append(code)
+        if code == HIT_BY_PITCH:
+            self._plate_appearance('hit_by_pitch', None)
+        elif code in BALL_CODES:
+            self.balls += 1
+            if self.balls == 4:
+                self._plate_appearance('walk', None)
+        elif code in FULL_STRIKE_CODES or (code in FOUL_CODES and self.strikes < 2):
+            self.strikes += 1
+            if self.strikes == 3:
+                self._plate_appearance('strikeout', None)
+        # A ball in play waits for the at_bat event with its result
+
+    def _on_at_bat(self, event: Event) -> None:
+        self._require_team_batting(event)
+        if event.result not in RESULTS:
+            raise GameStateError(f'Unknown at-bat result {event.result!r}')
+        self._plate_appearance(event.result, event.rbis)
+
+    def _on_steal(self, event: Event) -> None:
+        self._require_team_batting(event)
+        runner = self._runner_on(event.base)
+        to_base = event.base + 1
+        if to_base < 4 and self.bases[to_base - 1] is not None:
+            raise GameStateError(f'base {to_base} is occupied')
+        self.bases[event.base - 1] = None
+        self._queue('steal', (runner, event.base, to_base, bool(event.success)))
+        if not event.success:
+            self._queue('out', (runner, 'caught_stealing', to_base))
+            self._record_out()
+        elif to_base == 4:
+            self._score(1)
+        else:
+            self.bases[to_base - 1] = runner
+
+    def _on_runner_out(self, event: Event) -> None:
+        self._require_team_batting(event)
+        runner = self._runner_on(event.base)
+        self.bases[event.base - 1] = None
+        self._queue('out', (runner, event.result or 'pickoff', event.base))
+        self._record_out()
+
+    def _on_opponent_runs(self, event: Event) -> None:
+        if self.team_batting:
+            raise GameStateError('opponent runs while the team is batting')
+        runs = event.runs or 0
+        self.opponent_runs += runs
+        self.line_opponent[self.inning - 1] += runs
+        self._mark_runs()
+
+    def _on_end_half(self, event: Event) -> None:
+        self.outs = 0
+        self.bases = [None, None, None]
+        self.balls = self.strikes = 0
+        self.sequence = []
+        if self.half == TOP:
+            self.half = BOTTOM
+        else:
+            self.half = TOP
+            self.inning += 1
+            self.line_team.append(0)
+            self.line_opponent.append(0)
+            self._queue('inning')
+
+    _HANDLERS = {
+        'pitch': _on_pitch,
+        'at_bat': _on_at_bat,
+        'steal': _on_steal,
+        'runner_out': _on_runner_out,
+        'opponent_runs': _on_opponent_runs,
+        'end_half': _on_end_half,
+    }
+
+    # Plate appearance mechanics
+    def _runner_on(self, base: int) -> int:
+        if base not in (1, 2, 3) or self.bases[base - 1] is None:
+            raise GameStateError(f'no runner on base {base}')
+        return self.bases[base - 1]
+
+    def _plate_appearance(self, result: str, rbis: Optional[int]) -> None:
+        if not self.lineup:
+            raise GameStateError('A game needs a lineup before anyone bats')
+        batter = self.lineup[self.batter]
+        bases = self.bases
+        scored = 0
+        runners_advanced = 0
+        bases_advanced = 0
+        is_out = result in OUT_RESULTS
+        if result == 'sacrifice_fly' and (bases[2] is None or self.outs == 2):
+            # No runner brought in: it was just a fly out
+            result = 'flyout'
+
+        if result in HIT_BASES:
+            bases_advanced = HIT_BASES[result]
+            for base in (2, 1, 0):
+                if bases[base] is not None:
+                    runners_advanced += 1
+                    if base + bases_advanced >= 3:
+                        scored += 1
+                    else:
+                        bases[base + bases_advanced] = bases[base]
+                    bases[base] = None
+            if bases_advanced == 4:
+                scored += 1
+            else:
+                bases[bases_advanced - 1] = batter
+        elif result in REACH_RESULTS:
+            # Only forced runners move
+            bases_advanced = 1
+            if bases[0] is not None:
+                if bases[1] is not None:
+                    if bases[2] is not None:
+                        scored += 1
+                    bases[2] = bases[1]
+                    runners_advanced += 1
+                bases[1] = bases[0]
+                runners_advanced += 1
+            bases[0] = batter
+        elif result == 'sacrifice_fly':
+            bases[2] = None
+            scored = runners_advanced = 1
+        elif result == 'sacrifice_bunt' and self.outs < 2:
+            for base in (2, 1, 0):
+                if bases[base] is not None:
+                    runners_advanced += 1
+                    if base == 2:
+                        scored += 1
+                    else:
+                        bases[base + 1] = bases[base]
+                    bases[base] = None
+
+        if rbis is None:
+            # No runs batted in on an error
+            rbis = 0 if result == 'error' else scored
+        sequence = self.sequence
+        if sequence and result not in NOT_IN_PLAY_RESULTS and sequence[-1] != IN_PLAY \
+                and len(sequence) < MAX_PITCHES:
+            sequence.append(IN_PLAY)
+        self._queue('at_bat', (batter, result, rbis, self.balls, self.strikes, bases_advanced,
+                               runners_advanced, pack_codes(sequence) if sequence else None))
+        if is_out:
+            self._queue('out', (batter, result, None if result == 'strikeout' else 1))
+        self.balls = self.strikes = 0
+        self.sequence = []
+        self.batter = (self.batter + 1) % len(self.lineup)
+        self.plate_appearances += 1
+        if scored:
+            self._score(scored)
+        if is_out:
+            self._record_out()
+
+    def _score(self, runs: int) -> None:
+        self.team_runs += runs
+        self.line_team[self.inning - 1] += runs
+        self._mark_runs()
+
+    def _record_out(self) -> None:
+        self.outs += 1
+        if self.outs >= 3:
+            self._on_end_half(Event('end_half'))
+
+    # Write-behind persistence
+    def _queue(self, kind: str, values: Tuple = ()) -> None:
+        if self.persist:
+            self.pending.append(Write(kind, self.inning, values))
+
+    def _mark_runs(self) -> None:
+        if self.persist:
+            self.dirty_innings.add(self.inning)
+
+    def flush(self) -> List[Write]:
+        """Write queued rows through crud in one unit of work; returns them with ids set.
+
+        Outs and steals attach to the latest at-bat, like the scorebook format.
+        If the transaction fails nothing is dequeued, so flush() can be retried.
+        After a commit the new at-bats and scoreboard go to the game's feed.
+        """
+        writes, dirty = self.pending, self.dirty_innings
+        if not writes and not dirty:
+            return []
+        inning_ids = dict(self.inning_ids)
+        last_at_bat_id = self.last_at_bat_id
+        with crud.unit_of_work():
+            for write in writes:
+                if write.kind == 'inning':
+                    if write.inning not in inning_ids:
+                        inning_ids[write.inning] = crud.create_inning(self.game_id, write.inning).id
+                    write.row_id = inning_ids[write.inning]
+                elif write.kind == 'at_bat':
+                    row = crud.create_at_bat(inning_ids[write.inning], *write.values)
+                    write.row_id = last_at_bat_id = row.id
+                elif write.kind == 'out':
+                    player_id, out_type, base = write.values
+                    write.row_id = crud.create_out(last_at_bat_id, player_id, out_type, base).id
+                elif write.kind == 'steal':
+                    write.row_id = crud.create_steal(last_at_bat_id, *write.values).id
+                elif write.kind in DELETES:
+                    # Queued by an undo (app.play_log); values holds the row id
+                    getattr(crud, write.kind)(*write.values)
+                    if write.kind == 'delete_inning':
+                        inning_ids.pop(write.inning, None)
+            for inning in sorted(dirty):
+                if inning not in inning_ids or inning > len(self.line_team):
+                    # Opened and undone again before it was written
+                    continue
+                crud.update_inning(inning_ids[inning], {'team_runs': self.line_team[inning - 1],
+                                                        'opponent_runs': self.line_opponent[inning - 1]})
+        self.inning_ids = inning_ids
+        self.last_at_bat_id = last_at_bat_id
+        self.pending = []
+        self.dirty_innings = set()
+        self._publish(writes)
+        return writes
+
+    def _publish(self, writes: List[Write]) -> None:
+        # Live feeds (app.broker) get each new at-bat, then the scoreboard
+        for write in writes:
+            if write.kind == 'at_bat':
+                batter_id, result, rbis = write.values[:3]
+                broker.publish(self.game_id, 'at_bat', {'id': write.row_id, 'inning': write.inning,
+                                                        'batter_id': batter_id, 'result': result,
+                                                        'rbis': rbis})
+        broker.publish(self.game_id, 'state', self.to_dict())
+
+    # Restore
+    @classmethod
+    def restore(cls, game_id: int, team_bats_first: bool = True) -> Optional['GameState']:
+        """Rebuild a game's state from its stored rows; None if the game does not exist.
+
+        Replays the team's at-bats, steals and runner outs through the same
+        handlers, then takes the stored per-inning runs as the line score.
+        The count of a plate appearance in progress is not stored, so it
+        restarts at 0-0.
+        """
+        box = load_box_score(game_id)
+        if box is None:
+            return None
+        lineup = [slot.player_id for slot in box.lineup]
+        if not lineup:
+            # Fall back to the batting order seen in the stored at-bats
+            lineup = list(dict.fromkeys(at_bat.batter_id for inning in box.innings
+                                        for at_bat in inning.at_bats))
+        state = cls(game_id, lineup, team_bats_first)
+        state.pending = []
+        if not box.innings:
+            state._queue('inning')
+            return state
+
+        state.persist = False
+        team_half = TOP if team_bats_first else BOTTOM
+        positions = {player_id: index for index, player_id in enumerate(state.lineup)}
+        for line in box.innings:
+            state.inning_ids[line.inning_number] = line.id
+            # An inning without at-bats yet was opened by end_half
+            state._seek(line.inning_number, team_half if line.at_bats else TOP)
+            for at_bat in line.at_bats:
+                if not state.team_batting:
+                    # More rows than three outs allow; keep them in this half
+                    state._seek(line.inning_number, team_half)
+                state.batter = positions.get(at_bat.batter_id, state.batter)
+                state.balls, state.strikes = min(at_bat.balls, 3), min(at_bat.strikes, 2)
+                state._plate_appearance(at_bat.result, at_bat.rbis)
+                state.last_at_bat_id = at_bat.id
+                # Steals and runner outs in the order they happened; rows
+                # stored without a sequence keep the old steals-first order
+                runner_events = sorted(at_bat.steals + at_bat.outs,
+                                       key=lambda row: (row.sequence or 0, isinstance(row, OutLine), row.id))
+                for row in runner_events:
+                    if isinstance(row, StealLine):
+                        base = state._base_of(row.player_id)
+                        if base is not None and state.team_batting:
+                            state._on_steal(Event('steal', base=base, success=row.success))
+                        continue
+                    # The batter's own out was replayed above, caught-stealing outs with their steal
+                    if row.out_type == 'caught_stealing' or \
+                            (row.player_id == at_bat.batter_id and row.out_type == at_bat.result):
+                        continue
+                    base = state._base_of(row.player_id)
+                    if base is not None and state.team_batting:
+                        state._on_runner_out(Event('runner_out', base=base, result=row.out_type))
+
+        # The stored line score is the source of truth for runs
+        innings = max(state.inning, box.innings[-1].inning_number)
+        state.line_team = [0] * innings
+        state.line_opponent = [0] * innings
+        for line in box.innings:
+            state.line_team[line.inning_number - 1] = line.team_runs
+            state.line_opponent[line.inning_number - 1] = line.opponent_runs
+        state.team_runs = sum(state.line_team)
+        state.opponent_runs = sum(state.line_opponent)
+        state.persist = True
+        if state.inning not in state.inning_ids:
+            state._queue('inning')
+        return state
+
+    def _seek(self, inning: int, half: int) -> None:
+        while len(self.line_team) < inning:
+            self.line_team.append(0)
+            self.line_opponent.append(0)
+        self.inning = inning
+        self.half = half
+        self.outs = 0
+        self.bases = [None, None, None]
+
+    def _base_of(self, player_id: Optional[int]) -> Optional[int]:
+        for index, runner in enumerate(self.bases):
+            if runner is not None and runner == player_id:
+                return index + 1
+        return None
@@ -0,0 +1,294 @@
+import itertools
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import update, bindparam
+
+from app import db, crud
+from app.aggregation import (
+    HIT_RESULTS, EXTRA_BASE_HITS, NON_AT_BAT_RESULTS, WALK_RESULTS, STRIKEOUT_OUT_TYPES, DERIVED_COLUMNS,
+)
+from app.bulk import ChunkedWriter, Ids
+from app.leaderboard import leaderboards
+from app.models import User, Team, Player, Game, Inning, BattingOrder, AtBat, Out, Steal, GameStats
+from app.pitches import PITCH_CODES, pack_codes
+
+# Synthetic league data for load and scale testing. Everything is drawn from
+# one seeded random.Random, so the same arguments always produce the same
+# league, and rows are written with Core executemany in dependency order.
+
+# Plate appearance outcomes and their weights, roughly a rec-league slow pitch season
+OUTCOMES = ('single', 'double', 'triple', 'home_run', 'walk', 'hit_by_pitch',
+            'sacrifice_fly', 'strikeout', 'groundout', 'flyout')
+OUTCOME_WEIGHTS = (22, 7, 1.5, 2.5, 8, 0.5, 1.5, 9, 24, 24)
+_CUM_OUTCOME_WEIGHTS = list(itertools.accumulate(OUTCOME_WEIGHTS))
+HIT_BASES = {'single': 1, 'double': 2, 'triple': 3, 'home_run': 4}
+OUT_RESULTS = {'sacrifice_fly', 'strikeout', 'groundout', 'flyout'}
+
+# Chance a runner alone on first tries for second, and how often it works
+STEAL_ATTEMPT_RATE = 0.12
+STEAL_SUCCESS_RATE = 0.75
+
+# Opponent runs per half inning
+OPPONENT_RUNS = (0, 1, 2, 3, 4, 5)
+OPPONENT_RUN_WEIGHTS = (45, 20, 14, 10, 7, 4)
+
+# Half innings end on the third out or, like a run-rule, after this many batters
+MAX_BATTERS_PER_INNING = 15
+
+SEASON_START = datetime(2025, 4, 5, 18, 0)
+
+WRITE_ORDER = (User, Team, Player, Game, Inning, BattingOrder, AtBat, Out, Steal, GameStats)
+
+def _count(rng: random.Random, result: str):
+    """Final balls and strikes for a plate appearance ending in result."""
+    if result == 'walk':
+        return 4, rng.randint(0, 2)
+    if result == 'strikeout':
+        return rng.randint(0, 3), 3
+    return rng.randint(0, 3), rng.randint(0, 2)
+
+def _pitch_sequence(balls: int, strikes: int, result: str) -> bytes:
+    """A pitch sequence ending at the drawn count, without further draws from rng."""
+    last = {'walk': 'ball', 'strikeout': 'swinging_strike', 'hit_by_pitch': 'hit_by_pitch'}.get(result, 'in_play')
+    if last == 'ball':
+        balls -= 1
+    elif last == 'swinging_strike':
+        strikes -= 1
+    # Strikes and balls alternate, strike first, up to the final pitch
+    codes = []
+    while balls or strikes:
+        if strikes and strikes >= balls:
+            codes.append(PITCH_CODES['called_strike'])
+            strikes -= 1
+        else:
+            codes.append(PITCH_CODES['ball'])
+            balls -= 1
+    codes.append(PITCH_CODES[last])
+    return pack_codes(codes)
+
+def _play_game(rng: random.Random, ids: Ids, writer: ChunkedWriter, game_id: int, lineup: List[int],
+               fielders: List[int], innings: int, start: datetime) -> Dict[str, int]:
+    """Write one game's innings, events and GameStats; returns its line score."""
+    stats = {player_id: {name: 0 for name in DERIVED_COLUMNS} for player_id in lineup}
+    line_score = {'team_runs': 0, 'team_hits': 0, 'opponent_runs': 0}
+    runs = dict.fromkeys(lineup, 0)
+    outcomes = rng.choices(OUTCOMES, cum_weights=_CUM_OUTCOME_WEIGHTS, k=innings * MAX_BATTERS_PER_INNING)
+    drawn = 0
+    batter = 0
+    timestamp = start
+
+    for inning_number in range(1, innings + 1):
+        inning_id = ids(Inning)
+        outs = 0
+        team_runs = 0
+        bases: List[Optional[int]] = [None, None, None]
+        # The inning row has to reach the writer before its children, but its
+        # run total is only known once the half inning is over
+        pending = []
+
+        for _ in range(MAX_BATTERS_PER_INNING):
+            at_bat_id = ids(AtBat)
+            batter_id = lineup[batter]
+            batter = (batter + 1) % len(lineup)
+            timestamp += timedelta(minutes=3)
+
+            # A runner alone on first may try to steal during the plate appearance
+            runner = bases[0]
+            if runner is not None and bases[1] is None and outs < 2 and rng.random() < STEAL_ATTEMPT_RATE:
+                success = rng.random() < STEAL_SUCCESS_RATE
+                pending.append((Steal, {'id': ids(Steal), 'at_bat_id': at_bat_id, 'player_id': runner,
+                                        'from_base': 1, 'to_base': 2, 'success': success,
+                                        'timestamp': timestamp}))
+                bases[0] = None
+                if success:
+                    bases[1] = runner
+                    stats[runner]['stolen_bases'] += 1
+                else:
+                    outs += 1
+                    stats[runner]['caught_stealing'] += 1
+                    pending.append((Out, {'id': ids(Out), 'at_bat_id': at_bat_id, 'player_id': runner,
+                                          'out_type': 'caught_stealing', 'base': 2,
+                                          'fielder_id': rng.choice(fielders), 'timestamp': timestamp}))
+
+            result = outcomes[drawn]
+            drawn += 1
+            scored: List[int] = []
+            runners_advanced = 0
+            bases_advanced = 0
+
+            if result in HIT_BASES:
+                bases_advanced = HIT_BASES[result]
+                for base in (2, 1, 0):
+                    if bases[base] is not None:
+                        runners_advanced += 1
+                        if base + bases_advanced >= 3:
+                            scored.append(bases[base])
+                        else:
+                            bases[base + bases_advanced] = bases[base]
+                        bases[base] = None
+                if bases_advanced == 4:
+                    scored.append(batter_id)
+                else:
+                    bases[bases_advanced - 1] = batter_id
+            elif result in ('walk', 'hit_by_pitch'):
+                bases_advanced = 1
+                # Only forced runners move
+                if bases[0] is not None:
+                    if bases[1] is not None:
+                        if bases[2] is not None:
+                            scored.append(bases[2])
+                        bases[2] = bases[1]
+                        runners_advanced += 1
+                    bases[1] = bases[0]
+                    runners_advanced += 1
+                bases[0] = batter_id
+            elif result == 'sacrifice_fly' and bases[2] is not None and outs < 2:
+                scored.append(bases[2])
+                bases[2] = None
+                runners_advanced = 1
+            elif result == 'sacrifice_fly':
+                # No runner on third to bring in: it was just a fly out
+                result = 'flyout'
+
+            rbis = len(scored)
+            for runner_id in scored:
+                runs[runner_id] += 1
+            team_runs += rbis
+
+            balls, strikes = _count(rng, result)
+            pending.append((AtBat, {'id': at_bat_id, 'inning_id': inning_id, 'batter_id': batter_id,
+                                    'result': result, 'rbis': rbis, 'timestamp': timestamp,
+                                    'balls': balls, 'strikes': strikes, 'bases_advanced': bases_advanced,
+                                    'runners_advanced': runners_advanced,
+                                    'pitches': _pitch_sequence(balls, strikes, result)}))
+
+            line = stats[batter_id]
+            if result not in NON_AT_BAT_RESULTS:
+                line['at_bats'] += 1
+            if result in HIT_RESULTS:
+                line['hits'] += 1
+                line_score['team_hits'] += 1
+            if result in EXTRA_BASE_HITS:
+                line[EXTRA_BASE_HITS[result]] += 1
+            if result in WALK_RESULTS:
+                line['walks'] += 1
+            line['rbis'] += rbis
+
+            if result in OUT_RESULTS:
+                outs += 1
+                if result in STRIKEOUT_OUT_TYPES:
+                    line['strikeouts'] += 1
+                pending.append((Out, {'id': ids(Out), 'at_bat_id': at_bat_id, 'player_id': batter_id,
+                                      'out_type': result, 'base': None if result == 'strikeout' else 1,
+                                      'fielder_id': rng.choice(fielders), 'timestamp': timestamp}))
+            if outs >= 3:
+                break
+
+        opponent_runs = rng.choices(OPPONENT_RUNS, OPPONENT_RUN_WEIGHTS)[0]
+        writer.add(Inning, {'id': inning_id, 'game_id': game_id, 'inning_number': inning_number,
+                            'team_runs': team_runs, 'opponent_runs': opponent_runs})
+        for model, row in pending:
+            writer.add(model, row)
+        line_score['team_runs'] += team_runs
+        line_score['opponent_runs'] += opponent_runs
+
+    for player_id in lineup:
+        writer.add(GameStats, {'id': ids(GameStats), 'game_id': game_id, 'player_id': player_id,
+                               'runs': runs[player_id], **stats[player_id]})
+    return line_score
+
+def generate_league(teams: int = 8, games_per_team: int = 20, players_per_team: int = 12,
+                    lineup_size: int = 10, innings: int = 7, seed: int = 0,
+                    chunk_size: int = 5000) -> Dict[str, int]:
+    """Fill every table with a synthetic league and return rows written per table.
+
+    Each team gets a manager, a roster and games_per_team games against the
+    other generated teams, each with a lineup, innings, at-bats, outs, steals
+    and GameStats rows that agree with aggregation.compute_game_totals.
+    Commits after every chunk, so ids are only locked a chunk at a time and
+    an interrupted run keeps the chunks written so far; memory stays bounded
+    by chunk_size.
+    """
+    if teams < 2:
+        raise ValueError('A league needs at least two teams')
+    lineup_size = min(lineup_size, players_per_team)
+    rng = random.Random(seed)
+    ids = Ids(WRITE_ORDER)
+    writer = ChunkedWriter(WRITE_ORDER, chunk_size=chunk_size, ids=ids)
+
+    team_ids: List[int] = []
+    rosters: List[List[int]] = []
+    names: List[str] = []
+    for _ in range(teams):
+        user_id = ids(User)
+        writer.add(User, {'id': user_id, 'username': f'manager{user_id}',
+                          'email': f'manager{user_id}@example.com', 'password_hash': None})
+        team_id = ids(Team)
+        team_ids.append(team_id)
+        names.append(f'Team {team_id}')
+        writer.add(Team, {'id': team_id, 'name': names[-1], 'created_at': SEASON_START,
+                          'user_id': user_id})
+        roster = []
+        for index in range(players_per_team):
+            player_id = ids(Player)
+            roster.append(player_id)
+            writer.add(Player, {'id': player_id, 'name': f'Player {player_id}',
+                                'number': index + 1, 'team_id': team_id})
+        rosters.append(roster)
+
+    # Game rows are written before their innings, so line scores follow as one UPDATE
+    line_scores: List[Dict[str, int]] = []
+    for game_number in range(games_per_team):
+        for index, team_id in enumerate(team_ids):
+            opponent = (index + 1 + game_number % (teams - 1)) % teams
+            game_id = ids(Game)
+            start = SEASON_START + timedelta(days=3 * game_number, hours=index % 4)
+            writer.add(Game, {'id': game_id, 'date': start, 'opponent': names[opponent],
+                              'team_id': team_id})
+            lineup = rng.sample(rosters[index], lineup_size)
+            for order_number, player_id in enumerate(lineup, start=1):
+                writer.add(BattingOrder, {'id': ids(BattingOrder), 'game_id': game_id,
+                                          'player_id': player_id, 'order_number': order_number})
+            line_score = _play_game(rng, ids, writer, game_id, lineup, rosters[opponent], innings, start)
+            line_scores.append({'game_id': game_id, **line_score})
+
+    writer.flush()
+    if line_scores:
+        table = Game.__table__
+        db.session.connection().execute(
+            update(table).where(table.c.id == bindparam('game_id'))
+            .values(team_runs=bindparam('team_runs'), team_hits=bindparam('team_hits'),
+                    opponent_runs=bindparam('opponent_runs')),
+            line_scores,
+        )
+    leaderboards.stage_reset()
+    db.session.commit()
+    # Rows went in without crud, so drop anything cached under these teams' ids
+    for team_id in team_ids:
+        crud.invalidate_team_cache(team_id)
+    return writer.counts
+
+@click.command('generate-league')
+@click.option('--teams', default=8, show_default=True)
+@click.option('--games-per-team', default=20, show_default=True)
+@click.option('--players-per-team', default=12, show_default=True)
+@click.option('--lineup-size', default=10, show_default=True)
+@click.option('--innings', default=7, show_default=True)
+@click.option('--seed', default=0, show_default=True)
+@click.option('--chunk-size', default=5000, show_default=True)
+@with_appcontext
+def generate_league_command(teams, games_per_team, players_per_team, lineup_size, innings, seed,
+                            chunk_size):
+    """Fill the database with a synthetic league."""
+    start = datetime.now()
+    counts = generate_league(teams=teams, games_per_team=games_per_team,
+                             players_per_team=players_per_team, lineup_size=lineup_size,
+                             innings=innings, seed=seed, chunk_size=chunk_size)
+    elapsed = (datetime.now() - start).total_seconds()
+    for table, count in counts.items():
+        click.echo(f'{table:<15} {count:>12,}')
+    click.echo(f'{sum(counts.values()):,} rows in {elapsed:.1f}s')
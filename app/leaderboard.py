@@ -0,0 +1,257 @@
+import threading
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import event, select
+
+from app import db
+from app.models import Game, COUNT_COLUMNS, RATE_COLUMNS
+
+# League leaderboards kept up to date in memory. A board holds every
+# player's season totals plus, per stat, a sorted index of (-value,
+# player_id) keys, so reading the top N walks N entries however many
+# GameStats rows there are, and a change to one player's totals moves only
+# that player's keys.
+#
+# Changes reach the boards as deltas. aggregation.apply_deltas and the crud
+# functions that set GameStats columns stage them in session.info; they are
+# applied when the transaction commits and dropped if it rolls back. Bulk
+# paths that cannot say what changed stage a reset instead, and the boards
+# reload on their next read.
+#
+# Boards are per process. Writes committed by another process, or a commit
+# that lands while a board is first loading, are only picked up by
+# rebuild() or invalidate(). A board loaded while the session has staged
+# changes is not kept.
+
+ALL_SEASONS = None
+STATS = COUNT_COLUMNS + RATE_COLUMNS
+# Totals the rate stats are computed from
+RATE_INPUTS = frozenset(('at_bats', 'hits', 'doubles', 'triples', 'home_runs', 'walks'))
+_COLUMN = {name: index for index, name in enumerate(COUNT_COLUMNS)}
+
+_STAGED = 'leaderboard_deltas'
+_RESET = 'leaderboard_reset'
+_SEASONS = 'leaderboard_seasons'
+
+class Leader(NamedTuple):
+    rank: int
+    player_id: int
+    value: Any
+
+def rates(totals: List[int]) -> Dict[str, float]:
+    """AVG/OBP/SLG/OPS for one player's totals, as app.stats.add_rates computes them."""
+    at_bats, hits, walks = totals[_COLUMN['at_bats']], totals[_COLUMN['hits']], totals[_COLUMN['walks']]
+    total_bases = (hits + totals[_COLUMN['doubles']] + 2 * totals[_COLUMN['triples']]
+                   + 3 * totals[_COLUMN['home_runs']])
+    avg = hits / at_bats if at_bats > 0 else 0.0
+    obp = (hits + walks) / (at_bats + walks) if at_bats + walks > 0 else 0.0
+    slg = total_bases / at_bats if at_bats > 0 else 0.0
+    return {'avg': avg, 'obp': obp, 'slg': slg, 'ops': obp + slg}
+
+class _Index:
+    """Players ordered by one stat, highest first; ties by player id."""
+
+    __slots__ = ('keys', 'entries')
+
+    def __init__(self, entries: Dict[int, Tuple[Any, int]]):
+        self.entries = entries
+        self.keys = sorted(entries.values())
+
+    def set(self, player_id: int, value: Optional[Any]) -> None:
+        """Move player_id to value, or drop it from the index if value is None."""
+        old = self.entries.pop(player_id, None)
+        if old is not None:
+            del self.keys[bisect_left(self.keys, old)]
+        if value is not None:
+            key = (-value, player_id)
+            insort(self.keys, key)
+            self.entries[player_id] = key
+
+class _Board:
+    """One season's (or every season's) totals and stat indexes."""
+
+    __slots__ = ('totals', 'indexes', 'min_at_bats')
+
+    def __init__(self, totals: Dict[int, List[int]], min_at_bats: int):
+        self.totals = totals
+        self.min_at_bats = min_at_bats
+        values = {player_id: self._values(line) for player_id, line in totals.items()}
+        self.indexes = {stat: _Index({player_id: (-line[stat], player_id)
+                                      for player_id, line in values.items() if line[stat] is not None})
+                        for stat in STATS}
+
+    def _values(self, line: List[int]) -> Dict[str, Optional[Any]]:
+        values: Dict[str, Optional[Any]] = dict(zip(COUNT_COLUMNS, line))
+        qualified = line[_COLUMN['at_bats']] >= self.min_at_bats
+        for stat, value in rates(line).items():
+            values[stat] = value if qualified else None
+        return values
+
+    def apply(self, player_id: int, deltas: Dict[str, int]) -> None:
+        line = self.totals.get(player_id)
+        new = line is None
+        if new:
+            line = self.totals[player_id] = [0] * len(COUNT_COLUMNS)
+        changed = [name for name, value in deltas.items() if value and name in _COLUMN]
+        for name in changed:
+            line[_COLUMN[name]] += deltas[name]
+        values = self._values(line)
+        if new:
+            # A new player goes on every index, as a new stats row would
+            changed = list(STATS)
+        elif not RATE_INPUTS.isdisjoint(changed):
+            changed.extend(RATE_COLUMNS)
+        for stat in changed:
+            self.indexes[stat].set(player_id, values[stat])
+
+class Leaderboards:
+    """Flask extension serving top-N lists by stat and season.
+
+    LEADERBOARD_MIN_AT_BATS is the at-bats a player needs to appear on the
+    rate stat (AVG/OBP/SLG/OPS) boards.
+    """
+
+    def __init__(self, app=None):
+        self.min_at_bats = 0
+        self._reset()
+        if app is not None:
+            self.init_app(app)
+
+    def _reset(self) -> None:
+        self._lock = threading.Lock()
+        self._boards: Dict[Optional[int], _Board] = {}
+        self.loads = 0
+        self.applied = 0
+
+    def init_app(self, app):
+        self.min_at_bats = app.config.get('LEADERBOARD_MIN_AT_BATS', 0)
+        self._reset()
+        app.extensions['leaderboards'] = self
+
+    # Reading
+    def leaders(self, stat: str, season: Optional[int] = ALL_SEASONS, limit: int = 10,
+                min_at_bats: Optional[int] = None) -> List[Leader]:
+        """The top limit players by stat, with competition ranks (1, 2, 2, 4).
+
+        Players tied with the last one listed are included too, so a list
+        may run past limit. min_at_bats may raise the qualifier for this
+        read; rate stats cannot go below LEADERBOARD_MIN_AT_BATS.
+        """
+        if stat not in STATS:
+            raise ValueError(f"stat must be one of {', '.join(STATS)}")
+        floor = self.min_at_bats if stat in RATE_COLUMNS else 0
+        if min_at_bats is not None and min_at_bats < floor:
+            raise ValueError(f'{stat} leaders need at least {floor} at-bats')
+        board = self._board(season)
+        leaders: List[Leader] = []
+        with self._lock:
+            for position, (negative, player_id) in enumerate(self._qualified(board, stat, min_at_bats)):
+                value = -negative
+                if leaders and value == leaders[-1].value:
+                    rank = leaders[-1].rank
+                elif len(leaders) >= limit:
+                    break
+                else:
+                    rank = position + 1
+                leaders.append(Leader(rank, player_id, value))
+        return leaders
+
+    @staticmethod
+    def _qualified(board: _Board, stat: str, min_at_bats: Optional[int]) -> Iterable[Tuple[Any, int]]:
+        keys = board.indexes[stat].keys
+        if not min_at_bats:
+            return keys
+        # A raised qualifier skips players while walking, so reads can go past N entries
+        at_bats = _COLUMN['at_bats']
+        return (key for key in keys if board.totals[key[1]][at_bats] >= min_at_bats)
+
+    def _board(self, season: Optional[int]) -> _Board:
+        board = self._boards.get(season)
+        if board is None:
+            board = self.rebuild(season)
+        return board
+
+    # Rebuilding
+    def rebuild(self, season: Optional[int] = ALL_SEASONS) -> _Board:
+        """Reload one board from GameStats with a full GROUP BY."""
+        from app.stats import aggregate, load_stat_rows
+
+        totals = aggregate(load_stat_rows(season=season))
+        columns = [totals[name].tolist() for name in COUNT_COLUMNS]
+        lines = {player_id: list(line)
+                 for player_id, line in zip(totals['player_id'].tolist(), zip(*columns))}
+        board = _Board(lines, self.min_at_bats)
+        # Loaded inside a transaction with staged changes, the board may
+        # already count them, and they are applied again at commit; such a
+        # board serves this read only
+        uncommitted = bool(db.session.info.get(_STAGED) or db.session.info.get(_RESET))
+        with self._lock:
+            if not uncommitted:
+                self._boards[season] = board
+            self.loads += 1
+        return board
+
+    def invalidate(self) -> None:
+        """Drop every board; each reloads on its next read."""
+        with self._lock:
+            self._boards.clear()
+
+    # Incremental updates
+    def stage(self, game_id: int, player_id: Optional[int], deltas: Dict[str, int], sign: int = 1) -> None:
+        """Queue a change to a player's totals for when the session commits."""
+        if not deltas or player_id is None:
+            return
+        db.session.info.setdefault(_STAGED, []).append(
+            (game_id, player_id, {name: sign * value for name, value in deltas.items()}))
+
+    def stage_reset(self) -> None:
+        """Invalidate every board when the session commits."""
+        db.session.info[_RESET] = True
+
+    def apply(self, changes: Iterable[Tuple[Optional[int], int, Dict[str, int]]]) -> None:
+        """Apply (season, player_id, deltas) changes to the loaded boards."""
+        with self._lock:
+            for season, player_id, deltas in changes:
+                for key in (season, ALL_SEASONS) if season is not None else (ALL_SEASONS,):
+                    board = self._boards.get(key)
+                    if board is not None:
+                        board.apply(player_id, deltas)
+                self.applied += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'boards': sorted(self._boards, key=lambda season: -1 if season is None else season),
+                    'players': {season: len(board.totals) for season, board in self._boards.items()},
+                    'loads': self.loads, 'applied': self.applied}
+
+leaderboards = Leaderboards()
+
+# Session hooks: seasons are looked up while the transaction is still open,
+# and deltas are applied only once it has committed
+@event.listens_for(db.session, 'before_commit')
+def _resolve_seasons(session) -> None:
+    staged = session.info.get(_STAGED)
+    if not staged:
+        return
+    game_ids = {game_id for game_id, _, _ in staged}
+    session.info[_SEASONS] = {
+        game_id: date.year if date is not None else None
+        for game_id, date in session.execute(select(Game.id, Game.date).where(Game.id.in_(game_ids)))
+    }
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_staged(session) -> None:
+    staged = session.info.pop(_STAGED, None)
+    seasons = session.info.pop(_SEASONS, {})
+    if session.info.pop(_RESET, False):
+        leaderboards.invalidate()
+    elif staged:
+        leaderboards.apply((seasons.get(game_id), player_id, deltas) for game_id, player_id, deltas in staged)
+
+@event.listens_for(db.session, 'after_transaction_end')
+def _drop_staged(session, transaction) -> None:
+    # Rolled back (or closed without committing): the changes never happened
+    if transaction.parent is None:
+        for key in (_STAGED, _RESET, _SEASONS):
+            session.info.pop(key, None)
@@ -0,0 +1,267 @@
+import inspect
+import itertools
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+from flask import g, request
+
+from app import cache, broker
+from app.leaderboard import leaderboards
+from app.pool import pool_metrics
+from app.query_stats import query_stats
+
+# Latency histograms in the Prometheus text format. Each thread counts into
+# its own shard of a histogram, a plain list only that thread writes, so
+# observe() takes no lock; rendering sums the shards. When a thread exits
+# its shard is folded into the histogram's retired totals, so the series
+# stay monotonic, as Prometheus expects of counters, while a server that
+# starts a thread per request does not pile up shards.
+#
+# With METRICS_ENABLED (the default) every app.crud call and every request
+# is timed; the same crud wrapper feeds app.query_stats. /metrics also
+# reports the connection pool, cache, live feed, leaderboard and, when
+# enabled, query stats counters.
+
+# Upper bounds in seconds; a +Inf bucket is implied
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+class _ShardOwner:
+    """Lives in a thread's local storage; collected when the thread exits."""
+
+    __slots__ = ('__weakref__',)
+
+class Histogram:
+    """One series: counts per bucket plus the sum of observed values."""
+
+    __slots__ = ('bounds', '_local', '_shards', '_retired', '_keys', '_lock')
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self._local = threading.local()
+        self._shards: Dict[int, List[Any]] = {}
+        # One count per bucket, the +Inf one included, then the sum
+        self._retired: List[Any] = [0] * (len(self.bounds) + 1) + [0.0]
+        self._keys = itertools.count()
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        shard[bisect_left(self.bounds, value)] += 1
+        shard[-1] += value
+
+    def _new_shard(self) -> List[Any]:
+        shard = [0] * (len(self.bounds) + 1) + [0.0]
+        owner = _ShardOwner()
+        with self._lock:
+            key = next(self._keys)
+            self._shards[key] = shard
+        local = self._local
+        local.shard, local.owner = shard, owner
+        weakref.finalize(owner, self._retire, key)
+        return shard
+
+    def _retire(self, key: int) -> None:
+        # Runs as the owning thread exits, after its last observation
+        with self._lock:
+            shard = self._shards.pop(key)
+            retired = self._retired
+            for index, value in enumerate(shard):
+                retired[index] += value
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        """Cumulative bucket counts, +Inf last, and the sum."""
+        with self._lock:
+            counts = self._retired[:-1]
+            total = self._retired[-1]
+            shards = list(self._shards.values())
+        for shard in shards:
+            for index in range(len(counts)):
+                counts[index] += shard[index]
+            total += shard[-1]
+        return list(itertools.accumulate(counts)), total
+
+class HistogramFamily:
+    """Histograms sharing a name, one per combination of label values."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str],
+                 bounds: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.bounds = tuple(bounds)
+        self._children: Dict[Tuple[str, ...], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> Histogram:
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {', '.join(self.labelnames)}")
+            with self._lock:
+                child = self._children.setdefault(values, Histogram(self.bounds))
+        return child
+
+    def render(self, lines: List[str]) -> None:
+        lines.append(f'# HELP {self.name} {self.help}')
+        lines.append(f'# TYPE {self.name} histogram')
+        with self._lock:
+            children = sorted(self._children.items())
+        for values, child in children:
+            labels = list(zip(self.labelnames, values))
+            counts, total = child.snapshot()
+            for bound, count in zip(self.bounds + (float('inf'),), counts):
+                lines.append(_sample(f'{self.name}_bucket', count, labels + [('le', _number(bound))]))
+            lines.append(_sample(f'{self.name}_sum', total, labels))
+            lines.append(_sample(f'{self.name}_count', counts[-1], labels))
+
+def _number(value: Any) -> str:
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, float):
+        if value == float('inf'):
+            return '+Inf'
+        return repr(value)
+    return str(value)
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _sample(name: str, value: Any, labels: Iterable[Tuple[str, str]] = ()) -> str:
+    pairs = ','.join(f'{label}="{_escape(str(text))}"' for label, text in labels)
+    return f'{name}{{{pairs}}} {_number(value)}' if pairs else f'{name} {_number(value)}'
+
+def _metric(lines: List[str], name: str, kind: str, help: str, value: Any,
+            labels: Iterable[Tuple[str, str]] = ()) -> None:
+    lines.append(f'# HELP {name} {help}')
+    lines.append(f'# TYPE {name} {kind}')
+    lines.append(_sample(name, value, labels))
+
+class Metrics:
+    """Flask extension timing crud calls and requests for /metrics.
+
+    METRICS_ENABLED turns the timing off; /metrics still reports the
+    counters the other extensions keep.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.crud_seconds = HistogramFamily('softball_crud_seconds', 'Latency of app.crud calls.',
+                                            ('function',))
+        self.request_seconds = HistogramFamily('softball_request_seconds', 'Latency of requests by endpoint.',
+                                               ('endpoint', 'method'))
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('METRICS_ENABLED', True)
+        if self.enabled:
+            app.before_request(self._start_request)
+            app.teardown_request(self._end_request)
+        app.extensions['metrics'] = self
+
+    def _start_request(self) -> None:
+        g.metrics_started = time.perf_counter()
+
+    def _end_request(self, exc) -> None:
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            self.request_seconds.labels(request.endpoint or '<unmatched>', request.method).observe(
+                time.perf_counter() - started)
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format."""
+        lines: List[str] = []
+        self.crud_seconds.render(lines)
+        self.request_seconds.render(lines)
+
+        pool = pool_metrics.snapshot()
+        for name in ('connects', 'checkouts', 'checkins', 'invalidations', 'timeouts', 'waits'):
+            _metric(lines, f'softball_db_pool_{name}_total', 'counter', f'Connection pool {name}.',
+                    pool[name])
+        _metric(lines, 'softball_db_pool_wait_seconds_total', 'counter',
+                'Seconds spent waiting for a pooled connection.', pool['wait_seconds_total'])
+        for name in ('checked_out', 'peak_checked_out', 'pool_size', 'overflow', 'wait_seconds_max'):
+            _metric(lines, f'softball_db_pool_{name}', 'gauge', f'Connection pool {name}.', pool[name])
+
+        stats = cache.stats()
+        backend = [('backend', stats['backend'])]
+        _metric(lines, 'softball_cache_hits_total', 'counter', 'Cache hits.', stats['hits'], backend)
+        _metric(lines, 'softball_cache_misses_total', 'counter', 'Cache misses.', stats['misses'], backend)
+        _metric(lines, 'softball_cache_hit_ratio', 'gauge', 'Cache hits per lookup.', stats['hit_rate'],
+                backend)
+        _metric(lines, 'softball_cache_entries', 'gauge', 'Entries in the cache.', stats['size'], backend)
+
+        stats = broker.stats()
+        _metric(lines, 'softball_feed_topics', 'gauge', 'Games with live feed viewers.', stats['topics'])
+        _metric(lines, 'softball_feed_subscribers', 'gauge', 'Live feed viewers.', stats['subscribers'])
+        _metric(lines, 'softball_feed_published_total', 'counter', 'Frames published.', stats['published'])
+        _metric(lines, 'softball_feed_delivered_total', 'counter', 'Frames delivered to viewers.',
+                stats['delivered'])
+        _metric(lines, 'softball_feed_dropped', 'gauge', 'Frames dropped by current viewers.',
+                stats['dropped'])
+
+        stats = leaderboards.stats()
+        _metric(lines, 'softball_leaderboard_boards', 'gauge', 'Leaderboards loaded.', len(stats['boards']))
+        _metric(lines, 'softball_leaderboard_loads_total', 'counter', 'Leaderboard reloads.', stats['loads'])
+        _metric(lines, 'softball_leaderboard_applied_total', 'counter', 'Changes applied to leaderboards.',
+                stats['applied'])
+
+        if query_stats.enabled:
+            stats = query_stats.stats()
+            _metric(lines, 'softball_db_queries_total', 'counter', 'SQL statements run.', stats['queries'])
+            _metric(lines, 'softball_db_query_seconds_total', 'counter', 'Seconds spent running SQL.',
+                    stats['seconds'])
+        return '\n'.join(lines) + '\n'
+
+metrics = Metrics()
+
+def instrument(fn: Callable[..., Any], histogram: Histogram) -> Callable[..., Any]:
+    """Time fn into histogram and charge its statements to query stats, each while enabled.
+
+    One wrapper does both, with the histogram's observe() inlined, because
+    every crud call goes through it.
+    """
+    name = f"{fn.__module__.rpartition('.')[2]}.{fn.__name__}"
+    bounds, local, new_shard = histogram.bounds, histogram._local, histogram._new_shard
+    clock = time.perf_counter
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not metrics.enabled:
+            if query_stats.enabled:
+                return query_stats._call(name, fn, args, kwargs)
+            return fn(*args, **kwargs)
+        started = clock()
+        try:
+            if query_stats.enabled:
+                return query_stats._call(name, fn, args, kwargs)
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = clock() - started
+            try:
+                shard = local.shard
+            except AttributeError:
+                shard = new_shard()
+            shard[bisect_left(bounds, elapsed)] += 1
+            shard[-1] += elapsed
+
+    return wrapper
+
+def instrument_module(namespace: Dict[str, Any], family: HistogramFamily,
+                      exclude: Iterable[str] = ()) -> None:
+    """Instrument every public function defined in a module, labelled by its name."""
+    module, skip = namespace['__name__'], set(exclude)
+    for name, value in list(namespace.items()):
+        if (inspect.isfunction(value) and value.__module__ == module and not name.startswith('_')
+                and name not in skip):
+            namespace[name] = instrument(value, family.labels(name))
@@ -1,7 +1,9 @@
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
+from flask import current_app
 from flask_login import UserMixin
-from app import db, login
+from sqlalchemy import select
+from app import db, login, cache
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -16,11 +18,38 @@ class User(UserMixin, db.Model):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+class Principal(UserMixin):
+    """Slim session identity for Flask-Login; never carries the password hash."""
+
+    def __init__(self, id, username, email):
+        self.id = id
+        self.username = username
+        self.email = email
+
+    def __repr__(self):
+        return f'<Principal {self.id} {self.username}>'
+
+def principal_cache_key(user_id):
+    return f'principal:{user_id}'
+
 @login.user_loader
 def load_user(id):
-    return User.query.get(int(id))
+    user_id = int(id)
+
+    def load():
+        row = db.session.execute(
+            select(User.id, User.username, User.email).where(User.id == user_id)
+        ).first()
+        return tuple(row) if row else None
+
+    row = cache.get_or_load(principal_cache_key(user_id), load,
+                            ttl=current_app.config.get('USER_CACHE_TTL', 60))
+    return Principal(*row) if row else None
 
 class Team(db.Model):
+    __table_args__ = (
+        db.Index('ix_team_user_id_name', 'user_id', 'name'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(64), unique=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -29,6 +58,9 @@ class Team(db.Model):
     games = db.relationship('Game', backref='team', lazy='dynamic')
 
 class Player(db.Model):
+    __table_args__ = (
+        db.Index('ix_player_team_id_name', 'team_id', 'name'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(64), nullable=False)
     number = db.Column(db.Integer)
@@ -41,15 +73,30 @@ class Player(db.Model):
     steals = db.relationship('Steal', backref='player', lazy='dynamic')
 
 class Game(db.Model):
+    __table_args__ = (
+        db.Index('ix_game_team_id_date', 'team_id', 'date'),
+        db.Index('ix_game_date', 'date'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.DateTime, nullable=False)
     opponent = db.Column(db.String(64), nullable=False)
     team_id = db.Column(db.Integer, db.ForeignKey('team.id'))
+    # Line score (R/H/E per side), kept in step with the innings and at-bats
+    # by app.aggregation so schedules need not read them
+    team_runs = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    team_hits = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    team_errors = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    opponent_runs = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    opponent_hits = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    opponent_errors = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     innings = db.relationship('Inning', backref='game', lazy='dynamic')
     batting_orders = db.relationship('BattingOrder', backref='game', lazy='dynamic')
     game_stats = db.relationship('GameStats', backref='game', lazy='dynamic')
 
 class Inning(db.Model):
+    __table_args__ = (
+        db.Index('ix_inning_game_id_inning_number', 'game_id', 'inning_number'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     game_id = db.Column(db.Integer, db.ForeignKey('game.id'))
     inning_number = db.Column(db.Integer, nullable=False)
@@ -58,17 +105,27 @@ class Inning(db.Model):
     at_bats = db.relationship('AtBat', backref='inning', lazy='dynamic')
 
 class BattingOrder(db.Model):
+    __table_args__ = (
+        db.UniqueConstraint('game_id', 'order_number', name='uq_batting_order_game_id_order_number'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     game_id = db.Column(db.Integer, db.ForeignKey('game.id'))
     player_id = db.Column(db.Integer, db.ForeignKey('player.id'))
     order_number = db.Column(db.Integer, nullable=False)
 
 class GameStats(db.Model):
+    __table_args__ = (
+        db.UniqueConstraint('game_id', 'player_id', name='uq_game_stats_game_id_player_id'),
+        db.Index('ix_game_stats_player_id', 'player_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     game_id = db.Column(db.Integer, db.ForeignKey('game.id'))
     player_id = db.Column(db.Integer, db.ForeignKey('player.id'))
     at_bats = db.Column(db.Integer, default=0)
     hits = db.Column(db.Integer, default=0)
+    doubles = db.Column(db.Integer, default=0)
+    triples = db.Column(db.Integer, default=0)
+    home_runs = db.Column(db.Integer, default=0)
     runs = db.Column(db.Integer, default=0)
     rbis = db.Column(db.Integer, default=0)
     strikeouts = db.Column(db.Integer, default=0)
@@ -76,7 +133,18 @@ class GameStats(db.Model):
     stolen_bases = db.Column(db.Integer, default=0)
     caught_stealing = db.Column(db.Integer, default=0)
 
+# GameStats counting columns in app.stats array column order, and the rate
+# stats computed from them. They live here rather than in app.stats so the
+# crud layer and the leaderboards can use them without importing numpy.
+COUNT_COLUMNS = ('at_bats', 'hits', 'doubles', 'triples', 'home_runs', 'runs', 'rbis',
+                 'strikeouts', 'walks', 'stolen_bases', 'caught_stealing')
+RATE_COLUMNS = ('avg', 'obp', 'slg', 'ops')
+
 class AtBat(db.Model):
+    __table_args__ = (
+        db.Index('ix_at_bat_inning_id', 'inning_id'),
+        db.Index('ix_at_bat_batter_id', 'batter_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     inning_id = db.Column(db.Integer, db.ForeignKey('inning.id'))
     batter_id = db.Column(db.Integer, db.ForeignKey('player.id'))
@@ -89,12 +157,17 @@ class AtBat(db.Model):
     # Track pitch count
     balls = db.Column(db.Integer, default=0)
     strikes = db.Column(db.Integer, default=0)
+    # Pitch sequence, two 4-bit pitch codes per byte (see app/pitches.py)
+    pitches = db.Column(db.LargeBinary(16))
     
     # Track base advancements
     bases_advanced = db.Column(db.Integer, default=0)  # How many bases the batter advanced
     runners_advanced = db.Column(db.Integer, default=0)  # How many runners advanced
 
 class Out(db.Model):
+    __table_args__ = (
+        db.Index('ix_out_at_bat_id', 'at_bat_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     at_bat_id = db.Column(db.Integer, db.ForeignKey('at_bat.id'))
     player_id = db.Column(db.Integer, db.ForeignKey('player.id'))
@@ -102,12 +175,24 @@ class Out(db.Model):
     base = db.Column(db.Integer)  # 1, 2, 3, or home for fielding outs, null for strikeouts
     fielder_id = db.Column(db.Integer, db.ForeignKey('player.id'))  # Player who made the out
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    # Order among the at-bat's outs and steals, shared by both tables
+    sequence = db.Column(db.Integer)
 
 class Steal(db.Model):
+    __table_args__ = (
+        db.Index('ix_steal_at_bat_id', 'at_bat_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     at_bat_id = db.Column(db.Integer, db.ForeignKey('at_bat.id'))
     player_id = db.Column(db.Integer, db.ForeignKey('player.id'))
     from_base = db.Column(db.Integer, nullable=False)  # Base they're stealing from
     to_base = db.Column(db.Integer, nullable=False)    # Base they're stealing to
     success = db.Column(db.Boolean, nullable=False)    # Whether the steal was successful
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow) 
\ No newline at end of file
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    # Order among the at-bat's outs and steals, shared by both tables
+    sequence = db.Column(db.Integer)
+
+class WriteBehindCheckpoint(db.Model):
+    """Last operation a durable write-behind queue committed (see app/write_behind.py)."""
+    journal = db.Column(db.String(255), primary_key=True)  # Absolute path of the queue's journal
+    sequence = db.Column(db.Integer, nullable=False)
@@ -0,0 +1,149 @@
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+
+from app import db
+from app.models import Game, Inning, AtBat
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Pitch sequences. AtBat.pitches packs an at-bat's pitches two to a byte:
+# each pitch is a 4-bit code, high nibble first, and code 0 pads an odd
+# final nibble. A typical six-pitch at-bat takes 3 bytes, against six rows
+# if every pitch were its own row.
+#
+# The text form used by scorebooks and exports is one letter per pitch,
+# following the usual scoring notation: B ball, C called strike,
+# S swinging strike, F foul, T foul tip, L foul bunt, X in play,
+# H hit by pitch, I intentional ball.
+
+PITCH_TYPES = ('ball', 'called_strike', 'swinging_strike', 'foul', 'foul_tip', 'bunt_foul', 'in_play',
+               'hit_by_pitch', 'intentional_ball')
+# Code 0 is padding, so codes start at 1
+PITCH_CODES: Dict[str, int] = {name: code for code, name in enumerate(PITCH_TYPES, start=1)}
+PITCH_LETTERS = 'BCSFTLXHI'
+LETTER_CODES: Dict[str, int] = {letter: code for code, letter in enumerate(PITCH_LETTERS, start=1)}
+
+BALL_CODES = frozenset(PITCH_CODES[name] for name in ('ball', 'intentional_ball'))
+# Pitches that always add a strike, and fouls, which cannot make the third
+FULL_STRIKE_CODES = frozenset(PITCH_CODES[name] for name in ('called_strike', 'swinging_strike', 'foul_tip',
+                                                             'bunt_foul'))
+FOUL_CODES = frozenset((PITCH_CODES['foul'],))
+# First-pitch strike counts anything that is not a ball, as usual
+STRIKE_CODES = frozenset(range(1, len(PITCH_TYPES) + 1)) - BALL_CODES - {PITCH_CODES['hit_by_pitch']}
+
+MAX_BYTES = AtBat.__table__.c.pitches.type.length
+MAX_PITCHES = 2 * MAX_BYTES
+
+# Encoding
+def pitch_code(pitch: str) -> int:
+    code = PITCH_CODES.get(pitch) or LETTER_CODES.get(pitch)
+    if code is None:
+        raise ValueError(f'Unknown pitch {pitch!r}')
+    return code
+
+def pack_codes(codes: Sequence[int]) -> bytes:
+    if len(codes) > MAX_PITCHES:
+        raise ValueError(f'at most {MAX_PITCHES} pitches fit in an at-bat, got {len(codes)}')
+    if len(codes) % 2:
+        codes = list(codes) + [0]
+    return bytes((codes[i] << 4) | codes[i + 1] for i in range(0, len(codes), 2))
+
+def unpack_codes(data: Optional[bytes]) -> List[int]:
+    codes = []
+    for byte in data or b'':
+        codes.append(byte >> 4)
+        if byte & 0x0F:
+            codes.append(byte & 0x0F)
+    return codes
+
+def encode_pitches(pitches: Iterable[str]) -> bytes:
+    """Pack pitch names (or letters) into the AtBat.pitches format."""
+    return pack_codes([pitch_code(pitch) for pitch in pitches])
+
+def decode_pitches(data: Optional[bytes]) -> List[str]:
+    return [PITCH_TYPES[code - 1] for code in unpack_codes(data)]
+
+def parse_pitch_string(text: str) -> bytes:
+    """Pack a letter string such as 'BCFX'."""
+    return encode_pitches(text.strip().upper())
+
+def format_pitch_string(data: Optional[bytes]) -> str:
+    return ''.join(PITCH_LETTERS[code - 1] for code in unpack_codes(data))
+
+def count_after(codes: Iterable[int]) -> Tuple[int, int]:
+    """Balls and strikes after a sequence of pitch codes."""
+    balls = strikes = 0
+    for code in codes:
+        if code in BALL_CODES:
+            balls += 1
+        elif code in FULL_STRIKE_CODES or (code in FOUL_CODES and strikes < 2):
+            strikes += 1
+    return balls, strikes
+
+# Vectorized decoding for season analytics. numpy is imported by these
+# functions only: GameState and the scorebook use the codecs above, and
+# they load on every app start.
+def pitch_matrix(blobs: Sequence[Optional[bytes]], width: int = MAX_BYTES) -> 'np.ndarray':
+    """Unpack many sequences at once into an (n, 2 * width) uint8 array of codes.
+
+    Row i holds at-bat i's pitch codes followed by zeros. Sequences are
+    padded to width bytes and joined into one buffer, so the unpacking is
+    two numpy operations over the whole season rather than a Python loop.
+    """
+    import numpy as np
+
+    if not blobs:
+        return np.zeros((0, 2 * width), dtype=np.uint8)
+    padding = bytes(width)
+    buffer = b''.join((blob or b'') + padding[len(blob or b''):] for blob in blobs)
+    packed = np.frombuffer(buffer, dtype=np.uint8).reshape(len(blobs), width)
+    codes = np.empty((len(blobs), 2 * width), dtype=np.uint8)
+    codes[:, 0::2] = packed >> 4
+    codes[:, 1::2] = packed & 0x0F
+    return codes
+
+def pitch_lengths(matrix: 'np.ndarray') -> 'np.ndarray':
+    import numpy as np
+
+    return np.count_nonzero(matrix, axis=1)
+
+def pitch_type_totals(matrix: 'np.ndarray') -> Dict[str, int]:
+    import numpy as np
+
+    counts = np.bincount(matrix.ravel(), minlength=len(PITCH_TYPES) + 1)
+    return {name: int(counts[code]) for name, code in PITCH_CODES.items()}
+
+def first_pitch_strike_rate(matrix: 'np.ndarray') -> float:
+    """Share of at-bats with a recorded sequence whose first pitch was a strike."""
+    import numpy as np
+
+    first = matrix[:, 0]
+    tracked = first != 0
+    if not tracked.any():
+        return 0.0
+    strikes = np.isin(first, sorted(STRIKE_CODES))
+    return float(strikes.sum() / tracked.sum())
+
+# Loading
+def load_pitch_matrix(team_id: Optional[int] = None, season: Optional[int] = None) -> 'np.ndarray':
+    """Every recorded pitch sequence in scope, as a pitch_matrix."""
+    query = (
+        select(AtBat.pitches)
+        .join(Inning, AtBat.inning_id == Inning.id)
+        .join(Game, Inning.game_id == Game.id)
+        .where(AtBat.pitches.isnot(None))
+    )
+    if team_id is not None:
+        query = query.where(Game.team_id == team_id)
+    if season is not None:
+        query = query.where(Game.date >= datetime(season, 1, 1), Game.date < datetime(season + 1, 1, 1))
+    # Plain tuples off the DBAPI cursor, as in app.stats
+    result = db.session.connection().execute(query)
+    try:
+        blobs = [row[0] for row in result.cursor.fetchall()]
+    finally:
+        result.close()
+    return pitch_matrix(blobs)
@@ -0,0 +1,162 @@
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from app.game_state import Event, GameState, Write
+
+# Play log with snapshots. Every event recorded for a game is appended to
+# the log together with the rows it queued, and a copy of the state is kept
+# every snapshot_every events. Undo, redo and "state as of event K" start
+# from the nearest snapshot and replay at most snapshot_every - 1 events
+# instead of the whole game.
+#
+# Entries are never changed once written. Undo only moves the head back;
+# recording a new event after an undo drops the undone entries, as in any
+# editor. Undoing an event removes exactly the rows it wrote (through crud,
+# so GameStats are reversed incrementally) and rewrites the runs of the
+# innings it touched; nothing else in the game is recomputed.
+
+SNAPSHOT_EVERY = 16
+
+class LogEntry(NamedTuple):
+    event: Event
+    # Rows the event queued, in order; their ids are set once flushed
+    writes: Tuple[Write, ...]
+    # Innings whose runs the event changed
+    innings: FrozenSet[int]
+    # Completed plate appearances in the game after this event
+    plate_appearances: int
+
+class PlayLog:
+    """The event log of one game, driving its live GameState.
+
+    Always go through log.state: undo replaces the state object.
+    """
+
+    def __init__(self, state: GameState, snapshot_every: int = SNAPSHOT_EVERY):
+        if snapshot_every < 1:
+            raise ValueError('snapshot_every must be at least 1')
+        self.state = state
+        self.snapshot_every = snapshot_every
+        self.entries: List[LogEntry] = []
+        # Entries before head are in effect; the rest can be redone
+        self.head = 0
+        self.snapshots: Dict[int, GameState] = {0: self._snapshot(state)}
+        self.base_at_bat_id = state.last_at_bat_id
+
+    @classmethod
+    def restore(cls, game_id: int, team_bats_first: bool = True,
+                snapshot_every: int = SNAPSHOT_EVERY) -> Optional['PlayLog']:
+        """A log starting from the game's stored state; earlier plays cannot be undone."""
+        state = GameState.restore(game_id, team_bats_first)
+        if state is None:
+            return None
+        return cls(state, snapshot_every)
+
+    def __len__(self) -> int:
+        return self.head
+
+    @staticmethod
+    def _snapshot(state: GameState) -> GameState:
+        snapshot = state.copy()
+        snapshot.persist = False
+        return snapshot
+
+    # Recording
+    def record(self, event: Event) -> GameState:
+        """Apply an event to the live state and append it to the log."""
+        if self.head < len(self.entries):
+            del self.entries[self.head:]
+            for index in [index for index in self.snapshots if index > self.head]:
+                del self.snapshots[index]
+        self.entries.append(self._apply(event))
+        self.head += 1
+        if self.head % self.snapshot_every == 0:
+            self.snapshots[self.head] = self._snapshot(self.state)
+        return self.state
+
+    def _apply(self, event: Event) -> LogEntry:
+        state = self.state
+        queued = len(state.pending)
+        inning = state.inning
+        runs = state.team_runs + state.opponent_runs
+        state.apply(event)
+        # Runs are always scored before a third out moves the inning on
+        innings = frozenset((inning,)) if state.team_runs + state.opponent_runs != runs else frozenset()
+        return LogEntry(event, tuple(state.pending[queued:]), innings, state.plate_appearances)
+
+    def flush(self) -> List[Write]:
+        return self.state.flush()
+
+    # Undo and redo
+    def undo(self) -> Optional[LogEntry]:
+        """Take back the latest event; returns its entry, or None at the start of the log."""
+        if self.head == 0:
+            return None
+        self.head -= 1
+        entry = self.entries[self.head]
+        self._rewind(entry)
+        return entry
+
+    def redo(self) -> Optional[LogEntry]:
+        """Apply the latest undone event again; returns its new entry."""
+        if self.head == len(self.entries):
+            return None
+        entry = self._apply(self.entries[self.head].event)
+        self.entries[self.head] = entry
+        self.head += 1
+        return entry
+
+    def _rewind(self, entry: LogEntry) -> None:
+        live = self.state
+        state = self.state_at(self.head)
+        if all(write.row_id is None for write in entry.writes):
+            # Never written: just drop the rows from the queue
+            undone = {id(write) for write in entry.writes}
+            pending = [write for write in live.pending if id(write) not in undone]
+        else:
+            pending = list(live.pending)
+            for write in reversed(entry.writes):
+                pending.append(Write(f'delete_{write.kind}', write.inning, (write.row_id,)))
+        state.pending = pending
+        state.dirty_innings = live.dirty_innings | entry.innings
+        state.inning_ids = live.inning_ids
+        state.last_at_bat_id = self._last_at_bat_id()
+        state.persist = True
+        self.state = state
+
+    def _last_at_bat_id(self) -> Optional[int]:
+        for entry in reversed(self.entries[:self.head]):
+            for write in reversed(entry.writes):
+                if write.kind == 'at_bat':
+                    # Still queued: flush() points outs and steals at it
+                    return write.row_id
+        return self.base_at_bat_id
+
+    # Replay
+    def state_at(self, index: int) -> GameState:
+        """The state after the first index events, replayed from the nearest snapshot.
+
+        The result is a detached copy: applying events to it writes nothing.
+        """
+        if not 0 <= index <= len(self.entries):
+            raise IndexError(f'play log has {len(self.entries)} entries')
+        base = index - index % self.snapshot_every
+        state = self.snapshots[base].copy()
+        for entry in self.entries[base:index]:
+            state.apply(entry.event)
+        return state
+
+    def state_after_plate_appearance(self, count: int) -> Optional[GameState]:
+        """The state right after the game's count-th plate appearance, if it is in the log."""
+        if count == self.snapshots[0].plate_appearances:
+            return self.state_at(0)
+        lo, hi = 0, self.head
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.entries[mid].plate_appearances < count:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self.head or self.entries[lo].plate_appearances != count \
+                or count < self.snapshots[0].plate_appearances:
+            return None
+        return self.state_at(lo + 1)
@@ -0,0 +1,118 @@
+import threading
+import time
+import weakref
+from typing import Any, Dict
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+class PoolMetrics:
+    """Process-wide connection pool counters.
+
+    Checkout waits are timed by TimedQueuePool; connect/checkout/checkin
+    counts come from pool events once install() has been called on an engine.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._engines = weakref.WeakSet()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.connects = 0
+            self.checkouts = 0
+            self.checkins = 0
+            self.invalidations = 0
+            self.timeouts = 0
+            self.checked_out = 0
+            self.peak_checked_out = 0
+            self.waits = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+
+    def install(self, engine) -> None:
+        if getattr(engine, '_pool_metrics_installed', False):
+            return
+        event.listen(engine, 'connect', self._on_connect)
+        event.listen(engine, 'checkout', self._on_checkout)
+        event.listen(engine, 'checkin', self._on_checkin)
+        event.listen(engine, 'invalidate', self._on_invalidate)
+        engine._pool_metrics_installed = True
+        self._engines.add(engine)
+
+    def observe_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds_total += seconds
+            if seconds > self.wait_seconds_max:
+                self.wait_seconds_max = seconds
+            if timed_out:
+                self.timeouts += 1
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            if self.checked_out > self.peak_checked_out:
+                self.peak_checked_out = self.checked_out
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+            if self.checked_out > 0:
+                self.checked_out -= 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'invalidations': self.invalidations,
+                'timeouts': self.timeouts,
+                'checked_out': self.checked_out,
+                'peak_checked_out': self.peak_checked_out,
+                'waits': self.waits,
+                'wait_seconds_total': self.wait_seconds_total,
+                'wait_seconds_max': self.wait_seconds_max,
+            }
+        pools = [engine.pool for engine in list(self._engines) if isinstance(engine.pool, QueuePool)]
+        stats['pool_size'] = sum(pool.size() for pool in pools)
+        stats['overflow'] = sum(max(pool.overflow(), 0) for pool in pools)
+        return stats
+
+pool_metrics = PoolMetrics()
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.observe_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_metrics.observe_wait(time.perf_counter() - start)
+        return connection
+
+def apply_sqlite_pragmas(engine, pragmas) -> None:
+    """Run PRAGMA statements on every new SQLite connection of engine."""
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+    event.listen(engine, 'connect', on_connect)
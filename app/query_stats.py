@@ -0,0 +1,245 @@
+import heapq
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from flask import current_app, g, request
+from sqlalchemy import event
+
+from app import db
+
+# SQL instrumentation. With QUERY_STATS_ENABLED set, engine events time
+# every statement and charge it to what is running on the thread: the Flask
+# request and the outermost app.crud call (a crud function calling another
+# is charged once, to the outer one). Totals per crud function and per
+# endpoint, the slowest statements, and suspected N+1 patterns are kept in
+# memory until reset(). A suspect is one statement run QUERY_STATS_N_PLUS_ONE
+# times or more within a single call or request.
+#
+# Disabled, no engine listeners or request hooks are installed, and the
+# crud wrapper (app.metrics.instrument, which also times the call) skips
+# _call() after one attribute check. query_budget() does not need the
+# instrumentation enabled, so tests can use it anywhere.
+
+logger = logging.getLogger(__name__)
+
+_STARTED = 'query_stats_started'
+
+class QueryBudgetExceeded(AssertionError):
+    """A block or request ran more statements than its budget allows."""
+
+def _budget_message(statements: List[str], budget: int, where: str) -> str:
+    lines = [f'{len(statements)} queries in {where}, budget {budget}:']
+    lines.extend(f'  {repeats}x {statement}' for statement, repeats in Counter(statements).most_common())
+    return '\n'.join(lines)
+
+class _Scope:
+    """Statements run by one request or one top-level call."""
+
+    __slots__ = ('name', 'queries', 'seconds', 'statements')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.queries = 0
+        self.seconds = 0.0
+        self.statements: Counter = Counter()
+
+class _Totals:
+    __slots__ = ('calls', 'queries', 'seconds', 'max_queries')
+
+    def __init__(self):
+        self.calls = 0
+        self.queries = 0
+        self.seconds = 0.0
+        self.max_queries = 0
+
+    def add(self, scope: _Scope) -> None:
+        self.calls += 1
+        self.queries += scope.queries
+        self.seconds += scope.seconds
+        if scope.queries > self.max_queries:
+            self.max_queries = scope.queries
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'calls': self.calls, 'queries': self.queries, 'seconds': self.seconds,
+                'max_queries': self.max_queries}
+
+class QueryStats:
+    """Flask extension counting and timing SQL statements.
+
+    QUERY_STATS_SLOWEST is how many of the slowest statements are kept, and
+    QUERY_STATS_REQUEST_BUDGET, if set, the statements a request may run:
+    over it, a testing app raises QueryBudgetExceeded and others log a
+    warning.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.slowest_kept = 10
+        self.n_plus_one = 10
+        self.request_budget: Optional[int] = None
+        self._local = threading.local()
+        self.reset()
+        if app is not None:
+            self.init_app(app)
+
+    def reset(self) -> None:
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.seconds = 0.0
+        self.functions: Dict[str, _Totals] = {}
+        self.endpoints: Dict[str, _Totals] = {}
+        self._slowest: List[Tuple[float, str, Optional[str]]] = []
+        self._suspects: Dict[Tuple[str, str], int] = {}
+
+    def init_app(self, app):
+        self.enabled = app.config.get('QUERY_STATS_ENABLED', False)
+        self.slowest_kept = app.config.get('QUERY_STATS_SLOWEST', 10)
+        self.n_plus_one = app.config.get('QUERY_STATS_N_PLUS_ONE', 10)
+        self.request_budget = app.config.get('QUERY_STATS_REQUEST_BUDGET')
+        self.reset()
+        if self.enabled:
+            with app.app_context():
+                self.install(db.engine)
+            app.before_request(self._start_request)
+            app.after_request(self._check_request_budget)
+            app.teardown_request(self._end_request)
+        app.extensions['query_stats'] = self
+
+    def install(self, engine) -> None:
+        if getattr(engine, '_query_stats_installed', False):
+            return
+        event.listen(engine, 'before_cursor_execute', self._before_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_execute)
+        engine._query_stats_installed = True
+
+    # Engine events
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info[_STARTED] = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info.pop(_STARTED)
+        if not self.enabled:
+            return
+        scopes = self._scopes()
+        for scope in scopes:
+            scope.queries += 1
+            scope.seconds += elapsed
+            scope.statements[statement] += 1
+        with self._lock:
+            self.queries += 1
+            self.seconds += elapsed
+            entry = (elapsed, statement, scopes[-1].name if scopes else None)
+            if len(self._slowest) < self.slowest_kept:
+                heapq.heappush(self._slowest, entry)
+            elif self._slowest and elapsed > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    # Scopes
+    def _scopes(self) -> List[_Scope]:
+        return self._local.__dict__.setdefault('scopes', [])
+
+    def _open(self, name: str) -> _Scope:
+        scope = _Scope(name)
+        self._scopes().append(scope)
+        return scope
+
+    def _close(self, scope: _Scope, totals: Dict[str, _Totals]) -> None:
+        self._scopes().remove(scope)
+        suspects = [(statement, repeats) for statement, repeats in scope.statements.items()
+                    if repeats >= self.n_plus_one]
+        with self._lock:
+            line = totals.get(scope.name)
+            if line is None:
+                line = totals[scope.name] = _Totals()
+            line.add(scope)
+            for statement, repeats in suspects:
+                key = (scope.name, statement)
+                if key not in self._suspects:
+                    logger.warning('possible N+1 in %s: %d runs of %s', scope.name, repeats, statement)
+                self._suspects[key] = max(repeats, self._suspects.get(key, 0))
+
+    @contextmanager
+    def scope(self, name: str):
+        """Charge the block's statements to name, alongside the crud functions."""
+        if not self.enabled:
+            yield None
+            return
+        scope = self._open(name)
+        try:
+            yield scope
+        finally:
+            self._close(scope, self.functions)
+
+    def _call(self, name: str, fn: Callable[..., Any], args, kwargs):
+        local = self._local
+        if getattr(local, 'in_call', False):
+            return fn(*args, **kwargs)
+        local.in_call = True
+        scope = self._open(name)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            local.in_call = False
+            self._close(scope, self.functions)
+
+    # Requests
+    def _start_request(self) -> None:
+        g.query_stats_scope = self._open(request.endpoint or '<unmatched>')
+
+    def _check_request_budget(self, response):
+        scope = g.get('query_stats_scope')
+        if self.request_budget is not None and scope is not None and scope.queries > self.request_budget:
+            statements = list(scope.statements.elements())
+            message = _budget_message(statements, self.request_budget, f'{request.method} {request.path}')
+            if current_app.testing:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def _end_request(self, exc) -> None:
+        scope = g.pop('query_stats_scope', None)
+        if scope is not None:
+            self._close(scope, self.endpoints)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'queries': self.queries,
+                'seconds': self.seconds,
+                'functions': {name: line.to_dict() for name, line in self.functions.items()},
+                'endpoints': {name: line.to_dict() for name, line in self.endpoints.items()},
+                'slowest': [{'seconds': seconds, 'statement': statement, 'scope': scope}
+                            for seconds, statement, scope in sorted(self._slowest, reverse=True)],
+                'n_plus_one': [{'scope': scope, 'statement': statement, 'repeats': repeats}
+                               for (scope, statement), repeats in sorted(self._suspects.items())],
+            }
+
+query_stats = QueryStats()
+
+@contextmanager
+def query_budget(max_queries: int, engine=None):
+    """Raise QueryBudgetExceeded if the block runs more than max_queries statements.
+
+    Only statements issued on the calling thread count. Yields the list
+    they are collected in; works as a decorator too.
+    """
+    engine = engine if engine is not None else db.engine
+    thread = threading.get_ident()
+    statements: List[str] = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == thread:
+            statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    if len(statements) > max_queries:
+        raise QueryBudgetExceeded(_budget_message(statements, max_queries, 'block'))
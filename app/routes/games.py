@@ -0,0 +1,38 @@
+from flask import Blueprint, Response, abort
+
+from app import broker
+from app.game_state import GameState
+
+bp = Blueprint('games', __name__, url_prefix='/games')
+
+def _load_scoreboard(game_id: int):
+    state = GameState.restore(game_id)
+    return None if state is None else state.to_dict()
+
+@bp.route('/<int:game_id>/feed')
+def feed(game_id: int):
+    """Server-Sent Events stream of a game's scoreboard.
+
+    Only the first viewer of a game reads the database; everyone after that
+    is served from the broker, which GameState.flush() publishes to.
+    """
+    # Subscribed first, so the loaded scoreboard is published to this viewer
+    # and is kept while anyone watches
+    subscription = broker.subscribe(game_id)
+    if broker.latest(game_id, lambda: _load_scoreboard(game_id)) is None:
+        broker.unsubscribe(subscription)
+        abort(404)
+    heartbeat = broker.heartbeat
+
+    # The generator runs after the request context is gone, so it must not
+    # touch the database; the session is released at teardown as usual
+    def stream():
+        yield 'retry: 3000\n\n'
+        while not subscription.closed:
+            frame = subscription.get(heartbeat)
+            yield frame if frame is not None else ': keep-alive\n\n'
+
+    response = Response(stream(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    response.call_on_close(lambda: broker.unsubscribe(subscription))
+    return response
@@ -0,0 +1,10 @@
+from flask import Blueprint, Response
+
+from app.metrics import metrics, CONTENT_TYPE
+
+bp = Blueprint('metrics', __name__)
+
+@bp.route('/metrics')
+def scrape():
+    """Prometheus scrape endpoint."""
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,397 @@
+import csv
+import json
+import os
+import time
+from datetime import datetime
+from itertools import chain, groupby
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, TextIO, Tuple, Union
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import select, update, bindparam
+
+from app import db, aggregation, crud
+from app.bulk import ChunkedWriter, next_id
+from app.leaderboard import leaderboards
+from app.models import Player, Game, Inning, AtBat, Out, Steal, GameStats
+from app.pitches import parse_pitch_string
+
+# Scorebook import. A scorebook is a CSV or newline-delimited JSON file with
+# one event per row, grouped by game:
+#
+#   event     at_bat | out | steal | inning
+#   date      game date, ISO 8601          (every row)
+#   opponent  opponent name                (every row)
+#   inning    inning number                (every row)
+#   at_bat:   batter, result, rbis, balls, strikes, bases_advanced, runners_advanced,
+#             pitches (letters, e.g. "BCFX"; see app.pitches)
+#   out:      out_type, player (defaults to the batter), base, fielder_id
+#   steal:    player, from_base, to_base, success
+#   inning:   team_runs, opponent_runs
+#
+# Outs and steals belong to the at-bat row before them. Players are named by
+# name or by jersey number ("12" or "#12").
+
+EVENT_TYPES = ('at_bat', 'out', 'steal', 'inning')
+FORMATS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson', '.json': 'ndjson'}
+
+# Column limits come from the models so the importer cannot drift from them
+RESULT_LENGTH = AtBat.__table__.c.result.type.length
+OUT_TYPE_LENGTH = Out.__table__.c.out_type.type.length
+OPPONENT_LENGTH = Game.__table__.c.opponent.type.length
+
+TRUE_VALUES = {'1', 'true', 't', 'yes', 'y'}
+FALSE_VALUES = {'0', 'false', 'f', 'no', 'n'}
+
+class ScorebookError(ValueError):
+    """A scorebook row failed validation; line is its line in the file."""
+
+    def __init__(self, line: int, message: str):
+        super().__init__(f'line {line}: {message}')
+        self.line = line
+
+class ImportReport(NamedTuple):
+    games: int
+    innings: int
+    at_bats: int
+    outs: int
+    steals: int
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+# Reading
+def read_csv(f: TextIO) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    reader = csv.DictReader(f)
+    for row in reader:
+        yield reader.line_num, row
+
+def read_ndjson(f: TextIO) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    for line, text in enumerate(f, start=1):
+        text = text.strip()
+        if not text:
+            continue
+        try:
+            row = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ScorebookError(line, f'invalid JSON ({e.msg})') from None
+        if not isinstance(row, dict):
+            raise ScorebookError(line, 'expected a JSON object')
+        yield line, row
+
+READERS = {'csv': read_csv, 'ndjson': read_ndjson}
+
+# Field validation
+def _value(row: Dict[str, Any], field: str) -> Any:
+    value = row.get(field)
+    if isinstance(value, str):
+        value = value.strip()
+        if value == '':
+            return None
+    return value
+
+def _text(row, field: str, line: int, max_length: Optional[int] = None, required: bool = True) -> Optional[str]:
+    value = _value(row, field)
+    if value is None:
+        if required:
+            raise ScorebookError(line, f'{field} is required')
+        return None
+    value = str(value)
+    if max_length is not None and len(value) > max_length:
+        raise ScorebookError(line, f'{field} is longer than {max_length} characters')
+    return value
+
+def _int(row, field: str, line: int, default: Optional[int] = None, minimum: int = 0,
+         maximum: Optional[int] = None, required: bool = True) -> Optional[int]:
+    value = _value(row, field)
+    if value is None:
+        if default is None and required:
+            raise ScorebookError(line, f'{field} is required')
+        return default
+    if isinstance(value, bool):
+        raise ScorebookError(line, f'{field} must be an integer')
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ScorebookError(line, f'{field} must be an integer, got {value!r}') from None
+    if number < minimum or (maximum is not None and number > maximum):
+        raise ScorebookError(line, f'{field} {number} is out of range')
+    return number
+
+def _pitches(row, line: int) -> Optional[bytes]:
+    value = _text(row, 'pitches', line, required=False)
+    if value is None:
+        return None
+    try:
+        return parse_pitch_string(value)
+    except ValueError as e:
+        raise ScorebookError(line, f'pitches: {e}') from None
+
+def _bool(row, field: str, line: int) -> bool:
+    value = _value(row, field)
+    if isinstance(value, bool):
+        return value
+    text = str(value).lower() if value is not None else ''
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ScorebookError(line, f'{field} must be true or false')
+
+def _game_key(row, line: int) -> Tuple[datetime, str]:
+    date = _text(row, 'date', line)
+    try:
+        parsed = datetime.fromisoformat(date)
+    except ValueError:
+        raise ScorebookError(line, f'date {date!r} is not ISO 8601') from None
+    return parsed, _text(row, 'opponent', line, OPPONENT_LENGTH)
+
+class PlayerIndex:
+    """Name and jersey number lookup for one team's roster, built with one query."""
+
+    def __init__(self, team_id: int):
+        self.by_name: Dict[str, Optional[int]] = {}
+        self.by_number: Dict[int, Optional[int]] = {}
+        rows = db.session.execute(select(Player.id, Player.name, Player.number).where(Player.team_id == team_id))
+        for player_id, name, number in rows:
+            self._add(self.by_name, self._normalize(name), player_id)
+            if number is not None:
+                self._add(self.by_number, number, player_id)
+
+    @staticmethod
+    def _add(index, key, player_id):
+        # A key shared by two players is ambiguous and maps to None
+        index[key] = None if key in index else player_id
+
+    @staticmethod
+    def _normalize(name: str) -> str:
+        return ' '.join(name.split()).lower()
+
+    def resolve(self, value: Any, line: int) -> int:
+        text = str(value).strip()
+        if text.lstrip('#').isdigit():
+            index, key = self.by_number, int(text.lstrip('#'))
+        else:
+            index, key = self.by_name, self._normalize(text)
+        if key not in index:
+            raise ScorebookError(line, f'no player {text!r} on this team')
+        if index[key] is None:
+            raise ScorebookError(line, f'player {text!r} is ambiguous on this team')
+        return index[key]
+
+# Import
+
+# Keys assigned while a game is read, as offsets to add to each model's
+# next_id: the row's own id and the parent it belongs to
+LOCAL_KEYS = {
+    Inning: {'id': Inning},
+    AtBat: {'id': AtBat, 'inning_id': Inning},
+    Out: {'id': Out, 'at_bat_id': AtBat},
+    Steal: {'id': Steal, 'at_bat_id': AtBat},
+}
+
+def _import_game(team_id: int, key: Tuple[datetime, str], events, index: PlayerIndex,
+                 chunk_size: int) -> Dict[str, int]:
+    date, opponent = key
+    first_line, first_row = next(events)
+
+    game_id = db.session.execute(
+        select(Game.id).where(Game.team_id == team_id, Game.date == date, Game.opponent == opponent)
+    ).scalar()
+    new_game = game_id is None
+    if not new_game and \
+            db.session.execute(select(Inning.id).where(Inning.game_id == game_id).limit(1)).first():
+        raise ScorebookError(first_line, f'game on {date:%Y-%m-%d} against {opponent} already has play-by-play')
+
+    # The whole game is read before any ids are reserved, so the next_id
+    # locks are held only while its rows are written
+    buffers: Dict[Any, List[Dict[str, Any]]] = {model: [] for model in LOCAL_KEYS}
+    ids = dict.fromkeys(LOCAL_KEYS, 0)
+
+    def new_id(model):
+        ids[model] += 1
+        return ids[model] - 1
+
+    innings: Dict[int, int] = {}
+    runs: List[Dict[str, int]] = []
+    rows = 0
+    at_bat: Optional[Tuple[int, int]] = None
+    # Outs and steals are numbered together after each at-bat, in file order
+    sequence = 0
+    # Derived GameStats and line score, tallied with the same rules as app.aggregation
+    stats: Dict[int, Dict[str, int]] = {}
+    line_score = dict.fromkeys(aggregation.DERIVED_LINE_SCORE_COLUMNS, 0)
+
+    def tally(player_id, deltas):
+        line = stats.setdefault(player_id, dict.fromkeys(aggregation.DERIVED_COLUMNS, 0))
+        for name, value in deltas.items():
+            line[name] += value
+
+    for line, row in chain([(first_line, first_row)], events):
+        rows += 1
+        event = _text(row, 'event', line)
+        if event not in EVENT_TYPES:
+            raise ScorebookError(line, f"event must be one of {', '.join(EVENT_TYPES)}")
+        inning_number = _int(row, 'inning', line, minimum=1)
+        inning_id = innings.get(inning_number)
+        if inning_id is None:
+            inning_id = innings[inning_number] = new_id(Inning)
+            buffers[Inning].append({'id': inning_id, 'game_id': None, 'inning_number': inning_number,
+                                    'team_runs': 0, 'opponent_runs': 0})
+
+        if event == 'at_bat':
+            at_bat_id = new_id(AtBat)
+            batter_id = index.resolve(_text(row, 'batter', line), line)
+            result = _text(row, 'result', line, RESULT_LENGTH)
+            rbis = _int(row, 'rbis', line, default=0, maximum=4)
+            buffers[AtBat].append({
+                'id': at_bat_id, 'inning_id': inning_id, 'batter_id': batter_id,
+                'result': result, 'rbis': rbis,
+                'timestamp': date,
+                'balls': _int(row, 'balls', line, default=0, maximum=4),
+                'strikes': _int(row, 'strikes', line, default=0, maximum=3),
+                'bases_advanced': _int(row, 'bases_advanced', line, default=0, maximum=4),
+                'runners_advanced': _int(row, 'runners_advanced', line, default=0, maximum=3),
+                'pitches': _pitches(row, line),
+            })
+            at_bat = (at_bat_id, batter_id)
+            sequence = 0
+            tally(batter_id, aggregation.result_deltas(result, rbis))
+            for name, value in aggregation.line_score_deltas(result).items():
+                line_score[name] += value
+        elif event == 'inning':
+            runs.append({'inning_id': inning_id,
+                         'team_runs': _int(row, 'team_runs', line, default=0),
+                         'opponent_runs': _int(row, 'opponent_runs', line, default=0)})
+        elif at_bat is None:
+            raise ScorebookError(line, f'{event} row before any at_bat row in this game')
+        elif event == 'out':
+            sequence += 1
+            player = _text(row, 'player', line, required=False)
+            player_id = index.resolve(player, line) if player else at_bat[1]
+            out_type = _text(row, 'out_type', line, OUT_TYPE_LENGTH)
+            buffers[Out].append({
+                'id': new_id(Out), 'at_bat_id': at_bat[0], 'player_id': player_id, 'out_type': out_type,
+                'base': _int(row, 'base', line, minimum=1, maximum=4, required=False),
+                'fielder_id': _int(row, 'fielder_id', line, minimum=1, required=False),
+                'timestamp': date, 'sequence': sequence,
+            })
+            tally(player_id, aggregation.out_type_deltas(out_type))
+        else:
+            sequence += 1
+            player_id = index.resolve(_text(row, 'player', line), line)
+            success = _bool(row, 'success', line)
+            buffers[Steal].append({
+                'id': new_id(Steal), 'at_bat_id': at_bat[0], 'player_id': player_id,
+                'from_base': _int(row, 'from_base', line, minimum=1, maximum=3),
+                'to_base': _int(row, 'to_base', line, minimum=2, maximum=4),
+                'success': success,
+                'timestamp': date, 'sequence': sequence,
+            })
+            tally(player_id, aggregation.steal_result_deltas(success))
+
+    writer = ChunkedWriter((Game, Inning, AtBat, Out, Steal, GameStats), chunk_size=chunk_size)
+    if new_game:
+        game_id = next_id(Game)
+        writer.add(Game, {'id': game_id, 'date': date, 'opponent': opponent, 'team_id': team_id})
+    first_ids = {model: next_id(model) for model in (*LOCAL_KEYS, GameStats)}
+    for model, keys in LOCAL_KEYS.items():
+        for row in buffers[model]:
+            for name, target in keys.items():
+                row[name] += first_ids[target]
+            if model is Inning:
+                row['game_id'] = game_id
+            writer.add(model, row)
+    for row in runs:
+        row['inning_id'] += first_ids[Inning]
+    if new_game:
+        for offset, (player_id, values) in enumerate(stats.items()):
+            writer.add(GameStats, {'id': first_ids[GameStats] + offset, 'game_id': game_id,
+                                   'player_id': player_id, 'runs': 0, **values})
+            leaderboards.stage(game_id, player_id, values)
+
+    writer.flush()
+    if runs:
+        table = Inning.__table__
+        db.session.connection().execute(
+            update(table).where(table.c.id == bindparam('inning_id'))
+            .values(team_runs=bindparam('team_runs'), opponent_runs=bindparam('opponent_runs')),
+            runs,
+        )
+    # A repeated inning row overrides the earlier one, as in the UPDATE above
+    for name in ('team_runs', 'opponent_runs'):
+        line_score[name] = sum(row[name] for row in {row['inning_id']: row for row in runs}.values())
+    db.session.execute(update(Game).where(Game.id == game_id).values(**line_score))
+    if not new_game:
+        # A scheduled game may already have hand-entered stat rows
+        aggregation.rebuild_game_stats(game_id)
+    return dict(writer.counts, rows=rows, game_id=game_id)
+
+def import_scorebook(source: Union[str, os.PathLike, TextIO], team_id: int, fmt: Optional[str] = None,
+                     chunk_size: int = 5000) -> ImportReport:
+    """Stream a scorebook file into one team's games.
+
+    Each game is written with chunked executemany batches and committed as
+    its own transaction, so a bad row rolls back only the game it is in
+    (games before it stay imported) and memory is bounded by the largest
+    game however large the file is. Ids are reserved only once a game has
+    been read, so other writers wait on them just while it is written.
+    Rows of a game must be contiguous. GameStats are tallied while
+    importing, or recounted when the game already existed.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        if fmt is None:
+            fmt = FORMATS.get(os.path.splitext(os.fspath(source))[1].lower())
+        with open(source, newline='') as f:
+            return import_scorebook(f, team_id, fmt, chunk_size)
+    if fmt not in READERS:
+        raise ValueError(f"Unknown scorebook format {fmt!r}; use one of {', '.join(READERS)}")
+
+    start = time.perf_counter()
+    index = PlayerIndex(team_id)
+    totals = dict.fromkeys(('game', 'inning', 'at_bat', 'out', 'steal'), 0)
+    rows = 0
+    seen = set()
+
+    keyed = ((line, _game_key(row, line), row) for line, row in READERS[fmt](source))
+    for key, group in groupby(keyed, key=lambda item: item[1]):
+        events = ((line, row) for line, _, row in group)
+        if key in seen:
+            raise ScorebookError(next(events)[0], f'rows for the game on {key[0]:%Y-%m-%d} against '
+                                                  f'{key[1]} are not contiguous')
+        seen.add(key)
+        try:
+            counts = _import_game(team_id, key, events, index, chunk_size)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        # The schedule changed under the cache, and the game under its feed
+        crud.invalidate_team_cache(team_id)
+        crud.invalidate_game_feed(counts['game_id'])
+        totals['game'] += 1
+        for table in ('inning', 'at_bat', 'out', 'steal'):
+            totals[table] += counts[table]
+        rows += counts['rows']
+
+    return ImportReport(totals['game'], totals['inning'], totals['at_bat'], totals['out'], totals['steal'],
+                        rows, time.perf_counter() - start)
+
+@click.command('import-scorebook')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--team-id', type=int, required=True)
+@click.option('--format', 'fmt', type=click.Choice(list(READERS)), help='defaults to the file extension')
+@click.option('--chunk-size', default=5000, show_default=True)
+@with_appcontext
+def import_scorebook_command(path, team_id, fmt, chunk_size):
+    """Import a CSV or NDJSON scorebook for one team."""
+    try:
+        report = import_scorebook(path, team_id, fmt, chunk_size)
+    except ScorebookError as e:
+        raise click.ClickException(str(e))
+    click.echo(f'{report.games} games, {report.innings} innings, {report.at_bats} at-bats, '
+               f'{report.outs} outs, {report.steals} steals')
+    click.echo(f'{report.rows:,} rows in {report.seconds:.2f}s ({report.rows_per_second:,.0f} rows/s)')
@@ -0,0 +1,81 @@
+from app import db
+from app.models import Game, GameStats, COUNT_COLUMNS
+from sqlalchemy import select, func
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+# Loading
+def stats_query(team_id: Optional[int] = None, season: Optional[int] = None):
+    """SELECT player_id plus every counting column, scoped to a team and/or season."""
+    query = select(
+        GameStats.player_id,
+        *[func.coalesce(getattr(GameStats, name), 0) for name in COUNT_COLUMNS],
+    ).where(GameStats.player_id.isnot(None))
+    if team_id is not None or season is not None:
+        query = query.join(Game, GameStats.game_id == Game.id)
+    if team_id is not None:
+        query = query.where(Game.team_id == team_id)
+    if season is not None:
+        query = query.where(Game.date >= datetime(season, 1, 1), Game.date < datetime(season + 1, 1, 1))
+    return query
+
+def load_stat_rows(team_id: Optional[int] = None, season: Optional[int] = None) -> np.ndarray:
+    """Fetch the scoped GameStats rows in one query as an (n, 1 + columns) int64 array."""
+    # Read plain tuples straight off the DBAPI cursor; converting SQLAlchemy
+    # Row objects costs several times more than the query itself.
+    result = db.session.connection().execute(stats_query(team_id, season))
+    try:
+        rows = result.cursor.fetchall()
+    finally:
+        result.close()
+    if not rows:
+        return np.empty((0, 1 + len(COUNT_COLUMNS)), dtype=np.int64)
+    return np.array(rows, dtype=np.int64)
+
+# Vectorized reductions
+def aggregate(rows: np.ndarray) -> Dict[str, np.ndarray]:
+    """Sum stat rows per player; returns player_id plus one array per column."""
+    player_ids, inverse = np.unique(rows[:, 0], return_inverse=True)
+    totals = {'player_id': player_ids}
+    for index, name in enumerate(COUNT_COLUMNS, start=1):
+        totals[name] = np.bincount(inverse, weights=rows[:, index],
+                                   minlength=len(player_ids)).astype(np.int64)
+    return totals
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    out = np.zeros(len(numerator), dtype=np.float64)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+def add_rates(totals: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Add AVG/OBP/SLG/OPS arrays to per-player totals.
+
+    GameStats does not track hit-by-pitch or sacrifice flies, so OBP is
+    (H + BB) / (AB + BB).
+    """
+    at_bats, hits, walks = totals['at_bats'], totals['hits'], totals['walks']
+    total_bases = hits + totals['doubles'] + 2 * totals['triples'] + 3 * totals['home_runs']
+    totals['avg'] = _ratio(hits, at_bats)
+    totals['obp'] = _ratio(hits + walks, at_bats + walks)
+    totals['slg'] = _ratio(total_bases, at_bats)
+    totals['ops'] = totals['obp'] + totals['slg']
+    return totals
+
+def player_stats(team_id: Optional[int] = None, season: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Per-player totals and rate stats for a team, a season, or the whole league."""
+    return add_rates(aggregate(load_stat_rows(team_id, season)))
+
+def rank(totals: Dict[str, np.ndarray], stat: str, limit: int = 10,
+         min_at_bats: int = 0) -> List[Tuple[int, float]]:
+    """Top players by one stat column; ties break on player id."""
+    values = totals[stat]
+    candidates = np.flatnonzero(totals['at_bats'] >= min_at_bats)
+    order = np.lexsort((totals['player_id'][candidates], -values[candidates]))[:limit]
+    picked = candidates[order]
+    return [(int(player_id), value.item())
+            for player_id, value in zip(totals['player_id'][picked], values[picked])]
+
+def leaders(stat: str, limit: int = 10, min_at_bats: int = 0, team_id: Optional[int] = None,
+            season: Optional[int] = None) -> List[Tuple[int, float]]:
+    return rank(player_stats(team_id, season), stat, limit, min_at_bats)
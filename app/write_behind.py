@@ -0,0 +1,283 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select, update, bindparam
+from sqlalchemy.exc import IntegrityError, DataError
+
+from app import db, crud
+from app.models import AtBat, Inning, WriteBehindCheckpoint
+
+# Write-behind queue for pitch-by-pitch scoring. Count changes, outs and
+# steals are acknowledged as soon as they are queued (and, in durable mode,
+# journaled), and a background thread writes them in batches: when
+# max_batch operations are waiting, when the oldest has waited max_delay
+# seconds, or when flush() is called.
+#
+# Within a batch, count updates for the same at-bat collapse to the last
+# one and are written with a single executemany UPDATE. Outs and steals go
+# through crud, so GameStats stay in step.
+#
+# Durable mode appends every operation to a JSON-lines journal and fsyncs
+# it before acknowledging. Each batch also records its last sequence number
+# in write_behind_checkpoint, in the same transaction as its rows, and a
+# "done" marker is journaled once it commits. On start-up, operations past
+# both the last marker and the checkpoint are queued again. A crash between
+# a commit and its marker therefore replays nothing: outs and steals are
+# written exactly once.
+
+KINDS = ('count', 'out', 'steal')
+
+class Operation(NamedTuple):
+    seq: int
+    kind: str
+    args: Tuple
+
+class WriteBehindQueue:
+    """Buffers scoring writes and applies them on a worker thread.
+
+    WRITE_BEHIND_MAX_BATCH, WRITE_BEHIND_MAX_DELAY and WRITE_BEHIND_JOURNAL
+    in the app config provide the defaults; setting a journal path turns on
+    durable mode.
+    """
+
+    def __init__(self, app, max_batch: Optional[int] = None, max_delay: Optional[float] = None,
+                 journal_path: Optional[str] = None, retry_delay: float = 1.0):
+        self.app = app
+        self.max_batch = max_batch or app.config.get('WRITE_BEHIND_MAX_BATCH', 500)
+        if max_delay is None:
+            max_delay = app.config.get('WRITE_BEHIND_MAX_DELAY', 0.25)
+        self.max_delay = max_delay
+        self.journal_path = journal_path or app.config.get('WRITE_BEHIND_JOURNAL')
+        self.retry_delay = retry_delay
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._committed_cond = threading.Condition(self._lock)
+        self._pending: List[Operation] = []
+        self._oldest: Optional[float] = None
+        self._sequence = 0
+        self._committed = 0
+        self._flush_requested = False
+        self._stopping = False
+        self._journal = None
+        # Operations the database rejected, with the error
+        self.failed: List[Tuple[Operation, str]] = []
+        self.last_error: Optional[str] = None
+        self.counters = {'submitted': 0, 'written': 0, 'coalesced': 0, 'batches': 0, 'retries': 0}
+        if self.journal_path:
+            self._recover()
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+
+    # Submitting
+    def submit(self, kind: str, *args) -> int:
+        """Queue one operation and return its sequence number; durable once this returns."""
+        if kind not in KINDS:
+            raise ValueError(f'Unknown operation {kind!r}')
+        with self._lock:
+            if self._stopping:
+                raise RuntimeError('write-behind queue is closed')
+            self._sequence += 1
+            operation = Operation(self._sequence, kind, tuple(args))
+            if self._journal is not None:
+                self._journal_write({'seq': operation.seq, 'kind': kind, 'args': list(args)})
+            self._pending.append(operation)
+            self.counters['submitted'] += 1
+            if self._oldest is None:
+                # Start the worker's max_delay clock
+                self._oldest = time.monotonic()
+                self._wake.notify()
+            elif len(self._pending) >= self.max_batch:
+                self._wake.notify()
+            return operation.seq
+
+    def count(self, at_bat_id: int, balls: int, strikes: int) -> int:
+        return self.submit('count', at_bat_id, balls, strikes)
+
+    def out(self, at_bat_id: int, player_id: int, out_type: str, base: Optional[int] = None,
+            fielder_id: Optional[int] = None) -> int:
+        return self.submit('out', at_bat_id, player_id, out_type, base, fielder_id)
+
+    def steal(self, at_bat_id: int, player_id: int, from_base: int, to_base: int, success: bool) -> int:
+        return self.submit('steal', at_bat_id, player_id, from_base, to_base, success)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Write everything queued so far; False if that took longer than timeout."""
+        with self._lock:
+            target = self._sequence
+            self._flush_requested = True
+            self._wake.notify()
+            return self._committed_cond.wait_for(lambda: self._committed >= target, timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Write what is queued, then stop the worker and close the journal."""
+        with self._lock:
+            self._stopping = True
+            self._wake.notify()
+        self._thread.join(timeout)
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.counters, pending=len(self._pending), failed=len(self.failed),
+                        durable=self._journal is not None, last_error=self.last_error)
+
+    # Worker
+    def _due(self) -> bool:
+        if not self._pending:
+            return False
+        return (self._stopping or self._flush_requested or len(self._pending) >= self.max_batch
+                or time.monotonic() - self._oldest >= self.max_delay)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while not self._due():
+                    if self._stopping:
+                        return
+                    timeout = None if self._oldest is None else \
+                        max(0.0, self._oldest + self.max_delay - time.monotonic())
+                    self._wake.wait(timeout)
+                batch = self._pending[:self.max_batch]
+            try:
+                try:
+                    self._write(batch)
+                except (IntegrityError, DataError):
+                    self._write_each(batch)
+                    continue
+            except Exception as error:
+                # Database unreachable and the like: keep the batch and retry
+                with self._lock:
+                    self.last_error = repr(error)
+                    self.counters['retries'] += 1
+                time.sleep(self.retry_delay)
+                continue
+            self._committed_through(batch)
+
+    def _write_each(self, batch: List[Operation]) -> None:
+        # A bad row: write one operation at a time so only the rejected
+        # ones are set aside
+        for operation in batch:
+            try:
+                self._write([operation])
+            except (IntegrityError, DataError) as error:
+                with self._lock:
+                    self.failed.append((operation, str(error.orig)))
+            self._committed_through([operation])
+
+    def _write(self, batch: List[Operation]) -> None:
+        counts: Dict[int, Dict[str, int]] = {}
+        with self.app.app_context():
+            with crud.unit_of_work():
+                for operation in batch:
+                    if operation.kind == 'count':
+                        at_bat_id, balls, strikes = operation.args
+                        counts[at_bat_id] = {'at_bat_id': at_bat_id, 'balls': balls, 'strikes': strikes}
+                    elif operation.kind == 'out':
+                        crud.create_out(*operation.args)
+                    else:
+                        crud.create_steal(*operation.args)
+                if counts:
+                    table = AtBat.__table__
+                    db.session.connection().execute(
+                        update(table).where(table.c.id == bindparam('at_bat_id'))
+                        .values(balls=bindparam('balls'), strikes=bindparam('strikes')),
+                        list(counts.values()),
+                    )
+                    # Outs and steals go through crud, which refreshes the
+                    # live feeds; counts bypass it
+                    game_ids = db.session.execute(
+                        select(Inning.game_id).join(AtBat, AtBat.inning_id == Inning.id)
+                        .where(AtBat.id.in_(counts)).distinct()
+                    ).scalars()
+                    for game_id in game_ids:
+                        crud.invalidate_game_feed(game_id)
+                if self.journal_path:
+                    db.session.execute(
+                        update(WriteBehindCheckpoint)
+                        .where(WriteBehindCheckpoint.journal == self._checkpoint_key)
+                        .values(sequence=batch[-1].seq)
+                    )
+        with self._lock:
+            self.counters['coalesced'] += sum(1 for operation in batch if operation.kind == 'count') - len(counts)
+
+    def _committed_through(self, batch: List[Operation]) -> None:
+        with self._lock:
+            del self._pending[:len(batch)]
+            self._committed = batch[-1].seq
+            self.counters['written'] += len(batch)
+            self.counters['batches'] += 1
+            self._oldest = time.monotonic() if self._pending else None
+            if not self._pending:
+                self._flush_requested = False
+            if self._journal is not None:
+                if self._pending:
+                    self._journal_write({'done': self._committed})
+                else:
+                    # Nothing left to replay: start the journal afresh
+                    self._journal.seek(0)
+                    self._journal.truncate()
+                    self._sync()
+            self._committed_cond.notify_all()
+
+    # Journal
+    def _journal_write(self, record: Dict[str, Any]) -> None:
+        self._journal.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self._sync()
+
+    def _sync(self) -> None:
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    @property
+    def _checkpoint_key(self) -> str:
+        return os.path.abspath(self.journal_path)
+
+    def _checkpoint(self) -> int:
+        # The last sequence committed to the database, created at 0 for a new journal
+        with self.app.app_context():
+            checkpoint = db.session.get(WriteBehindCheckpoint, self._checkpoint_key)
+            if checkpoint is None:
+                db.session.add(WriteBehindCheckpoint(journal=self._checkpoint_key, sequence=0))
+                db.session.commit()
+                return 0
+            return checkpoint.sequence
+
+    def _recover(self) -> None:
+        operations: List[Operation] = []
+        # The journal is truncated whenever the queue drains, so sequence
+        # numbers carry on from the checkpoint
+        done = self._checkpoint()
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A torn last line from a crash mid-write was never acknowledged
+                        break
+                    if 'done' in record:
+                        done = max(done, record['done'])
+                    else:
+                        operations.append(Operation(record['seq'], record['kind'], tuple(record['args'])))
+        self._pending = [operation for operation in operations if operation.seq > done]
+        self._sequence = max([done] + [operation.seq for operation in operations])
+        self._committed = done
+        if self._pending:
+            self._oldest = time.monotonic()
+            self._flush_requested = True
+        # Rewrite the journal with just the operations still owed
+        self._journal = open(self.journal_path, 'w')
+        if self._pending:
+            self._journal.write(json.dumps({'done': done}) + '\n')
+            for operation in self._pending:
+                self._journal.write(json.dumps({'seq': operation.seq, 'kind': operation.kind,
+                                                'args': list(operation.args)}, separators=(',', ':')) + '\n')
+        self._sync()
@@ -0,0 +1,66 @@
+"""Row-at-a-time roster/lineup setup vs. the bulk crud endpoints.
+
+Simulates a tournament day of pregame setup: every game gets a fresh
+12-player roster and a lineup that is then reordered once.
+
+Run with ``python -m benchmarks.bench_bulk_setup``.
+"""
+import argparse
+import itertools
+from datetime import datetime
+
+from app import db
+from app.crud import (
+    create_user, create_team, create_player, bulk_create_players, get_players_by_team,
+    create_game, create_batting_order, update_batting_order, set_batting_order,
+)
+from benchmarks.common import make_app, measure, report
+
+ROSTER_SIZE = 12
+
+_counter = itertools.count()
+
+
+def setup_row_at_a_time(user_id: int, games: int) -> None:
+    for _ in range(games):
+        team = create_team(f'Team {next(_counter)}', user_id)
+        players = [create_player(f'Player {i}', team.id, i) for i in range(ROSTER_SIZE)]
+        game = create_game(datetime.utcnow(), 'Opponent Team', team.id)
+        orders = [create_batting_order(game.id, p.id, n) for n, p in enumerate(players, start=1)]
+        # Shift past the current numbers so single-row updates never collide
+        # with the (game_id, order_number) unique constraint
+        for batting_order in orders:
+            update_batting_order(batting_order.id, 2 * ROSTER_SIZE + 1 - batting_order.order_number)
+
+
+def setup_bulk(user_id: int, games: int) -> None:
+    for _ in range(games):
+        team = create_team(f'Team {next(_counter)}', user_id)
+        bulk_create_players(team.id, [{'name': f'Player {i}', 'number': i} for i in range(ROSTER_SIZE)])
+        player_ids = [p.id for p in get_players_by_team(team.id)]
+        game = create_game(datetime.utcnow(), 'Opponent Team', team.id)
+        set_batting_order(game.id, player_ids)
+        set_batting_order(game.id, list(reversed(player_ids)))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--database-uri', help='defaults to a scratch SQLite file')
+    parser.add_argument('--games', type=int, default=40)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    app = make_app(args.database_uri)
+    with app.app_context():
+        user = create_user('bench', 'bench@example.com', 'password')
+        row_at_a_time = measure(lambda: setup_row_at_a_time(user.id, args.games), repeat=args.repeat)
+        bulk = measure(lambda: setup_bulk(user.id, args.games), repeat=args.repeat)
+        db.session.remove()
+
+    report(f'row-at-a-time ({args.games} games)', row_at_a_time)
+    report(f'bulk endpoints ({args.games} games)', bulk)
+    print(f"speedup: {row_at_a_time['median'] / bulk['median']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Team/roster/schedule page reads with and without the read-through cache.
+
+Run with ``python -m benchmarks.bench_cache``.
+"""
+import argparse
+from datetime import datetime, timedelta
+
+from app import db, cache
+from app.cache import LRUCache, NullCache
+from app.crud import (
+    create_user, create_team, bulk_create_players, create_game, unit_of_work,
+    get_team_by_id, get_players_by_team, get_games_by_team,
+)
+from benchmarks.common import make_app, measure, report
+
+
+def page_reads(team_ids, reads):
+    for i in range(reads):
+        team_id = team_ids[i % len(team_ids)]
+        get_team_by_id(team_id)
+        get_players_by_team(team_id)
+        get_games_by_team(team_id)
+        # A new request starts with an empty session
+        db.session.remove()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--database-uri', help='defaults to a scratch SQLite file')
+    parser.add_argument('--teams', type=int, default=20)
+    parser.add_argument('--reads', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    app = make_app(args.database_uri)
+    with app.app_context():
+        user = create_user('bench', 'bench@example.com', 'password')
+        team_ids = []
+        with unit_of_work():
+            for t in range(args.teams):
+                team = create_team(f'Team {t}', user.id)
+                bulk_create_players(team.id, [{'name': f'Player {i}', 'number': i} for i in range(15)])
+                for g in range(30):
+                    create_game(datetime(2025, 4, 1) + timedelta(days=g), 'Opponent', team.id)
+                team_ids.append(team.id)
+
+        cache.backend = NullCache()
+        uncached = measure(lambda: page_reads(team_ids, args.reads), repeat=args.repeat)
+        cache.backend = LRUCache(maxsize=4096, default_ttl=300)
+        cached = measure(lambda: page_reads(team_ids, args.reads), repeat=args.repeat)
+        stats = cache.stats()
+
+    report(f'no cache ({args.reads} page reads)', uncached)
+    report(f'LRU cache ({args.reads} page reads)', cached)
+    print(f"hit rate {stats['hit_rate']:.1%}, speedup: {uncached['median'] / cached['median']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
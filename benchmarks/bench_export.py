@@ -0,0 +1,79 @@
+"""Streaming play-by-play export vs. materializing the whole result.
+
+Generates a league of about --rows at-bats, exports it with app.export to
+CSV and NDJSON files, then does the same with a plain .all() query. Peak
+RSS growth is reported after each step; streaming should add only a few
+MiB however large --rows is, while .all() grows with the season.
+
+Run with ``python -m benchmarks.bench_export`` (5M rows; populating takes
+a few minutes) or pass a smaller --rows.
+"""
+import argparse
+import csv
+import os
+import resource
+import tempfile
+import time
+
+from app import db
+from app.export import EXPORT_COLUMNS, play_by_play_query, write_export
+from app.generator import generate_league
+from benchmarks.common import make_app
+
+TEAMS = 40
+AT_BATS_PER_GAME = 36
+
+
+def peak_rss_mib() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def streamed_export(path: str, fmt: str) -> int:
+    with open(path, 'w', newline='') as f:
+        return write_export(f, fmt)
+
+
+def materialized_export(path: str) -> int:
+    rows = db.session.execute(play_by_play_query()).all()
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(EXPORT_COLUMNS)
+        writer.writerows(rows)
+    return len(rows)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--database-uri', help='defaults to a scratch SQLite file')
+    parser.add_argument('--rows', type=int, default=5_000_000)
+    parser.add_argument('--skip-materialized', action='store_true')
+    args = parser.parse_args(argv)
+
+    app = make_app(args.database_uri)
+    with app.app_context():
+        start = time.perf_counter()
+        games_per_team = max(1, round(args.rows / (TEAMS * AT_BATS_PER_GAME)))
+        counts = generate_league(teams=TEAMS, games_per_team=games_per_team)
+        db.session.remove()
+        print(f"populated {counts['at_bat']:,} at-bats in {time.perf_counter() - start:.1f}s")
+
+        fd, path = tempfile.mkstemp(prefix='softball-export-')
+        os.close(fd)
+        baseline = peak_rss_mib()
+        steps = [('stream csv', lambda: streamed_export(path, 'csv')),
+                 ('stream ndjson', lambda: streamed_export(path, 'ndjson'))]
+        if not args.skip_materialized:
+            steps.append(('.all() + csv', lambda: materialized_export(path)))
+        for name, export in steps:
+            start = time.perf_counter()
+            written = export()
+            elapsed = time.perf_counter() - start
+            db.session.remove()
+            print(f'{name:<15} {written:>11,} rows  {elapsed:7.1f}s  {written / elapsed:>10,.0f} rows/s  '
+                  f'{os.path.getsize(path) / 2**20:8.1f} MiB file  '
+                  f'peak RSS +{peak_rss_mib() - baseline:7.1f} MiB')
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
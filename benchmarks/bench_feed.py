@@ -0,0 +1,99 @@
+"""Live feed load test: database reads as viewers per game grow.
+
+Opens --viewers Server-Sent Events streams on one game through the Flask
+test client, records --plays plate appearances with GameState (flushing
+after each), and reads every frame back on every stream. Statements issued
+on behalf of viewers are counted separately from the scorekeeper's writes:
+with the broker they stay at one box score load however many viewers
+connect, where polling the box score after each play would cost
+viewers x plays loads.
+
+Run with ``python -m benchmarks.bench_feed --viewers 10,100,1000,5000``.
+"""
+import argparse
+import random
+import time
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app import db, broker
+from app.box_score import load_box_score
+from app.crud import create_user, create_team, create_player, create_game, set_batting_order
+from app.game_state import GameState
+from benchmarks.common import make_app
+
+RESULTS = ('single', 'double', 'walk', 'strikeout', 'groundout', 'flyout')
+
+
+def box_score_statements(statements, game_id: int) -> int:
+    del statements[:]
+    load_box_score(game_id)
+    return len(statements)
+
+
+def run_viewers(app, statements, game_id: int, viewers: int, plays: int, seed: int):
+    rng = random.Random(seed)
+    client = app.test_client()
+    broker.init_app(app)
+    del statements[:]
+
+    responses = [client.get(f'/games/{game_id}/feed', buffered=False) for _ in range(viewers)]
+    streams = [iter(response.response) for response in responses]
+    for stream in streams:
+        next(stream)
+        next(stream)
+    connecting = len(statements)
+
+    state = GameState.restore(game_id)
+    flush_seconds = 0.0
+    for _ in range(plays):
+        if not state.team_batting:
+            state.end_half()
+        state.at_bat(rng.choice(RESULTS))
+        start = time.perf_counter()
+        state.flush()
+        flush_seconds += time.perf_counter() - start
+    del statements[connecting:]
+
+    frames = 0
+    for stream in streams:
+        for _ in range(2 * plays):
+            next(stream)
+            frames += 1
+    for response in responses:
+        response.close()
+    return len(statements), frames, flush_seconds / plays
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--database-uri', help='defaults to a scratch SQLite file')
+    parser.add_argument('--viewers', default='10,100,1000,5000')
+    parser.add_argument('--plays', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    app = make_app(args.database_uri)
+    with app.app_context():
+        user = create_user('bench', 'bench@example.com', 'password')
+        team = create_team('Bench Team', user.id)
+        lineup = [create_player(f'Player {n}', team.id, n).id for n in range(1, 11)]
+        game_id = create_game(datetime(2025, 6, 1, 18), 'Rivals', team.id).id
+        set_batting_order(game_id, lineup)
+
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(a[2]))
+        per_poll = box_score_statements(statements, game_id)
+
+        print(f"{'viewers':>8} {'feed reads':>11} {'polling reads':>14} {'frames':>10} "
+              f"{'flush+fan-out':>14} {'per viewer':>11}")
+        for viewers in [int(value) for value in args.viewers.split(',')]:
+            reads, frames, flush = run_viewers(app, statements, game_id, viewers, args.plays, args.seed)
+            print(f'{viewers:>8,} {reads:>11,} {viewers * args.plays * per_poll:>14,} {frames:>10,} '
+                  f'{flush * 1e3:>11.2f} ms {flush / viewers * 1e6:>8.2f} us')
+            db.session.remove()
+
+
+if __name__ == '__main__':
+    main()
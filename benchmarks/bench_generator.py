@@ -0,0 +1,42 @@
+"""Load rate of the synthetic league generator.
+
+Generates one league into a scratch database and reports rows per second.
+At the defaults (16 teams x 60 games) that is roughly 50k at-bats; scale
+--teams/--games-per-team up to size a 10M at-bat load.
+
+Run with ``python -m benchmarks.bench_generator``.
+"""
+import argparse
+import time
+
+from app import db
+from app.generator import generate_league
+from benchmarks.common import make_app
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--database-uri', help='defaults to a scratch SQLite file')
+    parser.add_argument('--teams', type=int, default=16)
+    parser.add_argument('--games-per-team', type=int, default=60)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    app = make_app(args.database_uri)
+    with app.app_context():
+        start = time.perf_counter()
+        counts = generate_league(teams=args.teams, games_per_team=args.games_per_team,
+                                 seed=args.seed, chunk_size=args.chunk_size)
+        elapsed = time.perf_counter() - start
+        db.session.remove()
+
+    total = sum(counts.values())
+    for table, count in counts.items():
+        print(f'{table:<15} {count:>12,}')
+    print(f"{total:,} rows in {elapsed:.2f}s: {total / elapsed:,.0f} rows/s, "
+          f"{counts['at_bat'] / elapsed:,.0f} at-bats/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Scorebook import throughput and memory, against crud one event at a time.
+
+Writes synthetic CSV scorebooks of --rows and 4x --rows events and imports
+both with app.scorebook to report rows/s, then imports --memory-rows and 4x
+--memory-rows under tracemalloc to show that peak memory does not grow with
+the file. A slice of the events is also entered through crud's per-row
+commits for comparison.
+
+Run with ``python -m benchmarks.bench_import --rows 200000``.
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from app import db
+from app.crud import create_user, create_team, bulk_create_players, get_players_by_team, \
+    create_game, create_inning, create_at_bat, create_out
+from app.scorebook import import_scorebook
+from benchmarks.common import make_app
+
+COLUMNS = ('event', 'date', 'opponent', 'inning', 'batter', 'result', 'rbis', 'balls', 'strikes',
+           'player', 'out_type')
+RESULTS = ('single', 'double', 'walk', 'strikeout', 'groundout', 'flyout')
+ROSTER_SIZE = 12
+EVENTS_PER_GAME = 80
+
+
+def write_scorebook(path: str, rows: int, start: datetime, seed: int = 1) -> None:
+    rng = random.Random(seed)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        written = 0
+        game = 0
+        while written < rows:
+            date = (start + timedelta(hours=game)).isoformat()
+            for n in range(EVENTS_PER_GAME // 2):
+                result = rng.choice(RESULTS)
+                inning = 1 + n // 6
+                writer.writerow(('at_bat', date, 'Opponent', inning, f'#{n % ROSTER_SIZE + 1}', result,
+                                 rng.randint(0, 1), rng.randint(0, 3), rng.randint(0, 2), '', ''))
+                writer.writerow(('out', date, 'Opponent', inning, '', '', '', '', '', '',
+                                 'strikeout' if result == 'strikeout' else 'groundout'))
+            written += EVENTS_PER_GAME
+            game += 1
+
+
+def traced_import(path: str, team_id: int) -> int:
+    tracemalloc.start()
+    import_scorebook(path, team_id)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def crud_rows(team_id: int, player_ids, rows: int) -> float:
+    rng = random.Random(2)
+    start = time.perf_counter()
+    game = create_game(datetime(2030, 1, 1), 'Opponent', team_id)
+    inning = create_inning(game.id, 1)
+    for n in range(rows // 2):
+        at_bat = create_at_bat(inning.id, player_ids[n % len(player_ids)], rng.choice(RESULTS))
+        create_out(at_bat.id, at_bat.batter_id, 'groundout')
+    return time.perf_counter() - start
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--database-uri', help='defaults to a scratch SQLite file')
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--memory-rows', type=int, default=10000)
+    parser.add_argument('--crud-rows', type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    app = make_app(args.database_uri)
+    directory = tempfile.mkdtemp(prefix='softball-scorebook-')
+    with app.app_context():
+        user = create_user('bench', 'bench@example.com', 'password')
+        team = create_team('Bench Team', user.id)
+        bulk_create_players(team.id, [{'name': f'Player {n}', 'number': n} for n in range(1, ROSTER_SIZE + 1)])
+        player_ids = [player.id for player in get_players_by_team(team.id)]
+
+        path = os.path.join(directory, 'scorebook.csv')
+        years = iter(range(2025, 2100))
+        for rows in (args.rows, 4 * args.rows):
+            write_scorebook(path, rows, datetime(next(years), 1, 1))
+            report = import_scorebook(path, team.id)
+            print(f'import {report.rows:>9,} rows: {report.seconds:7.2f}s  '
+                  f'{report.rows_per_second:>10,.0f} rows/s')
+        for rows in (args.memory_rows, 4 * args.memory_rows):
+            write_scorebook(path, rows, datetime(next(years), 1, 1))
+            print(f'import {rows:>9,} rows: peak traced memory {traced_import(path, team.id) / 2**20:6.2f} MiB')
+        os.remove(path)
+
+        elapsed = crud_rows(team.id, player_ids, args.crud_rows)
+        print(f'crud   {args.crud_rows:>9,} rows: {elapsed:7.2f}s  {args.crud_rows / elapsed:>10,.0f} rows/s')
+        db.session.remove()
+    os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""League leader lists: a full GROUP BY per view vs the incremental boards.
+
+Generates a league with --teams teams, then times one view of the hits,
+stolen bases and AVG leaders three ways: app.stats.leaders (a GROUP BY over
+GameStats), a cold leaderboards read (which loads the board), and a warm
+read. Finally records --at-bats at-bats through crud with the boards loaded
+and without, to show what keeping them current costs per write.
+
+Run with ``python -m benchmarks.bench_leaderboard``.
+"""
+import argparse
+import random
+
+from app import db
+from app.crud import create_inning, create_at_bat
+from app.generator import generate_league
+from app.leaderboard import leaderboards
+from app.models import Game, Player
+from app.stats import leaders
+from benchmarks.common import make_app, measure, report, time_calls, summarize
+
+SEASON = 2025
+VIEWS = (('hits', 0), ('stolen_bases', 0), ('avg', 30))
+
+
+def full_scan():
+    for stat, min_at_bats in VIEWS:
+        leaders(stat, limit=10, min_at_bats=min_at_bats, season=SEASON)
+
+
+def board_read():
+    for stat, min_at_bats in VIEWS:
+        leaderboards.leaders(stat, SEASON, limit=10, min_at_bats=min_at_bats)
+
+
+def record_at_bats(inning_id: int, player_ids, count: int, seed: int):
+    rng = random.Random(seed)
+    calls = [(inning_id, rng.choice(player_ids), rng.choice(('single', 'groundout', 'walk')))
+             for _ in range(count)]
+    return summarize(time_calls(create_at_bat, calls))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--database-uri', help='defaults to a scratch SQLite file')
+    parser.add_argument('--teams', type=int, default=40)
+    parser.add_argument('--games-per-team', type=int, default=40)
+    parser.add_argument('--at-bats', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    app = make_app(args.database_uri)
+    with app.app_context():
+        counts = generate_league(teams=args.teams, games_per_team=args.games_per_team)
+        leaderboards.min_at_bats = 30
+        print(f"{counts['game_stats']:,} GameStats rows, {counts['player']:,} players")
+
+        report('full GROUP BY per view', measure(full_scan, repeat=args.repeat))
+        report('board, cold (loads)', measure(board_read, repeat=args.repeat, warmup=0,
+                                              setup=leaderboards.invalidate))
+        report('board, warm', measure(board_read, repeat=args.repeat))
+
+        game = Game.query.order_by(Game.id).first()
+        inning_id = create_inning(game.id, 100).id
+        player_ids = [player.id for player in Player.query.filter_by(team_id=game.team_id)]
+        for name, loaded in (('boards not loaded', False), ('boards loaded', True)):
+            leaderboards.invalidate()
+            if loaded:
+                board_read()
+                leaderboards.leaders('hits')
+            result = record_at_bats(inning_id, player_ids, args.at_bats, seed=1)
+            print(f"create_at_bat, {name:<18} median {result['median'] * 1e6:8.1f} us   "
+                  f"p90 {result['p90'] * 1e6:8.1f} us")
+        db.session.remove()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Cost of one latency observation, and of rendering /metrics.
+
+Times --observations calls of Histogram.observe on one thread and spread
+over --threads threads, the same through HistogramFamily.labels() as a
+request does, and a lock-guarded histogram for comparison. Then times the
+instrument() wrapper crud functions get around a no-op, and one render of
+every metric.
+
+Run with ``python -m benchmarks.bench_metrics``.
+"""
+import argparse
+import threading
+import time
+from bisect import bisect_left
+
+from app.metrics import Histogram, HistogramFamily, LATENCY_BUCKETS, metrics, instrument
+from benchmarks.common import make_app, measure, report
+
+
+class LockedHistogram:
+    """The obvious alternative: one shared list behind a lock."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        with self.lock:
+            self.counts[bisect_left(self.bounds, value)] += 1
+            self.total += value
+
+
+def per_call_ns(fn, count: int, threads: int = 1) -> float:
+    """Wall time per call of fn(value), with count calls split over threads."""
+    values = [(n % 1000) * 1e-5 for n in range(count // threads)]
+
+    def work():
+        for value in values:
+            fn(value)
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - start) / (len(values) * threads) * 1e9
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--observations', type=int, default=1_000_000)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args(argv)
+
+    family = HistogramFamily('bench_seconds', 'Benchmark latency.', ('endpoint', 'method'))
+    loop = per_call_ns(lambda value: None, args.observations)
+    ways = (
+        ('Histogram.observe', Histogram().observe),
+        ('labels().observe', lambda value: family.labels('games.feed', 'GET').observe(value)),
+        ('locked histogram', LockedHistogram(LATENCY_BUCKETS).observe),
+    )
+    print(f'{args.observations:,} observations; an empty call costs {loop:.0f} ns and is subtracted')
+    print(f"{'':<20} {'1 thread':>10} {f'{args.threads} threads':>11}   (ns per observation)")
+    for name, observe in ways:
+        single = per_call_ns(observe, args.observations) - loop
+        spread = per_call_ns(observe, args.observations, args.threads) - loop
+        print(f'{name:<20} {single:10.0f} {spread:11.0f}')
+
+    def noop(value):
+        return value
+
+    wrapped = instrument(noop, Histogram())
+    added = per_call_ns(wrapped, args.observations) - per_call_ns(noop, args.observations)
+    print(f'instrument() around a no-op adds {added:.0f} ns')
+
+    app = make_app()
+    with app.app_context():
+        report('render /metrics', measure(metrics.render, repeat=20))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Paging through a long schedule: OFFSET vs keyset pages.
+
+Inserts --games games for one team, then times fetching one page of
+--page-size games at several depths three ways: LIMIT/OFFSET loading ORM
+instances, crud.page_games_by_team seeking from a cursor, and the same
+keyset page projected to (date, opponent, score) rows. OFFSET grows with
+the depth; the keyset pages should not.
+
+Run with ``python -m benchmarks.bench_pagination``.
+"""
+import argparse
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+
+from app import db
+from app.crud import create_user, create_team, page_games_by_team
+from app.models import Game
+from benchmarks.common import make_app, measure
+
+COLUMNS = ['opponent', 'team_runs', 'opponent_runs']
+
+
+def insert_games(team_id: int, count: int) -> None:
+    start = datetime(2000, 1, 1)
+    db.session.execute(insert(Game), [
+        {'date': start + timedelta(hours=6 * n), 'opponent': f'Opponent {n % 50}', 'team_id': team_id}
+        for n in range(count)
+    ])
+    db.session.commit()
+
+
+def offset_page(team_id: int, depth: int, size: int):
+    return (Game.query.filter_by(team_id=team_id).order_by(Game.date, Game.id)
+            .offset(depth).limit(size).all())
+
+
+def cursor_at(team_id: int, depth: int):
+    """The cursor a client holds after paging past depth games."""
+    if depth == 0:
+        return None
+    return tuple(db.session.execute(
+        select(Game.date, Game.id).where(Game.team_id == team_id).order_by(Game.date, Game.id)
+        .offset(depth - 1).limit(1)
+    ).one())
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--database-uri', help='defaults to a scratch SQLite file')
+    parser.add_argument('--games', type=int, default=100_000)
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    app = make_app(args.database_uri)
+    with app.app_context():
+        user = create_user('pager', 'pager@example.com', 'password')
+        team_id = create_team('Long Season', user.id).id
+        insert_games(team_id, args.games)
+        print(f'{args.games:,} games, {args.page_size} per page')
+        print(f"{'depth':>10} {'OFFSET':>12} {'keyset':>12} {'keyset rows':>12}   (median ms)")
+
+        depths = sorted({0, args.games // 100, args.games // 10, args.games // 2,
+                         args.games - args.page_size})
+        for depth in depths:
+            after = cursor_at(team_id, depth)
+            ways = (
+                lambda: offset_page(team_id, depth, args.page_size),
+                lambda: page_games_by_team(team_id, after, args.page_size),
+                lambda: page_games_by_team(team_id, after, args.page_size, columns=COLUMNS),
+            )
+            # Drop loaded instances so every call hydrates its page afresh
+            medians = [measure(way, repeat=args.repeat, setup=db.session.remove)['median'] for way in ways]
+            print(f'{depth:>10,} ' + ' '.join(f'{median * 1000:12.3f}' for median in medians))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Pitch sequences: packed AtBat.pitches vs a row per pitch, and decode speed.
+
+Generates a league with --teams teams (every at-bat gets a pitch sequence),
+then copies the sequences into a scratch pitch table with one row per
+pitch (id, at_bat_id, number, code) and reports the pages each layout
+takes. Then times a season's first-pitch strike rate three ways: SQL over
+the row-per-pitch table, a Python loop over decode_pitches, and the numpy
+pitch_matrix path.
+
+Run with ``python -m benchmarks.bench_pitches``.
+"""
+import argparse
+
+from sqlalchemy import text
+
+from app import db
+from app.generator import generate_league
+from app.models import AtBat
+from app.pitches import STRIKE_CODES, PITCH_CODES, unpack_codes, load_pitch_matrix, first_pitch_strike_rate
+from benchmarks.common import make_app, measure, report
+
+STRIKE_NAMES = frozenset(name for name, code in PITCH_CODES.items() if code in STRIKE_CODES)
+
+
+def page_count() -> int:
+    return db.session.execute(text('PRAGMA page_count')).scalar()
+
+
+def build_pitch_table() -> int:
+    db.session.execute(text('CREATE TABLE pitch (id INTEGER PRIMARY KEY, at_bat_id INTEGER NOT NULL, '
+                            'number INTEGER NOT NULL, code INTEGER NOT NULL)'))
+    rows = [{'at_bat_id': at_bat_id, 'number': number, 'code': code}
+            for at_bat_id, blob in db.session.query(AtBat.id, AtBat.pitches)
+            for number, code in enumerate(unpack_codes(blob), start=1)]
+    db.session.execute(text('INSERT INTO pitch (at_bat_id, number, code) VALUES (:at_bat_id, :number, :code)'),
+                       rows)
+    db.session.execute(text('CREATE INDEX ix_pitch_at_bat ON pitch (at_bat_id, number)'))
+    db.session.commit()
+    return len(rows)
+
+
+def rate_from_rows() -> float:
+    strikes, total = db.session.execute(text(
+        f"SELECT sum(code IN ({', '.join(str(code) for code in sorted(STRIKE_CODES))})), count(*) "
+        'FROM pitch WHERE number = 1')).one()
+    return strikes / total
+
+
+def rate_from_loop() -> float:
+    strikes = total = 0
+    for (blob,) in db.session.query(AtBat.pitches).filter(AtBat.pitches.isnot(None)):
+        codes = unpack_codes(blob)
+        if codes:
+            total += 1
+            strikes += codes[0] in STRIKE_CODES
+    return strikes / total
+
+
+def rate_from_matrix() -> float:
+    return first_pitch_strike_rate(load_pitch_matrix())
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--database-uri', help='defaults to a scratch SQLite file')
+    parser.add_argument('--teams', type=int, default=20)
+    parser.add_argument('--games-per-team', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    app = make_app(args.database_uri)
+    with app.app_context():
+        before = page_count()
+        counts = generate_league(teams=args.teams, games_per_team=args.games_per_team)
+        packed_bytes = db.session.execute(text('SELECT sum(length(pitches)) FROM at_bat')).scalar()
+        league_pages = page_count() - before
+        pitches = build_pitch_table()
+        pitch_pages = page_count() - before - league_pages
+        page_size = db.session.execute(text('PRAGMA page_size')).scalar()
+
+        print(f"{counts['at_bat']:,} at-bats, {pitches:,} pitches ({pitches / counts['at_bat']:.2f} per at-bat)")
+        print(f'packed column      {packed_bytes / 1024:10,.1f} KiB of payload')
+        print(f'row per pitch      {pitch_pages * page_size / 1024:10,.1f} KiB in table and index '
+              f'({pitch_pages * page_size / packed_bytes:.0f}x)')
+
+        results = {name: fn() for name, fn in (('sql', rate_from_rows), ('loop', rate_from_loop),
+                                                ('numpy', rate_from_matrix))}
+        assert len({round(value, 9) for value in results.values()}) == 1, results
+        print(f"first-pitch strike rate {results['numpy']:.3f}")
+        report('row per pitch, SQL', measure(rate_from_rows, repeat=args.repeat))
+        report('packed, Python loop', measure(rate_from_loop, repeat=args.repeat))
+        report('packed, numpy pitch_matrix', measure(rate_from_matrix, repeat=args.repeat))
+
+
+if __name__ == '__main__':
+    main()
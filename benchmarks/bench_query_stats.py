@@ -0,0 +1,49 @@
+"""What SQL instrumentation costs per crud call.
+
+Times two crud calls --calls times each: get_team_by_id, served from the
+cache without SQL, and get_user_by_username, which runs one SELECT. Each
+runs as the bare function, instrumented with query stats disabled (the
+default), and instrumented with them enabled.
+
+Run with ``python -m benchmarks.bench_query_stats``.
+"""
+import argparse
+
+from app import db
+from app.crud import create_user, create_team, get_team_by_id, get_user_by_username
+from app.query_stats import query_stats
+from benchmarks.common import make_app, time_calls, summarize
+
+
+def run(fn, args, count: int) -> float:
+    fn(*args)
+    return summarize(time_calls(fn, [args] * count))['median']
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--database-uri', help='defaults to a scratch SQLite file')
+    parser.add_argument('--calls', type=int, default=20_000)
+    args = parser.parse_args(argv)
+
+    app = make_app(args.database_uri)
+    with app.app_context():
+        user = create_user('counted', 'counted@example.com', 'password')
+        team_id = create_team('Counted', user.id).id
+        calls = (('get_team_by_id (cached)', get_team_by_id, (team_id,)),
+                 ('get_user_by_username (1 query)', get_user_by_username, ('counted',)))
+        print(f"{'call':<32} {'bare':>10} {'disabled':>10} {'enabled':>10}   (median us)")
+        for name, fn, call_args in calls:
+            query_stats.enabled = False
+            bare = run(fn.__wrapped__, call_args, args.calls)
+            disabled = run(fn, call_args, args.calls)
+            query_stats.enabled = True
+            query_stats.install(db.engine)
+            enabled = run(fn, call_args, args.calls)
+            query_stats.enabled = False
+            print(f'{name:<32} ' + ' '.join(f'{median * 1e6:10.2f}' for median in (bare, disabled, enabled)))
+        db.session.remove()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Rendering a schedule with final scores: summing innings vs Game's line score.
+
+Generates a league with --teams teams and renders every team's schedule
+(date, opponent, R/H/E per side) three ways: loading each game's innings
+and at-bats to add them up, one GROUP BY over innings and at-bats for the
+team, and reading the denormalized columns off the game rows alone.
+
+Run with ``python -m benchmarks.bench_schedule``.
+"""
+import argparse
+
+from sqlalchemy import select, func, case
+
+from app import db
+from app.aggregation import HIT_RESULTS, ERROR_RESULTS
+from app.generator import generate_league
+from app.models import Team, Game, Inning, AtBat
+from benchmarks.common import make_app, measure, report
+
+
+def per_game(team_ids):
+    for team_id in team_ids:
+        for game in Game.query.filter_by(team_id=team_id).order_by(Game.date):
+            innings = Inning.query.filter_by(game_id=game.id).all()
+            results = [at_bat.result for inning in innings for at_bat in inning.at_bats]
+            (game.date, game.opponent, sum(inning.team_runs for inning in innings),
+             sum(result in HIT_RESULTS for result in results),
+             sum(inning.opponent_runs for inning in innings),
+             sum(result in ERROR_RESULTS for result in results))
+
+
+def grouped(team_ids):
+    for team_id in team_ids:
+        games = select(Game.id).where(Game.team_id == team_id)
+        runs = (select(Inning.game_id, func.sum(Inning.team_runs).label('team_runs'),
+                       func.sum(Inning.opponent_runs).label('opponent_runs'))
+                .where(Inning.game_id.in_(games)).group_by(Inning.game_id).subquery())
+        hits = (select(Inning.game_id,
+                       func.sum(case((AtBat.result.in_(HIT_RESULTS), 1), else_=0)).label('team_hits'),
+                       func.sum(case((AtBat.result.in_(ERROR_RESULTS), 1), else_=0)).label('errors'))
+                .join(AtBat, AtBat.inning_id == Inning.id).where(Inning.game_id.in_(games))
+                .group_by(Inning.game_id).subquery())
+        db.session.execute(
+            select(Game.date, Game.opponent, runs.c.team_runs, hits.c.team_hits, runs.c.opponent_runs,
+                   hits.c.errors)
+            .outerjoin(runs, runs.c.game_id == Game.id).outerjoin(hits, hits.c.game_id == Game.id)
+            .where(Game.team_id == team_id).order_by(Game.date)
+        ).all()
+
+
+def denormalized(team_ids):
+    for team_id in team_ids:
+        db.session.execute(
+            select(Game.date, Game.opponent, Game.team_runs, Game.team_hits, Game.team_errors,
+                   Game.opponent_runs, Game.opponent_hits, Game.opponent_errors)
+            .where(Game.team_id == team_id).order_by(Game.date)
+        ).all()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--database-uri', help='defaults to a scratch SQLite file')
+    parser.add_argument('--teams', type=int, default=20)
+    parser.add_argument('--games-per-team', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    app = make_app(args.database_uri)
+    with app.app_context():
+        counts = generate_league(teams=args.teams, games_per_team=args.games_per_team)
+        team_ids = [team.id for team in Team.query.all()]
+        print(f"{len(team_ids)} schedules, {counts['game']:,} games, {counts['inning']:,} innings, "
+              f"{counts['at_bat']:,} at-bats")
+
+        report('innings and at-bats per game', measure(lambda: per_game(team_ids), repeat=args.repeat,
+                                                       setup=db.session.expire_all))
+        report('GROUP BY per schedule', measure(lambda: grouped(team_ids), repeat=args.repeat))
+        report('game rows only', measure(lambda: denormalized(team_ids), repeat=args.repeat))
+
+
+if __name__ == '__main__':
+    main()
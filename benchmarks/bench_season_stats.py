@@ -0,0 +1,94 @@
+"""Naive ORM season stats vs. the vectorized app.stats engine.
+
+Run with ``python -m benchmarks.bench_season_stats --rows 100000``.
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app import db
+from app.models import User, Team, Player, Game, GameStats
+from app.stats import COUNT_COLUMNS, aggregate, add_rates, load_stat_rows, player_stats
+from benchmarks.common import make_app, measure, report
+
+PLAYERS_PER_TEAM = 12
+
+
+def populate(rows: int, teams: int, seed: int = 1) -> None:
+    rng = random.Random(seed)
+    games = max(1, rows // (teams * PLAYERS_PER_TEAM))
+    db.session.execute(insert(User), [{'id': 1, 'username': 'bench', 'email': 'bench@example.com'}])
+    db.session.execute(insert(Team), [{'id': t, 'name': f'Team {t}', 'user_id': 1} for t in range(1, teams + 1)])
+    db.session.execute(insert(Player), [
+        {'id': (t - 1) * PLAYERS_PER_TEAM + p, 'name': f'Player {t}-{p}', 'number': p, 'team_id': t}
+        for t in range(1, teams + 1) for p in range(1, PLAYERS_PER_TEAM + 1)
+    ])
+    start = datetime(2025, 4, 1)
+    game_rows, stat_rows = [], []
+    game_id = 0
+    for t in range(1, teams + 1):
+        for g in range(games):
+            game_id += 1
+            game_rows.append({'id': game_id, 'date': start + timedelta(days=g % 150),
+                              'opponent': 'Opponent', 'team_id': t})
+            for p in range(1, PLAYERS_PER_TEAM + 1):
+                at_bats = rng.randint(2, 5)
+                hits = rng.randint(0, at_bats)
+                stat_rows.append({
+                    'game_id': game_id, 'player_id': (t - 1) * PLAYERS_PER_TEAM + p,
+                    'at_bats': at_bats, 'hits': hits, 'doubles': hits // 3, 'triples': 0,
+                    'home_runs': hits // 4, 'runs': rng.randint(0, 2), 'rbis': rng.randint(0, 3),
+                    'strikeouts': rng.randint(0, 2), 'walks': rng.randint(0, 1),
+                    'stolen_bases': rng.randint(0, 1), 'caught_stealing': 0,
+                })
+    db.session.execute(insert(Game), game_rows)
+    for offset in range(0, len(stat_rows), 10000):
+        db.session.execute(insert(GameStats), stat_rows[offset:offset + 10000])
+    db.session.commit()
+
+
+def naive_orm_stats():
+    totals = {}
+    for stats in GameStats.query.all():
+        row = totals.setdefault(stats.player_id, dict.fromkeys(COUNT_COLUMNS, 0))
+        for name in COUNT_COLUMNS:
+            row[name] += getattr(stats, name) or 0
+    for row in totals.values():
+        at_bats, hits, walks = row['at_bats'], row['hits'], row['walks']
+        bases = hits + row['doubles'] + 2 * row['triples'] + 3 * row['home_runs']
+        row['avg'] = hits / at_bats if at_bats else 0.0
+        row['obp'] = (hits + walks) / (at_bats + walks) if at_bats + walks else 0.0
+        row['slg'] = bases / at_bats if at_bats else 0.0
+        row['ops'] = row['obp'] + row['slg']
+    db.session.expunge_all()
+    return totals
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--database-uri', help='defaults to a scratch SQLite file')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--teams', type=int, default=40)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    app = make_app(args.database_uri)
+    with app.app_context():
+        populate(args.rows, args.teams)
+        rows = load_stat_rows()
+        print(f'{len(rows)} GameStats rows')
+        naive = measure(naive_orm_stats, repeat=args.repeat)
+        vectorized = measure(player_stats, repeat=args.repeat)
+        reduce_only = measure(lambda: add_rates(aggregate(rows)), repeat=args.repeat)
+        db.session.remove()
+
+    report('naive ORM load + Python loops', naive)
+    report('app.stats.player_stats (query + numpy)', vectorized)
+    report('numpy reductions only', reduce_only)
+    print(f"speedup: {naive['median'] / vectorized['median']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
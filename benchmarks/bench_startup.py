@@ -0,0 +1,54 @@
+"""Cold-start cost of run.py's app factory.
+
+Times fresh interpreters running ``import run`` and lists the slowest
+imports reported by ``-X importtime``.
+
+Run with ``python -m benchmarks.bench_startup``.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def cold_start(code: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True)
+    return time.perf_counter() - start
+
+
+def slowest_imports(code: str, top: int):
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and 'cumulative' not in line:
+            _, cumulative, name = line[len('import time:'):].split('|')
+            rows.append((int(cumulative), name.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args(argv)
+
+    baseline = [cold_start('pass') for _ in range(args.repeat)]
+    samples = [cold_start('import run') for _ in range(args.repeat)]
+    interpreter = statistics.median(baseline)
+    median = statistics.median(samples)
+    print(f'bare interpreter        median {interpreter * 1000:8.1f} ms')
+    print(f'import run (create_app) median {median * 1000:8.1f} ms   '
+          f'min {min(samples) * 1000:8.1f} ms   app cost {(median - interpreter) * 1000:8.1f} ms')
+    print('\nslowest imports (cumulative):')
+    for cumulative, name in slowest_imports('import run', args.top):
+        print(f'{cumulative / 1000:9.1f} ms  {name}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Per-call commits vs. one unit of work for a 15-player roster plus lineup.
+
+Run with ``python -m benchmarks.bench_unit_of_work``.
+"""
+import argparse
+import itertools
+from datetime import datetime
+
+from app import db
+from app.crud import (
+    create_user, create_team, create_player, create_game, create_batting_order,
+    unit_of_work,
+)
+from benchmarks.common import make_app, measure, report
+
+ROSTER_SIZE = 15
+LINEUP_SIZE = 10
+
+_counter = itertools.count()
+
+
+def build_game_setup(user_id: int) -> None:
+    team = create_team(f'Team {next(_counter)}', user_id)
+    players = [create_player(f'Player {i}', team.id, i) for i in range(ROSTER_SIZE)]
+    game = create_game(datetime.utcnow(), 'Opponent Team', team.id)
+    for order_number, player in enumerate(players[:LINEUP_SIZE], start=1):
+        create_batting_order(game.id, player.id, order_number)
+
+
+def build_game_setup_batched(user_id: int) -> None:
+    with unit_of_work():
+        build_game_setup(user_id)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--database-uri', help='defaults to a scratch SQLite file')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    app = make_app(args.database_uri)
+    with app.app_context():
+        user = create_user('bench', 'bench@example.com', 'password')
+        per_call = measure(lambda: build_game_setup(user.id), repeat=args.repeat)
+        batched = measure(lambda: build_game_setup_batched(user.id), repeat=args.repeat)
+        db.session.remove()
+
+    report('per-call commits', per_call)
+    report('unit_of_work', batched)
+    print(f"speedup: {per_call['median'] / batched['median']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Pitch-by-pitch count updates: synchronous commits vs the write-behind queue.
+
+Records --pitches count changes spread over --at-bats at-bats three ways:
+an UPDATE and commit per pitch, the write-behind queue in memory, and the
+queue in durable mode (journal fsynced per pitch). Reports the latency the
+scorekeeper sees per pitch and the statements the database actually ran.
+
+Run with ``python -m benchmarks.bench_write_behind``.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app import db
+from app.crud import create_user, create_team, create_player, create_game, create_inning, create_at_bat
+from app.models import AtBat
+from app.write_behind import WriteBehindQueue
+from benchmarks.common import make_app
+
+
+def pitches(at_bat_ids, count: int):
+    for n in range(count):
+        yield at_bat_ids[(n // 6) % len(at_bat_ids)], n % 4, n % 3
+
+
+def synchronous(at_bat_ids, count: int):
+    latencies = []
+    for at_bat_id, balls, strikes in pitches(at_bat_ids, count):
+        start = time.perf_counter()
+        at_bat = db.session.get(AtBat, at_bat_id)
+        at_bat.balls, at_bat.strikes = balls, strikes
+        db.session.commit()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def queued(app, at_bat_ids, count: int, journal_path=None):
+    queue = WriteBehindQueue(app, journal_path=journal_path)
+    latencies = []
+    for at_bat_id, balls, strikes in pitches(at_bat_ids, count):
+        start = time.perf_counter()
+        queue.count(at_bat_id, balls, strikes)
+        latencies.append(time.perf_counter() - start)
+    queue.flush()
+    queue.close()
+    return latencies
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--database-uri', help='defaults to a scratch SQLite file')
+    parser.add_argument('--pitches', type=int, default=3000)
+    parser.add_argument('--at-bats', type=int, default=100)
+    args = parser.parse_args(argv)
+
+    app = make_app(args.database_uri)
+    with app.app_context():
+        user = create_user('bench', 'bench@example.com', 'password')
+        team = create_team('Bench Team', user.id)
+        player = create_player('Player 1', team.id, 1)
+        inning = create_inning(create_game(datetime(2025, 6, 1), 'Rivals', team.id).id, 1)
+        at_bat_ids = [create_at_bat(inning.id, player.id, 'single').id for _ in range(args.at_bats)]
+
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(a[2]))
+        journal = os.path.join(tempfile.mkdtemp(prefix='softball-journal-'), 'write-behind.jsonl')
+        modes = [('synchronous', lambda: synchronous(at_bat_ids, args.pitches)),
+                 ('write-behind', lambda: queued(app, at_bat_ids, args.pitches)),
+                 ('durable', lambda: queued(app, at_bat_ids, args.pitches, journal))]
+        for name, run in modes:
+            del statements[:]
+            start = time.perf_counter()
+            latencies = run()
+            elapsed = time.perf_counter() - start
+            latencies.sort()
+            print(f'{name:<13} {args.pitches:,} pitches in {elapsed:6.2f}s  '
+                  f'median {statistics.median(latencies) * 1e6:8.1f} us  '
+                  f'p99 {latencies[int(len(latencies) * 0.99)] * 1e6:8.1f} us  '
+                  f'{len(statements):>6,} statements')
+            db.session.remove()
+        os.remove(journal)
+        os.rmdir(os.path.dirname(journal))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+import gc
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from app import create_app, db
+from config import Config, SQLiteConfig
+
+
+def make_app(database_uri: Optional[str] = None):
+    """Create an app on a scratch SQLite file with the SQLite profile's pragmas.
+
+    Pass database_uri to benchmark another database with the default config.
+    """
+    if database_uri is None:
+        fd, path = tempfile.mkstemp(prefix='softball-bench-', suffix='.db')
+        os.close(fd)
+        base = SQLiteConfig
+        database_uri = f'sqlite:///{path}'
+    else:
+        base = SQLiteConfig if database_uri.startswith('sqlite') else Config
+
+    class BenchConfig(base):
+        SQLALCHEMY_DATABASE_URI = database_uri
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+def measure(fn: Callable[[], object], repeat: int = 5, warmup: int = 1,
+            setup: Optional[Callable[[], object]] = None) -> Dict[str, float]:
+    """Time fn() after warmup runs; setup() runs untimed before every call."""
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'max': max(samples),
+        'repeat': repeat,
+    }
+
+
+def time_calls(fn: Callable[..., object], calls: Sequence[tuple],
+               reset: Optional[Callable[[], object]] = None) -> List[float]:
+    """Time fn(*args) once per args tuple in calls, in seconds.
+
+    reset() runs untimed after every call. The garbage collector is paused
+    while timing so a collection does not land inside one sample.
+    """
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        for args in calls:
+            start = time.perf_counter_ns()
+            fn(*args)
+            samples.append((time.perf_counter_ns() - start) / 1e9)
+            if reset:
+                reset()
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return samples
+
+
+def summarize(samples: Sequence[float]) -> Dict[str, float]:
+    """min/median/max plus mean, p90 and interquartile range of samples."""
+    ordered = sorted(samples)
+    quartiles = statistics.quantiles(ordered, n=4) if len(ordered) > 1 else [ordered[0]] * 3
+    return {
+        'min': ordered[0],
+        'median': statistics.median(ordered),
+        'max': ordered[-1],
+        'mean': statistics.fmean(ordered),
+        'p90': ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))],
+        'iqr': quartiles[2] - quartiles[0],
+        'repeat': len(ordered),
+    }
+
+
+def report(name: str, result: Dict[str, float]) -> None:
+    print(f"{name:<40} median {result['median'] * 1000:9.2f} ms   "
+          f"min {result['min'] * 1000:9.2f} ms")
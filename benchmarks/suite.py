@@ -0,0 +1,371 @@
+"""Benchmark suite for the crud layer and the game-scoring hot paths.
+
+Every public app.crud function gets a case, plus recording a full game of
+at-bats, loading a box score and season stat aggregation. Each size loads a
+synthetic league (app.generator) into a scratch database, then every case
+is warmed up and timed call by call.
+
+    python -m benchmarks.suite --sizes small,medium --json results.json
+    python -m benchmarks.suite --compare baseline.json --threshold 15
+
+With --compare the run exits non-zero when any case's median is more than
+--threshold percent (and --min-delta-us microseconds) slower than in the
+baseline file, so it can gate a commit.
+"""
+import argparse
+import fnmatch
+import itertools
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import select
+
+from app import db, crud
+from app.box_score import load_box_score
+from app.generator import generate_league
+from app.models import User, Team, Player, Game, Inning, BattingOrder, AtBat
+from app.stats import player_stats, leaders
+from benchmarks.common import make_app, time_calls, summarize
+
+# League sizes; at-bat counts are approximate
+SIZES = {
+    'small': {'teams': 4, 'games_per_team': 10},       # ~1.4k at-bats
+    'medium': {'teams': 12, 'games_per_team': 40},     # ~17k at-bats
+    'large': {'teams': 24, 'games_per_team': 160},     # ~135k at-bats
+}
+
+SAMPLES = 50
+WARMUP = 5
+
+class Case(NamedTuple):
+    name: str
+    op: Callable[..., object]
+    # prepare(count) returns one args tuple per call; it runs untimed
+    prepare: Callable[[int], List[tuple]]
+    samples: Optional[int] = None
+
+class Fixture(NamedTuple):
+    """Ids the cases run against: generated rows for reads, scratch rows for writes."""
+    user_id: int
+    username: str
+    email: str
+    team_id: int
+    player_id: int
+    lineup: List[int]
+    game_id: int
+    game_ids: List[int]
+    inning_id: int
+    at_bat_id: int
+    season: int
+    scratch_team_id: int
+    scratch_game_id: int
+    scratch_inning_id: int
+    scratch_at_bat_id: int
+
+_unique = itertools.count()
+
+def _same(*args) -> Callable[[int], List[tuple]]:
+    return lambda count: [args] * count
+
+def _numbered(build: Callable[[int], tuple]) -> Callable[[int], List[tuple]]:
+    return lambda count: [build(next(_unique)) for _ in range(count)]
+
+def _rotate(items: List[int], n: int) -> List[int]:
+    n %= len(items)
+    return items[n:] + items[:n]
+
+def _rows(model, build: Callable[[int], Dict[str, Any]]) -> Callable[[int], List[tuple]]:
+    """Insert count fresh rows of model and pass each id to the timed call."""
+    def prepare(count):
+        objs = [model(**build(next(_unique))) for _ in range(count)]
+        db.session.add_all(objs)
+        db.session.commit()
+        ids = [(obj.id,) for obj in objs]
+        db.session.remove()
+        return ids
+    return prepare
+
+def _scratch_games(fx: Fixture, count: int) -> List[int]:
+    games = [Game(date=datetime(fx.season, 6, 1), opponent='Scratch', team_id=fx.team_id)
+             for _ in range(count)]
+    db.session.add_all(games)
+    db.session.commit()
+    return [game.id for game in games]
+
+def load_fixture() -> Fixture:
+    session = db.session
+    team_id, user_id = session.execute(select(Team.id, Team.user_id).order_by(Team.id)).first()
+    username, email = session.execute(select(User.username, User.email).where(User.id == user_id)).one()
+    game_ids = session.execute(select(Game.id).where(Game.team_id == team_id).order_by(Game.id)).scalars().all()
+    game_id = game_ids[len(game_ids) // 2]
+    lineup = [order.player_id for order in crud.get_batting_order(game_id)]
+    inning_id = session.execute(select(Inning.id).where(Inning.game_id == game_id)
+                                .order_by(Inning.inning_number)).scalars().first()
+    at_bat_id = session.execute(select(AtBat.id).where(AtBat.inning_id == inning_id)
+                                .order_by(AtBat.id)).scalars().first()
+    season = session.get(Game, game_id).date.year
+
+    scratch_team = crud.create_team('Scratch Team', user_id)
+    scratch_game = crud.create_game(datetime(season, 6, 1), 'Scratch', team_id)
+    scratch_inning = crud.create_inning(scratch_game.id, 1)
+    scratch_at_bat = crud.create_at_bat(scratch_inning.id, lineup[0], 'groundout')
+    fx = Fixture(user_id, username, email, team_id, lineup[0], lineup, game_id, list(game_ids),
+                 inning_id, at_bat_id, season, scratch_team.id, scratch_game.id, scratch_inning.id,
+                 scratch_at_bat.id)
+    session.remove()
+    return fx
+
+def record_game(fx: Fixture, box) -> None:
+    """Replay a loaded box score through crud as one new game."""
+    with crud.unit_of_work():
+        game = crud.create_game(box.date, box.opponent, fx.team_id)
+        crud.set_batting_order(game.id, [slot.player_id for slot in box.lineup])
+        for line in box.innings:
+            inning = crud.create_inning(game.id, line.inning_number)
+            for at_bat_line in line.at_bats:
+                at_bat = crud.create_at_bat(inning.id, at_bat_line.batter_id, at_bat_line.result,
+                                            at_bat_line.rbis, at_bat_line.balls, at_bat_line.strikes,
+                                            at_bat_line.bases_advanced, at_bat_line.runners_advanced)
+                for out in at_bat_line.outs:
+                    crud.create_out(at_bat.id, out.player_id, out.out_type, out.base, out.fielder_id)
+                for steal in at_bat_line.steals:
+                    crud.create_steal(at_bat.id, steal.player_id, steal.from_base, steal.to_base,
+                                      steal.success)
+            crud.update_inning(inning.id, {'team_runs': line.team_runs,
+                                           'opponent_runs': line.opponent_runs})
+
+def build_cases(fx: Fixture) -> List[Case]:
+    def games(count):
+        return [(fx.game_ids[i % len(fx.game_ids)],) for i in range(count)]
+
+    def batting_orders(count):
+        game_ids = _scratch_games(fx, 1)
+        rows = [BattingOrder(game_id=game_ids[0], player_id=fx.player_id, order_number=n)
+                for n in range(1, count + 1)]
+        db.session.add_all(rows)
+        db.session.commit()
+        return [(row.id, count + row.order_number) for row in rows]
+
+    def innings(count):
+        ids = [(crud.create_inning(fx.scratch_game_id, 1000 + n).id,) for n in range(count)]
+        db.session.remove()
+        return ids
+
+    def at_bats(count):
+        ids = [(crud.create_at_bat(fx.scratch_inning_id, fx.player_id, 'single').id,) for _ in range(count)]
+        db.session.remove()
+        return ids
+
+    def outs(count):
+        ids = [(crud.create_out(fx.scratch_at_bat_id, fx.player_id, 'flyout', 1).id,) for _ in range(count)]
+        db.session.remove()
+        return ids
+
+    def steals(count):
+        ids = [(crud.create_steal(fx.scratch_at_bat_id, fx.player_id, 1, 2, True).id,) for _ in range(count)]
+        db.session.remove()
+        return ids
+
+    def replays(count):
+        box = load_box_score(fx.game_id)
+        return [(fx, box)] * count
+
+    roster = [{'name': f'Bulk {n}', 'number': n} for n in range(12)]
+    return [
+        # Users; passwords are hashed, so creating one is deliberately slow
+        Case('crud.create_user', crud.create_user,
+             _numbered(lambda n: (f'bench{n}', f'bench{n}@example.com', 'password')), samples=5),
+        Case('crud.get_user_by_id', crud.get_user_by_id, _same(fx.user_id)),
+        Case('crud.get_user_by_username', crud.get_user_by_username, _same(fx.username)),
+        Case('crud.get_user_by_email', crud.get_user_by_email, _same(fx.email)),
+        Case('crud.update_user', crud.update_user,
+             _numbered(lambda n: (fx.user_id, {'email': f'renamed{n}@example.com'}))),
+        Case('crud.delete_user', crud.delete_user,
+             _rows(User, lambda n: {'username': f'gone{n}', 'email': f'gone{n}@example.com'})),
+
+        # Teams
+        Case('crud.create_team', crud.create_team, _numbered(lambda n: (f'Bench Team {n}', fx.user_id))),
+        Case('crud.get_team_by_id', crud.get_team_by_id, _same(fx.team_id)),
+        Case('crud.get_teams_by_user', crud.get_teams_by_user, _same(fx.user_id)),
+        Case('crud.page_teams_by_user', crud.page_teams_by_user, _same(fx.user_id)),
+        Case('crud.update_team', crud.update_team,
+             _numbered(lambda n: (fx.team_id, {'name': f'Renamed Team {n}'}))),
+        Case('crud.invalidate_team_cache', crud.invalidate_team_cache, _same(fx.team_id)),
+        Case('crud.delete_team', crud.delete_team,
+             _rows(Team, lambda n: {'name': f'Gone Team {n}', 'user_id': fx.user_id})),
+
+        # Players
+        Case('crud.create_player', crud.create_player,
+             _numbered(lambda n: (f'Bench {n}', fx.scratch_team_id, n % 99))),
+        Case('crud.bulk_create_players', crud.bulk_create_players, _same(fx.scratch_team_id, roster)),
+        Case('crud.get_player_by_id', crud.get_player_by_id, _same(fx.player_id)),
+        Case('crud.get_players_by_team', crud.get_players_by_team, _same(fx.team_id)),
+        Case('crud.page_players_by_team', crud.page_players_by_team, _same(fx.team_id, None, 10, ['name'])),
+        Case('crud.update_player', crud.update_player, _numbered(lambda n: (fx.player_id, {'number': n % 99}))),
+        Case('crud.delete_player', crud.delete_player,
+             _rows(Player, lambda n: {'name': f'Gone {n}', 'team_id': fx.team_id})),
+
+        # Games
+        Case('crud.create_game', crud.create_game,
+             _numbered(lambda n: (datetime(fx.season, 6, 1), f'Opponent {n}', fx.team_id))),
+        Case('crud.get_game_by_id', crud.get_game_by_id, games),
+        Case('crud.get_games_by_team', crud.get_games_by_team, _same(fx.team_id)),
+        Case('crud.page_games_by_team', crud.page_games_by_team, _same(fx.team_id, None, 20)),
+        Case('crud.update_game', crud.update_game,
+             _numbered(lambda n: (fx.scratch_game_id, {'opponent': f'Opponent {n}'}))),
+        Case('crud.delete_game', crud.delete_game,
+             _rows(Game, lambda n: {'date': datetime(fx.season, 6, 1), 'opponent': 'Gone',
+                                    'team_id': fx.team_id})),
+        Case('crud.invalidate_game_feed', crud.invalidate_game_feed, _same(fx.game_id)),
+
+        # Game stats
+        Case('crud.create_game_stats', crud.create_game_stats,
+             lambda count: [(game_id, fx.player_id) for game_id in _scratch_games(fx, count)]),
+        Case('crud.get_game_stats', crud.get_game_stats, _same(fx.game_id, fx.player_id)),
+        Case('crud.update_game_stats', crud.update_game_stats,
+             _numbered(lambda n: (fx.scratch_game_id, fx.player_id, {'runs': n % 5}))),
+        Case('crud.recount_game_stats', crud.recount_game_stats, games, samples=20),
+
+        # Batting order
+        Case('crud.create_batting_order', crud.create_batting_order,
+             lambda count: [(game_id, fx.player_id, 1) for game_id in _scratch_games(fx, count)]),
+        Case('crud.set_batting_order', crud.set_batting_order,
+             _numbered(lambda n: (fx.scratch_game_id, _rotate(fx.lineup, n)))),
+        Case('crud.get_batting_order', crud.get_batting_order, games),
+        Case('crud.update_batting_order', crud.update_batting_order, batting_orders),
+        Case('crud.delete_batting_order', crud.delete_batting_order,
+             lambda count: [(order_id,) for order_id, _ in batting_orders(count)]),
+
+        # Innings
+        Case('crud.create_inning', crud.create_inning, _numbered(lambda n: (fx.scratch_game_id, n + 2))),
+        Case('crud.get_innings', crud.get_innings, games),
+        Case('crud.update_inning', crud.update_inning,
+             _numbered(lambda n: (fx.scratch_inning_id, {'opponent_runs': n % 4}))),
+        Case('crud.delete_inning', crud.delete_inning, innings),
+
+        # At-bats, outs and steals
+        Case('crud.create_at_bat', crud.create_at_bat,
+             _numbered(lambda n: (fx.scratch_inning_id, fx.lineup[n % len(fx.lineup)], 'double', n % 2))),
+        Case('crud.get_at_bat_by_id', crud.get_at_bat_by_id, _same(fx.at_bat_id)),
+        Case('crud.get_at_bats', crud.get_at_bats, _same(fx.inning_id)),
+        Case('crud.delete_at_bat', crud.delete_at_bat, at_bats),
+        Case('crud.create_out', crud.create_out,
+             _same(fx.scratch_at_bat_id, fx.player_id, 'strikeout')),
+        Case('crud.delete_out', crud.delete_out, outs),
+        Case('crud.create_steal', crud.create_steal, _same(fx.scratch_at_bat_id, fx.player_id, 1, 2, False)),
+        Case('crud.delete_steal', crud.delete_steal, steals),
+
+        # Game-scoring hot paths
+        Case('game.record_full_game', record_game, replays, samples=10),
+        Case('box_score.load', load_box_score, games),
+        Case('stats.player_stats_season', player_stats, lambda count: [(None, fx.season)] * count, samples=10),
+        Case('stats.player_stats_team', player_stats, _same(fx.team_id)),
+        Case('stats.leaders_avg', leaders, _same('avg', 10, 10, None, fx.season), samples=10),
+    ]
+
+def run_case(case: Case, samples: int, warmup: int) -> Dict[str, float]:
+    calls = case.prepare(warmup + (case.samples or samples))
+    time_calls(case.op, calls[:warmup], reset=db.session.remove)
+    # A new request starts with an empty session
+    return summarize(time_calls(case.op, calls[warmup:], reset=db.session.remove))
+
+def run(sizes: List[str], pattern: str = '*', samples: int = SAMPLES, warmup: int = WARMUP,
+        database_uri: Optional[str] = None, out=sys.stdout) -> Dict[str, Dict[str, float]]:
+    """Run the matching cases at each size; results are keyed 'size/case' in seconds."""
+    results = {}
+    for size in sizes:
+        app = make_app(database_uri)
+        with app.app_context():
+            counts = generate_league(seed=0, **SIZES[size])
+            print(f"{size}: {counts['game']:,} games, {counts['at_bat']:,} at-bats", file=out)
+            fx = load_fixture()
+            for case in build_cases(fx):
+                if not fnmatch.fnmatchcase(case.name, pattern):
+                    continue
+                result = run_case(case, samples, warmup)
+                results[f'{size}/{case.name}'] = result
+                print(f"  {case.name:<32} median {result['median'] * 1e6:10.1f} us   "
+                      f"p90 {result['p90'] * 1e6:10.1f} us", file=out)
+            db.session.remove()
+            db.drop_all()
+    return results
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(baseline: Dict[str, Dict[str, float]], results: Dict[str, Dict[str, float]],
+            threshold: float, min_delta: float = 0.0) -> List[str]:
+    """Names of cases whose median slowed down by more than threshold percent.
+
+    Slowdowns smaller than min_delta seconds are ignored as timer noise.
+    """
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        delta = result['median'] - before['median']
+        if delta > min_delta and result['median'] > before['median'] * (1 + threshold / 100):
+            regressions.append(name)
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-uri', help='defaults to a scratch SQLite file per size')
+    parser.add_argument('--sizes', default='small,medium', help=f"comma-separated, from {', '.join(SIZES)}")
+    parser.add_argument('-k', '--pattern', default='*', help="glob on case names, e.g. 'crud.get_*'")
+    parser.add_argument('--samples', type=int, default=SAMPLES)
+    parser.add_argument('--warmup', type=int, default=WARMUP)
+    parser.add_argument('--json', help='write results to this file')
+    parser.add_argument('--compare', help='baseline JSON from an earlier --json run')
+    parser.add_argument('--threshold', type=float, default=10.0, help='allowed slowdown in percent')
+    parser.add_argument('--min-delta-us', type=float, default=5.0,
+                        help='ignore slowdowns smaller than this many microseconds')
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes.split(',')
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"unknown size(s): {', '.join(unknown)}")
+
+    results = run(sizes, args.pattern, args.samples, args.warmup, args.database_uri)
+
+    if args.json:
+        payload = {
+            'meta': {
+                'commit': _git_commit(),
+                'created': datetime.utcnow().isoformat(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'database_uri': args.database_uri or 'sqlite (scratch file)',
+                'sizes': {size: SIZES[size] for size in sizes},
+            },
+            'results': results,
+        }
+        with open(args.json, 'w') as f:
+            json.dump(payload, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(baseline, results, args.threshold, args.min_delta_us / 1e6)
+        for name in regressions:
+            print(f"REGRESSION {name}: {baseline[name]['median'] * 1e6:.1f} us -> "
+                  f"{results[name]['median'] * 1e6:.1f} us")
+        if regressions:
+            print(f'{len(regressions)} case(s) slower than the baseline by more than {args.threshold:g}%')
+            return 1
+        print(f'no regressions beyond {args.threshold:g}% against {args.compare}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
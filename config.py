@@ -1,10 +1,13 @@
 import os
-from dotenv import load_dotenv
-from google.cloud.sql.connector import Connector
-import pymysql
+import threading
 
 basedir = os.path.abspath(os.path.dirname(__file__))
-load_dotenv(os.path.join(basedir, '.env'))
+# The Cloud SQL connector and database drivers are imported only when a
+# connection is actually made, so importing config stays cheap.
+_dotenv_path = os.path.join(basedir, '.env')
+if os.path.exists(_dotenv_path):
+    from dotenv import load_dotenv
+    load_dotenv(_dotenv_path)
 
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-key-please-change-in-production'
@@ -20,18 +23,125 @@ class Config:
     SQLALCHEMY_DATABASE_URI = f'mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
-    @staticmethod
-    def init_connector():
-        connector = Connector()
-        
+    # Read-through cache for teams, rosters and schedules (see app/cache.py)
+    CACHE_TYPE = os.environ.get('CACHE_TYPE', 'lru')
+    CACHE_MAXSIZE = int(os.environ.get('CACHE_MAXSIZE', '1024'))
+    CACHE_DEFAULT_TTL = int(os.environ.get('CACHE_DEFAULT_TTL', '300'))
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    # Seconds a logged-in user's identity is served from the cache
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', '60'))
+
+    # Live game feeds (see app/broker.py): frames buffered per viewer before
+    # the oldest are dropped, and seconds between keep-alive comments
+    FEED_BUFFER_SIZE = int(os.environ.get('FEED_BUFFER_SIZE', '64'))
+    FEED_HEARTBEAT = float(os.environ.get('FEED_HEARTBEAT', '15'))
+
+    # League leaderboards (see app/leaderboard.py): at-bats a player needs
+    # to be listed for AVG, OBP, SLG and OPS
+    LEADERBOARD_MIN_AT_BATS = int(os.environ.get('LEADERBOARD_MIN_AT_BATS', '10'))
+
+    # SQL instrumentation (see app/query_stats.py): statement counts and
+    # timings per crud function and endpoint, the slowest statements, and
+    # statements repeated this many times in one call (a likely N+1). A
+    # request budget fails requests that run more statements under TESTING.
+    QUERY_STATS_ENABLED = os.environ.get('QUERY_STATS_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    QUERY_STATS_SLOWEST = int(os.environ.get('QUERY_STATS_SLOWEST', '10'))
+    QUERY_STATS_N_PLUS_ONE = int(os.environ.get('QUERY_STATS_N_PLUS_ONE', '10'))
+    QUERY_STATS_REQUEST_BUDGET = None
+
+    # Latency histograms for crud calls and requests, served with the other
+    # counters on /metrics (see app/metrics.py)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+    # Write-behind queue for pitch-by-pitch updates (see app/write_behind.py):
+    # a batch is written once this many operations or seconds accumulate.
+    # Setting a journal path fsyncs every operation there before it is
+    # acknowledged.
+    WRITE_BEHIND_MAX_BATCH = int(os.environ.get('WRITE_BEHIND_MAX_BATCH', '500'))
+    WRITE_BEHIND_MAX_DELAY = float(os.environ.get('WRITE_BEHIND_MAX_DELAY', '0.25'))
+    WRITE_BEHIND_JOURNAL = os.environ.get('WRITE_BEHIND_JOURNAL')
+
+    # Connection pool. Cloud SQL drops idle connections, so connections are
+    # pre-pinged and recycled well before its idle timeout; pool size plus
+    # overflow caps the connections each worker can open.
+    CLOUD_SQL_INSTANCE = os.environ.get('CLOUD_SQL_INSTANCE')  # "project:region:instance"
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '5'))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', '5'))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', '10'))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', '1800'))
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+
+    @classmethod
+    def init_connector(cls):
+        """Return a getconn() creator that connects through the Cloud SQL connector.
+
+        The Connector itself is only built on the first connection.
+        """
+        connector = None
+        lock = threading.Lock()
+
         def getconn():
+            nonlocal connector
+            with lock:
+                if connector is None:
+                    from google.cloud.sql.connector import Connector
+                    connector = Connector()
             conn = connector.connect(
-                MYSQL_HOST,
+                cls.CLOUD_SQL_INSTANCE or cls.MYSQL_HOST,
                 "pymysql",
-                user=MYSQL_USER,
-                password=MYSQL_PASSWORD,
-                db=MYSQL_DB,
+                user=cls.MYSQL_USER,
+                password=cls.MYSQL_PASSWORD,
+                db=cls.MYSQL_DB,
             )
             return conn
 
-        return getconn 
\ No newline at end of file
+        return getconn
+
+    @classmethod
+    def engine_options(cls):
+        """SQLALCHEMY_ENGINE_OPTIONS for the pooled MySQL engine."""
+        from app.pool import TimedQueuePool
+
+        options = {
+            'poolclass': TimedQueuePool,
+            'pool_size': cls.DB_POOL_SIZE,
+            'max_overflow': cls.DB_MAX_OVERFLOW,
+            'pool_timeout': cls.DB_POOL_TIMEOUT,
+            'pool_recycle': cls.DB_POOL_RECYCLE,
+            'pool_pre_ping': cls.DB_POOL_PRE_PING,
+        }
+        if cls.CLOUD_SQL_INSTANCE:
+            options['creator'] = cls.init_connector()
+        return options
+
+class SQLiteConfig(Config):
+    """Run the whole app on embedded SQLite, for local runs and benchmarks.
+
+    SQLITE_PATH selects the database file; ':memory:' keeps it in memory.
+    SQLITE_PRAGMAS are applied to every new connection.
+    """
+    SQLITE_PATH = os.environ.get('SQLITE_PATH', os.path.join(basedir, 'softball.db'))
+    SQLALCHEMY_DATABASE_URI = 'sqlite://' if SQLITE_PATH == ':memory:' else f'sqlite:///{SQLITE_PATH}'
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -64000,  # KiB, i.e. 64 MB of page cache
+        'temp_store': 'MEMORY',
+        'foreign_keys': 'ON',
+    }
+
+    @classmethod
+    def engine_options(cls):
+        # Flask-SQLAlchemy picks suitable pools for file and in-memory SQLite
+        return {}
+
+class TestingConfig(SQLiteConfig):
+    TESTING = True
+    SQLITE_PATH = ':memory:'
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+
+config_by_name = {
+    'mysql': Config,
+    'sqlite': SQLiteConfig,
+    'testing': TestingConfig,
+}
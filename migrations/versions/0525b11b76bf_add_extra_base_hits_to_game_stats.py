@@ -0,0 +1,30 @@
+"""Add extra-base hits to game_stats
+
+Revision ID: 0525b11b76bf
+Revises: c026e89d3241
+Create Date: 2026-10-17 09:12:31.402118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0525b11b76bf'
+down_revision = 'c026e89d3241'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('game_stats', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('doubles', sa.Integer(), nullable=True, server_default='0'))
+        batch_op.add_column(sa.Column('triples', sa.Integer(), nullable=True, server_default='0'))
+        batch_op.add_column(sa.Column('home_runs', sa.Integer(), nullable=True, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('game_stats', schema=None) as batch_op:
+        batch_op.drop_column('home_runs')
+        batch_op.drop_column('triples')
+        batch_op.drop_column('doubles')
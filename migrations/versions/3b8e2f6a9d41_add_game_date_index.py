@@ -0,0 +1,24 @@
+"""Add game date index for season-ordered play-by-play streaming
+
+Revision ID: 3b8e2f6a9d41
+Revises: 7f3a9c1e5b2d
+Create Date: 2026-10-18 00:21:37.402118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8e2f6a9d41'
+down_revision = '7f3a9c1e5b2d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_game_date', 'game', ['date'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_game_date', table_name='game')
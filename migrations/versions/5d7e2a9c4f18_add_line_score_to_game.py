@@ -0,0 +1,44 @@
+"""Add denormalized line score to game
+
+Revision ID: 5d7e2a9c4f18
+Revises: 9c4d1e7b2a56
+Create Date: 2026-10-18 04:12:53.402118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d7e2a9c4f18'
+down_revision = '9c4d1e7b2a56'
+branch_labels = None
+depends_on = None
+
+COLUMNS = ('team_runs', 'team_hits', 'team_errors', 'opponent_runs', 'opponent_hits', 'opponent_errors')
+
+
+def upgrade():
+    with op.batch_alter_table('game', schema=None) as batch_op:
+        for name in COLUMNS:
+            batch_op.add_column(sa.Column(name, sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill from the innings and at-bats already recorded
+    op.execute(
+        "UPDATE game SET "
+        "team_runs = (SELECT COALESCE(SUM(inning.team_runs), 0) FROM inning WHERE inning.game_id = game.id), "
+        "opponent_runs = (SELECT COALESCE(SUM(inning.opponent_runs), 0) FROM inning "
+        "WHERE inning.game_id = game.id), "
+        "team_hits = (SELECT COUNT(*) FROM at_bat JOIN inning ON at_bat.inning_id = inning.id "
+        "WHERE inning.game_id = game.id AND at_bat.result IN ('single', 'double', 'triple', 'home_run')), "
+        "opponent_errors = (SELECT COUNT(*) FROM at_bat JOIN inning ON at_bat.inning_id = inning.id "
+        "WHERE inning.game_id = game.id AND at_bat.result = 'error')"
+    )
+
+
+def downgrade():
+    # Recreating game would trip the foreign keys of inning and the others on
+    # SQLite; ALTER TABLE ... DROP COLUMN needs SQLite 3.35 or later
+    with op.batch_alter_table('game', schema=None, recreate='never') as batch_op:
+        for name in reversed(COLUMNS):
+            batch_op.drop_column(name)
@@ -0,0 +1,94 @@
+"""Add indexes and unique constraints for hot lookup paths
+
+Revision ID: 7f3a9c1e5b2d
+Revises: 0525b11b76bf
+Create Date: 2026-10-17 10:04:55.817230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7f3a9c1e5b2d'
+down_revision = '0525b11b76bf'
+branch_labels = None
+depends_on = None
+
+# game_stats counting columns as of this revision
+COUNT_COLUMNS = ('at_bats', 'hits', 'doubles', 'triples', 'home_runs', 'runs', 'rbis',
+                 'strikeouts', 'walks', 'stolen_bases', 'caught_stealing')
+
+
+def _duplicate_groups(bind, table, keys):
+    # (key values, lowest id) for every key seen on more than one row
+    key_columns = [table.c[key] for key in keys]
+    query = (sa.select(*key_columns, sa.func.min(table.c.id))
+             .where(*[column.isnot(None) for column in key_columns])
+             .group_by(*key_columns)
+             .having(sa.func.count() > 1))
+    return [(row[:-1], row[-1]) for row in bind.execute(query)]
+
+
+def _delete_others(bind, table, keys, values, keep_id):
+    bind.execute(sa.delete(table).where(
+        *[table.c[key] == value for key, value in zip(keys, values)], table.c.id != keep_id))
+
+
+def _merge_duplicate_game_stats(bind):
+    # Duplicate lines for a player in a game are folded into the lowest id
+    stats = sa.table('game_stats', sa.column('id'), sa.column('game_id'), sa.column('player_id'),
+                     *[sa.column(name) for name in COUNT_COLUMNS])
+    keys = ('game_id', 'player_id')
+    for values, keep_id in _duplicate_groups(bind, stats, keys):
+        match = [stats.c[key] == value for key, value in zip(keys, values)]
+        totals = bind.execute(sa.select(
+            *[sa.func.sum(sa.func.coalesce(stats.c[name], 0)) for name in COUNT_COLUMNS]
+        ).where(*match)).one()
+        bind.execute(sa.update(stats).where(stats.c.id == keep_id)
+                     .values(dict(zip(COUNT_COLUMNS, totals))))
+        _delete_others(bind, stats, keys, values, keep_id)
+
+
+def _delete_duplicate_batting_order(bind):
+    # Only one player can bat in a slot; the first one written is kept
+    order = sa.table('batting_order', sa.column('id'), sa.column('game_id'), sa.column('order_number'))
+    keys = ('game_id', 'order_number')
+    for values, keep_id in _duplicate_groups(bind, order, keys):
+        _delete_others(bind, order, keys, values, keep_id)
+
+
+def upgrade():
+    op.create_index('ix_team_user_id', 'team', ['user_id'], unique=False)
+    op.create_index('ix_player_team_id', 'player', ['team_id'], unique=False)
+    op.create_index('ix_game_team_id_date', 'game', ['team_id', 'date'], unique=False)
+    op.create_index('ix_inning_game_id_inning_number', 'inning', ['game_id', 'inning_number'], unique=False)
+    op.create_index('ix_at_bat_inning_id', 'at_bat', ['inning_id'], unique=False)
+    op.create_index('ix_at_bat_batter_id', 'at_bat', ['batter_id'], unique=False)
+    op.create_index('ix_out_at_bat_id', 'out', ['at_bat_id'], unique=False)
+    op.create_index('ix_steal_at_bat_id', 'steal', ['at_bat_id'], unique=False)
+    op.create_index('ix_game_stats_player_id', 'game_stats', ['player_id'], unique=False)
+    # Rows the new unique constraints would reject
+    bind = op.get_bind()
+    _merge_duplicate_game_stats(bind)
+    _delete_duplicate_batting_order(bind)
+    with op.batch_alter_table('game_stats', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_game_stats_game_id_player_id', ['game_id', 'player_id'])
+    with op.batch_alter_table('batting_order', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_batting_order_game_id_order_number', ['game_id', 'order_number'])
+
+
+def downgrade():
+    with op.batch_alter_table('batting_order', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_batting_order_game_id_order_number', type_='unique')
+    with op.batch_alter_table('game_stats', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_game_stats_game_id_player_id', type_='unique')
+    op.drop_index('ix_game_stats_player_id', table_name='game_stats')
+    op.drop_index('ix_steal_at_bat_id', table_name='steal')
+    op.drop_index('ix_out_at_bat_id', table_name='out')
+    op.drop_index('ix_at_bat_batter_id', table_name='at_bat')
+    op.drop_index('ix_at_bat_inning_id', table_name='at_bat')
+    op.drop_index('ix_inning_game_id_inning_number', table_name='inning')
+    op.drop_index('ix_game_team_id_date', table_name='game')
+    op.drop_index('ix_player_team_id', table_name='player')
+    op.drop_index('ix_team_user_id', table_name='team')
@@ -0,0 +1,26 @@
+"""Add packed pitch sequence to at_bat
+
+Revision ID: 9c4d1e7b2a56
+Revises: 3b8e2f6a9d41
+Create Date: 2026-10-18 02:47:12.402118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4d1e7b2a56'
+down_revision = '3b8e2f6a9d41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('at_bat', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('pitches', sa.LargeBinary(length=16), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('at_bat', schema=None) as batch_op:
+        batch_op.drop_column('pitches')
@@ -0,0 +1,31 @@
+"""Extend team and player lookup indexes with name for keyset pages
+
+Revision ID: a4c8e1f6d2b3
+Revises: 5d7e2a9c4f18
+Create Date: 2026-10-18 05:02:11.918204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c8e1f6d2b3'
+down_revision = '5d7e2a9c4f18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The wider indexes still serve the plain user_id/team_id lookups
+    op.create_index('ix_team_user_id_name', 'team', ['user_id', 'name'], unique=False)
+    op.drop_index('ix_team_user_id', table_name='team')
+    op.create_index('ix_player_team_id_name', 'player', ['team_id', 'name'], unique=False)
+    op.drop_index('ix_player_team_id', table_name='player')
+
+
+def downgrade():
+    op.create_index('ix_player_team_id', 'player', ['team_id'], unique=False)
+    op.drop_index('ix_player_team_id_name', table_name='player')
+    op.create_index('ix_team_user_id', 'team', ['user_id'], unique=False)
+    op.drop_index('ix_team_user_id_name', table_name='team')
@@ -0,0 +1,28 @@
+"""Add sequence to out and steal
+
+Revision ID: b5e9d2c7a4f1
+Revises: e7b1c3d9f5a2
+Create Date: 2026-10-18 14:12:05.218734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e9d2c7a4f1'
+down_revision = 'e7b1c3d9f5a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('out', 'steal'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('sequence', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    for table in ('steal', 'out'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('sequence')
@@ -0,0 +1,28 @@
+"""Add write-behind checkpoint table
+
+Revision ID: e7b1c3d9f5a2
+Revises: a4c8e1f6d2b3
+Create Date: 2026-10-18 09:41:27.530164
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b1c3d9f5a2'
+down_revision = 'a4c8e1f6d2b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('write_behind_checkpoint',
+    sa.Column('journal', sa.String(length=255), nullable=False),
+    sa.Column('sequence', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('journal')
+    )
+
+
+def downgrade():
+    op.drop_table('write_behind_checkpoint')
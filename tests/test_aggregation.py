@@ -0,0 +1,178 @@
+import random
+import pytest
+from app import create_app, db
+from config import TestingConfig
+from app.aggregation import DERIVED_COLUMNS, DERIVED_LINE_SCORE_COLUMNS, compute_game_totals, compute_line_score
+from app.crud import (
+    create_user, create_team, create_player, create_game, get_game_stats,
+    create_game_stats, update_game_stats, recount_game_stats,
+    create_inning, delete_inning, create_at_bat, delete_at_bat, create_out, delete_out,
+    create_steal, delete_steal, unit_of_work, update_inning, update_game, get_games_by_team
+)
+from app.models import Game, GameStats
+from datetime import datetime
+from sqlalchemy import event
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def _setup_game(player_count=3):
+    user = create_user('testuser', 'test@example.com', 'password123')
+    team = create_team('Test Team', user.id)
+    players = [create_player(f'Player {i}', team.id, i) for i in range(player_count)]
+    game = create_game(datetime.utcnow(), 'Opponent Team', team.id)
+    return game, players
+
+def _snapshot(game_id):
+    db.session.expire_all()
+    return {
+        stats.player_id: {name: getattr(stats, name) for name in DERIVED_COLUMNS + ('runs',)}
+        for stats in GameStats.query.filter_by(game_id=game_id).all()
+    }
+
+def _line_score(game_id):
+    game = db.session.get(Game, game_id)
+    db.session.refresh(game)
+    return {name: getattr(game, name) for name in DERIVED_LINE_SCORE_COLUMNS}
+
+def test_incremental_updates(app):
+    with app.app_context():
+        game, (batter, runner, _) = _setup_game()
+        inning = create_inning(game.id, 1)
+
+        single = create_at_bat(inning.id, batter.id, 'single', rbis=1)
+        stats = get_game_stats(game.id, batter.id)
+        assert (stats.at_bats, stats.hits, stats.rbis) == (1, 1, 1)
+
+        walk = create_at_bat(inning.id, runner.id, 'walk')
+        steal = create_steal(walk.id, runner.id, 1, 2, True)
+        create_steal(walk.id, runner.id, 2, 3, False)
+        strikeout = create_at_bat(inning.id, batter.id, 'strikeout')
+        create_out(strikeout.id, batter.id, 'strikeout')
+
+        runner_stats = get_game_stats(game.id, runner.id)
+        assert (runner_stats.at_bats, runner_stats.walks) == (0, 1)
+        assert (runner_stats.stolen_bases, runner_stats.caught_stealing) == (1, 1)
+        assert get_game_stats(game.id, batter.id).strikeouts == 1
+
+        # Reversing events subtracts exactly what they added
+        assert delete_steal(steal.id)
+        assert get_game_stats(game.id, runner.id).stolen_bases == 0
+        assert delete_at_bat(strikeout.id)
+        stats = get_game_stats(game.id, batter.id)
+        assert (stats.at_bats, stats.strikeouts) == (1, 0)
+        assert delete_at_bat(single.id)
+        stats = get_game_stats(game.id, batter.id)
+        assert (stats.at_bats, stats.hits, stats.rbis) == (0, 0, 0)
+
+        # Deleting an inning reverses everything recorded in it
+        assert delete_inning(inning.id)
+        runner_stats = get_game_stats(game.id, runner.id)
+        assert (runner_stats.walks, runner_stats.caught_stealing) == (0, 0)
+        assert not delete_inning(inning.id)
+
+def test_incremental_matches_rebuild(app):
+    rng = random.Random(20250506)
+    results = ['single', 'double', 'triple', 'home_run', 'walk', 'strikeout',
+               'groundout', 'flyout', 'hit_by_pitch', 'sacrifice_fly']
+    with app.app_context():
+        game, players = _setup_game(9)
+        create_game_stats(game.id, players[0].id)
+        update_game_stats(game.id, players[0].id, {'runs': 2})
+        at_bats, outs, steals = [], [], []
+        for inning_number in range(1, 8):
+            inning = create_inning(game.id, inning_number)
+            for _ in range(rng.randint(3, 8)):
+                batter = rng.choice(players)
+                result = rng.choice(results)
+                at_bat = create_at_bat(inning.id, batter.id, result, rbis=rng.randint(0, 2))
+                at_bats.append(at_bat)
+                if result in ('strikeout', 'groundout', 'flyout'):
+                    outs.append(create_out(at_bat.id, batter.id, result, fielder_id=None))
+                if rng.random() < 0.3:
+                    steals.append(create_steal(at_bat.id, rng.choice(players).id, 1, 2, rng.random() < 0.7))
+
+        # Reverse a random sample of events, some inside one unit of work
+        with unit_of_work():
+            for out in rng.sample(outs, len(outs) // 4):
+                delete_out(out.id)
+        for steal in rng.sample(steals, len(steals) // 3):
+            delete_steal(steal.id)
+        for at_bat in rng.sample(at_bats, len(at_bats) // 5):
+            delete_at_bat(at_bat.id)
+
+        incremental = _snapshot(game.id)
+        line_score = _line_score(game.id)
+        recount_game_stats(game.id)
+        rebuilt = _snapshot(game.id)
+        assert incremental == rebuilt
+        assert line_score == _line_score(game.id) == compute_line_score(game.id)
+        assert rebuilt[players[0].id]['runs'] == 2
+
+        for player_id, totals in compute_game_totals(game.id).items():
+            assert {name: rebuilt[player_id][name] for name in DERIVED_COLUMNS} == totals
+
+def test_rebuild_repairs_drift(app):
+    with app.app_context():
+        game, (batter, _, _) = _setup_game()
+        inning = create_inning(game.id, 1)
+        create_at_bat(inning.id, batter.id, 'double', rbis=2)
+        create_at_bat(inning.id, batter.id, 'flyout')
+
+        update_game_stats(game.id, batter.id, {'hits': 7, 'at_bats': 0})
+        recount_game_stats(game.id)
+        stats = get_game_stats(game.id, batter.id)
+        assert (stats.at_bats, stats.hits, stats.rbis) == (2, 1, 2)
+
+def test_line_score_follows_innings_and_at_bats(app):
+    with app.app_context():
+        game, (batter, runner, _) = _setup_game()
+        first = create_inning(game.id, 1)
+        second = create_inning(game.id, 2)
+        create_at_bat(first.id, batter.id, 'single')
+        create_at_bat(first.id, runner.id, 'error')
+        homer = create_at_bat(first.id, batter.id, 'home_run', rbis=3)
+        update_inning(first.id, {'team_runs': 3, 'opponent_runs': 1})
+        create_at_bat(second.id, runner.id, 'double')
+        update_inning(second.id, {'opponent_runs': 2})
+        update_game(game.id, {'opponent_hits': 6, 'team_errors': 1})
+        assert _line_score(game.id) == {'team_runs': 3, 'team_hits': 3, 'opponent_runs': 3, 'opponent_errors': 1}
+
+        delete_at_bat(homer.id)
+        update_inning(first.id, {'team_runs': 0})
+        delete_inning(second.id)
+        assert _line_score(game.id) == {'team_runs': 0, 'team_hits': 1, 'opponent_runs': 1, 'opponent_errors': 1}
+        assert _line_score(game.id) == compute_line_score(game.id)
+        assert (game.opponent_hits, game.team_errors) == (6, 1)
+
+        with pytest.raises(RuntimeError):
+            with unit_of_work():
+                create_at_bat(first.id, batter.id, 'triple')
+                update_inning(first.id, {'team_runs': 4})
+                raise RuntimeError('abandoned')
+        assert _line_score(game.id) == compute_line_score(game.id)
+
+def test_schedule_reads_only_games(app):
+    with app.app_context():
+        game, (batter, _, _) = _setup_game()
+        inning = create_inning(game.id, 1)
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+
+        assert get_games_by_team(game.team_id)[0].team_hits == 0
+        create_at_bat(inning.id, batter.id, 'double')
+        update_inning(inning.id, {'team_runs': 1})
+        db.session.remove()
+        del statements[:]
+        (listed,) = get_games_by_team(game.team_id)
+
+        assert (listed.team_runs, listed.team_hits, listed.opponent_runs) == (1, 1, 0)
+        assert len(statements) == 1
+        assert 'FROM game' in statements[0] and 'inning' not in statements[0]
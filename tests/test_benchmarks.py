@@ -0,0 +1,35 @@
+import inspect
+import io
+from app import crud
+from benchmarks import suite
+
+def _public_crud_functions():
+    return {
+        name for name, value in vars(crud).items()
+        if inspect.isfunction(value) and value.__module__ == crud.__name__
+        and not name.startswith('_') and name not in ('unit_of_work', 'in_unit_of_work')
+    }
+
+def test_suite_covers_every_crud_function():
+    # build_cases only closes over the fixture, so placeholder ids are enough
+    fx = suite.Fixture(*([1] * len(suite.Fixture._fields)))
+    names = {case.name for case in suite.build_cases(fx)}
+    assert {f'crud.{name}' for name in _public_crud_functions()} <= names
+
+def test_suite_runs_and_records_results():
+    out = io.StringIO()
+    results = suite.run(['small'], pattern='crud.get_team*', samples=3, warmup=1, out=out)
+
+    assert set(results) == {'small/crud.get_team_by_id', 'small/crud.get_teams_by_user'}
+    for result in results.values():
+        assert result['repeat'] == 3
+        assert 0 < result['min'] <= result['median'] <= result['max']
+    assert 'crud.get_team_by_id' in out.getvalue()
+
+def test_compare_flags_only_regressions_past_threshold():
+    baseline = {'a': {'median': 1.0}, 'b': {'median': 1.0}, 'c': {'median': 1e-6}, 'gone': {'median': 1.0}}
+    results = {'a': {'median': 1.05}, 'b': {'median': 1.5}, 'c': {'median': 3e-6}, 'new': {'median': 9.0}}
+
+    assert suite.compare(baseline, results, threshold=10) == ['b', 'c']
+    assert suite.compare(baseline, results, threshold=10, min_delta=5e-6) == ['b']
+    assert suite.compare(baseline, results, threshold=60) == ['c']
@@ -0,0 +1,100 @@
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from config import TestingConfig
+from app.box_score import load_box_score
+from app.crud import (
+    create_user, create_team, bulk_create_players, get_players_by_team, create_game,
+    set_batting_order, create_inning, update_inning, create_at_bat, create_out, create_steal,
+    unit_of_work
+)
+from datetime import datetime
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _count(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._count)
+
+def _play_game(innings, at_bats_per_inning):
+    user = create_user('testuser', 'test@example.com', 'password123')
+    team = create_team('Test Team', user.id)
+    bulk_create_players(team.id, [{'name': f'Player {i}', 'number': i} for i in range(10)])
+    players = get_players_by_team(team.id)
+    game = create_game(datetime(2025, 6, 1), 'Opponent Team', team.id)
+    set_batting_order(game.id, [p.id for p in players])
+    with unit_of_work():
+        for number in range(1, innings + 1):
+            inning = create_inning(game.id, number)
+            update_inning(inning.id, {'team_runs': number % 3, 'opponent_runs': 1})
+            for k in range(at_bats_per_inning):
+                batter = players[(number * at_bats_per_inning + k) % len(players)]
+                if k % 3 == 0:
+                    at_bat = create_at_bat(inning.id, batter.id, 'strikeout', strikes=3)
+                    create_out(at_bat.id, batter.id, 'strikeout')
+                else:
+                    at_bat = create_at_bat(inning.id, batter.id, 'single', rbis=k % 2, balls=1)
+                    create_steal(at_bat.id, batter.id, 1, 2, k % 2 == 0)
+    db.session.expire_all()
+    return game, players
+
+def test_box_score_contents(app):
+    with app.app_context():
+        game, players = _play_game(innings=7, at_bats_per_inning=4)
+        box = load_box_score(game.id)
+
+        assert box.game_id == game.id
+        assert box.team_name == 'Test Team'
+        assert box.opponent == 'Opponent Team'
+        assert [inning.inning_number for inning in box.innings] == list(range(1, 8))
+        assert box.team_runs == sum(n % 3 for n in range(1, 8))
+        assert box.opponent_runs == 7
+        assert [slot.player_id for slot in box.lineup] == [p.id for p in players]
+
+        first = box.innings[0]
+        assert len(first.at_bats) == 4
+        strikeout, single = first.at_bats[0], first.at_bats[1]
+        assert strikeout.result == 'strikeout'
+        assert [out.out_type for out in strikeout.outs] == ['strikeout']
+        assert strikeout.steals == ()
+        assert single.batter_name is not None
+        assert single.steals[0].to_base == 2
+
+        by_player = {line.player_id: line for line in box.stats}
+        assert sum(line.at_bats for line in by_player.values()) == 28
+        assert sum(line.strikeouts for line in by_player.values()) == sum(
+            1 for inning in box.innings for ab in inning.at_bats if ab.result == 'strikeout')
+
+        with pytest.raises(AttributeError):
+            box.team_runs = 99
+        assert load_box_score(game.id + 1000) is None
+
+@pytest.mark.parametrize('innings,at_bats_per_inning', [(1, 1), (7, 6), (12, 12)])
+def test_box_score_query_count_is_fixed(app, innings, at_bats_per_inning):
+    with app.app_context():
+        game, _ = _play_game(innings, at_bats_per_inning)
+        game_id = game.id
+        db.session.expire_all()
+        with QueryCounter(db.engine) as counter:
+            box = load_box_score(game_id)
+        assert len(box.innings) == innings
+        assert counter.count == 7
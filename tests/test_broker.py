@@ -0,0 +1,176 @@
+import json
+import threading
+import pytest
+from app import create_app, db, broker
+from config import TestingConfig
+from app.broker import Broker
+from app.crud import create_user, create_team, create_player, create_game, create_inning, create_at_bat, \
+    update_inning, delete_game
+from app.game_state import GameState
+from datetime import datetime
+from sqlalchemy import event
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def game(app):
+    user = create_user('testuser', 'test@example.com', 'password123')
+    team = create_team('Test Team', user.id)
+    players = [create_player(f'Player {n}', team.id, n).id for n in range(1, 10)]
+    game = create_game(datetime(2025, 5, 1, 18), 'Rivals', team.id)
+    return game.id, players
+
+def _frames(text):
+    frames = []
+    for block in text.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':'))
+        if 'event' in fields:
+            frames.append((fields['event'], json.loads(fields['data'])))
+    return frames
+
+def test_fan_out_keeps_order_and_bounds_buffers():
+    feed = Broker()
+    fast = feed.subscribe(1)
+    slow = feed.subscribe(1, buffer_size=3)
+    other = feed.subscribe(2)
+
+    for n in range(5):
+        assert feed.publish(1, 'state', {'n': n}) == 2
+    assert [_frames(frame)[0][1]['n'] for frame in fast.drain()] == [0, 1, 2, 3, 4]
+    assert [_frames(frame)[0][1]['n'] for frame in slow.drain()] == [2, 3, 4]
+    assert slow.dropped == 2
+    assert other.get(timeout=0) is None
+
+    # Late subscribers start from the latest state
+    late = feed.subscribe(1)
+    assert _frames(late.get(timeout=0)) == [('state', {'n': 4})]
+    assert feed.stats()['subscribers'] == 4
+
+    feed.unsubscribe(late)
+    assert late.closed and late.get(timeout=1) is None
+    assert feed.subscriber_count(1) == 2
+
+def test_latest_loads_once_under_concurrency():
+    feed = Broker()
+    calls = []
+    gate = threading.Event()
+
+    def loader():
+        calls.append(1)
+        gate.wait(1)
+        return {'loaded': True}
+
+    viewer = feed.subscribe(7)
+    threads = [threading.Thread(target=feed.latest, args=(7, loader)) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    gate.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert _frames(feed.latest(7)) == [('state', {'loaded': True})]
+    assert [_frames(frame) for frame in viewer.drain()] == [[('state', {'loaded': True})]]
+    assert feed.latest(8, lambda: None) is None
+
+def test_state_is_kept_only_while_watched():
+    feed = Broker()
+    feed.publish(1, 'state', {'n': 1})
+    assert feed.latest(1) is None
+
+    viewer = feed.subscribe(1)
+    feed.publish(1, 'state', {'n': 2})
+    assert _frames(feed.latest(1)) == [('state', {'n': 2})]
+    feed.invalidate(1)
+    assert _frames(feed.latest(1, lambda: {'n': 3})) == [('state', {'n': 3})]
+    assert [_frames(frame)[0][1]['n'] for frame in viewer.drain()] == [2, 3]
+
+    feed.unsubscribe(viewer)
+    assert feed.latest(1) is None
+    assert (feed._latest, feed._sequence, feed._loading) == ({}, {}, {})
+
+def test_feed_streams_flushed_plays(app, game):
+    game_id, lineup = game
+    client = app.test_client()
+    response = client.get(f'/games/{game_id}/feed', buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    chunks = (chunk.decode() for chunk in response.response)
+    assert next(chunks).startswith('retry:')
+    assert _frames(next(chunks))[0][1]['inning'] == 1
+
+    state = GameState(game_id, lineup)
+    state.at_bat('home_run')
+    state.flush()
+    at_bat = _frames(next(chunks))
+    scoreboard = _frames(next(chunks))
+    assert at_bat[0][0] == 'at_bat' and at_bat[0][1]['result'] == 'home_run'
+    assert scoreboard[0][0] == 'state' and scoreboard[0][1]['team_runs'] == 1
+
+    response.close()
+    assert broker.subscriber_count(game_id) == 0
+    assert client.get('/games/999/feed').status_code == 404
+
+def test_crud_writes_refresh_the_feed(app, game):
+    game_id, lineup = game
+    client = app.test_client()
+    first = client.get(f'/games/{game_id}/feed', buffered=False)
+    chunks = (chunk.decode() for chunk in first.response)
+    next(chunks)
+    assert _frames(next(chunks))[0][1]['team_runs'] == 0
+
+    # Written through crud rather than GameState, so nothing is published
+    inning = create_inning(game_id, 1)
+    create_at_bat(inning.id, lineup[0], 'home_run', rbis=1)
+    update_inning(inning.id, {'team_runs': 1})
+    second = client.get(f'/games/{game_id}/feed', buffered=False)
+    fresh = (chunk.decode() for chunk in second.response)
+    next(fresh)
+    assert _frames(next(fresh))[0][1]['team_runs'] == 1
+    # The viewer already watching gets the reloaded scoreboard too
+    assert _frames(next(chunks))[0][1]['team_runs'] == 1
+
+    first.close()
+    second.close()
+    delete_game(game_id)
+    assert client.get(f'/games/{game_id}/feed').status_code == 404
+    assert broker.stats()['topics'] == 0
+
+def test_db_reads_do_not_grow_with_viewers(app, game):
+    game_id, lineup = game
+    statements = []
+    event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    client = app.test_client()
+    state = GameState(game_id, lineup)
+
+    # Statements issued while viewers connect and read; the scorekeeper's
+    # own writes are left out
+    reads = {}
+    for viewers in (1, 25, 100):
+        broker.init_app(app)
+        del statements[:]
+        responses = [client.get(f'/games/{game_id}/feed', buffered=False) for _ in range(viewers)]
+        streams = [(chunk.decode() for chunk in response.response) for response in responses]
+        for stream in streams:
+            next(stream)
+            next(stream)
+        connecting = len(statements)
+        for result in ('single', 'double', 'groundout'):
+            state.at_bat(result)
+            state.flush()
+        del statements[connecting:]
+        for stream in streams:
+            assert [_frames(next(stream))[0][0] for _ in range(6)] == ['at_bat', 'state'] * 3
+        for response in responses:
+            response.close()
+        reads[viewers] = len(statements)
+
+    # One box score load for the first viewer, nothing for the rest
+    assert reads[1] == reads[25] == reads[100] == 7
@@ -0,0 +1,191 @@
+import pytest
+from sqlalchemy import event
+from app import create_app, db, cache
+from config import TestingConfig
+from app.cache import MISSING, CacheBackend, LRUCache, RedisCache, NullCache
+from app.crud import (
+    create_user, create_team, get_team_by_id, update_team, delete_team,
+    create_player, bulk_create_players, get_players_by_team, update_player, delete_player,
+    create_game, get_games_by_team, update_game, delete_game, unit_of_work
+)
+from datetime import datetime
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def scan_iter(self, match):
+        return [key for key in self.data if key.startswith(match.rstrip('*'))]
+
+def _count_queries(fn):
+    statements = []
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    return result, len(statements)
+
+# Backend Tests
+def test_lru_eviction_and_stats():
+    lru = LRUCache(maxsize=2, default_ttl=None)
+    lru.set('a', 1)
+    lru.set('b', 2)
+    assert lru.get('a') == 1
+    lru.set('c', 3)  # evicts 'b', the least recently used
+    assert lru.get('b') is MISSING
+    assert lru.get('c') == 3
+    assert lru.stats() == {'backend': 'LRUCache', 'hits': 2, 'misses': 1,
+                           'hit_rate': pytest.approx(2 / 3), 'size': 2}
+    lru.delete('a', 'missing')
+    assert len(lru) == 1
+    lru.clear()
+    assert len(lru) == 0
+
+def test_lru_ttl():
+    clock = FakeClock()
+    lru = LRUCache(maxsize=10, default_ttl=60, clock=clock)
+    lru.set('short', 'x', ttl=5)
+    lru.set('long', 'y')
+    clock.now = 10
+    assert lru.get('short') is MISSING
+    assert lru.get('long') == 'y'
+    clock.now = 61
+    assert lru.get('long') is MISSING
+
+def test_falsy_values_are_cached():
+    lru = LRUCache()
+    lru.set('empty', [])
+    assert lru.get('empty') == []
+    assert NullCache().get('anything') is MISSING
+
+def test_backends_must_implement_the_interface():
+    class PartialCache(CacheBackend):
+        def get(self, key):
+            return MISSING
+
+    with pytest.raises(TypeError):
+        PartialCache()
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+def test_redis_backend_shares_interface():
+    redis = RedisCache(client=FakeRedis(), key_prefix='t:')
+    assert redis.get('team:1') is MISSING
+    redis.set('team:1', {'id': 1, 'name': 'A'})
+    assert redis.get('team:1') == {'id': 1, 'name': 'A'}
+    redis.delete('team:1')
+    assert redis.get('team:1') is MISSING
+    assert redis.stats()['hits'] == 1
+    assert redis.stats()['misses'] == 2
+
+# Read-through crud Tests
+def test_team_reads_hit_cache(app):
+    with app.app_context():
+        user = create_user('testuser', 'test@example.com', 'password123')
+        team = create_team('Test Team', user.id)
+        team_id = team.id
+        db.session.remove()
+
+        assert get_team_by_id(team_id).name == 'Test Team'
+        db.session.remove()
+        team, queries = _count_queries(lambda: get_team_by_id(team_id))
+        assert team.name == 'Test Team'
+        assert queries == 0
+        assert cache.stats()['hits'] == 1
+
+        update_team(team_id, {'name': 'Renamed'})
+        db.session.remove()
+        assert get_team_by_id(team_id).name == 'Renamed'
+
+        assert delete_team(team_id)
+        assert get_team_by_id(team_id) is None
+
+def test_roster_invalidation(app):
+    with app.app_context():
+        user = create_user('testuser', 'test@example.com', 'password123')
+        team = create_team('Test Team', user.id)
+        team_id = team.id
+        player = create_player('Player 1', team_id, 1)
+        player_id = player.id
+        assert len(get_players_by_team(team_id)) == 1
+        db.session.remove()
+        _, queries = _count_queries(lambda: get_players_by_team(team_id))
+        assert queries == 0
+
+        create_player('Player 2', team_id, 2)
+        assert len(get_players_by_team(team_id)) == 2
+        bulk_create_players(team_id, [{'name': 'Player 3'}, {'name': 'Player 4'}])
+        assert len(get_players_by_team(team_id)) == 4
+
+        update_player(player_id, {'number': 11})
+        db.session.remove()
+        assert {p.number for p in get_players_by_team(team_id)} == {11, 2, None}
+
+        assert delete_player(player_id)
+        assert len(get_players_by_team(team_id)) == 3
+
+def test_schedule_invalidation(app):
+    with app.app_context():
+        user = create_user('testuser', 'test@example.com', 'password123')
+        team = create_team('Test Team', user.id)
+        team_id = team.id
+        other_id = create_team('Other Team', user.id).id
+        game = create_game(datetime(2025, 6, 1), 'Opponent', team_id)
+        game_id = game.id
+        assert [g.opponent for g in get_games_by_team(team_id)] == ['Opponent']
+        assert get_games_by_team(other_id) == []
+
+        update_game(game_id, {'opponent': 'Rival'})
+        db.session.remove()
+        assert [g.opponent for g in get_games_by_team(team_id)] == ['Rival']
+
+        # Writes to one team leave other teams' entries alone
+        create_game(datetime(2025, 6, 2), 'Other Opponent', other_id)
+        _, queries = _count_queries(lambda: get_games_by_team(team_id))
+        assert queries == 0
+
+        assert delete_game(game_id)
+        assert get_games_by_team(team_id) == []
+
+def test_unit_of_work_bypasses_and_invalidates(app):
+    with app.app_context():
+        user = create_user('testuser', 'test@example.com', 'password123')
+        team = create_team('Test Team', user.id)
+        team_id = team.id
+        assert get_players_by_team(team_id) == []
+        with unit_of_work():
+            create_player('Player 1', team_id, 1)
+            assert len(get_players_by_team(team_id)) == 1
+            # Simulate a concurrent reader caching pre-commit data
+            cache.set(f'team:{team_id}:players', [])
+        assert len(get_players_by_team(team_id)) == 1
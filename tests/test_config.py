@@ -0,0 +1,40 @@
+import pytest
+from sqlalchemy import text
+from app import create_app, db
+from config import Config, SQLiteConfig, TestingConfig
+
+def _pragma(name):
+    return db.session.execute(text(f'PRAGMA {name}')).scalar()
+
+def test_create_app_selects_config_by_name(monkeypatch):
+    assert create_app('testing').config['SQLALCHEMY_DATABASE_URI'] == 'sqlite://'
+    monkeypatch.setenv('SOFTBALL_CONFIG', 'testing')
+    assert create_app().config['TESTING']
+    with pytest.raises(KeyError):
+        create_app('oracle')
+
+def test_sqlite_file_pragmas(tmp_path):
+    class FileConfig(SQLiteConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path}/softball.db'
+
+    app = create_app(FileConfig)
+    with app.app_context():
+        assert _pragma('journal_mode') == 'wal'
+        assert _pragma('synchronous') == 1  # NORMAL
+        assert _pragma('cache_size') == -64000
+        assert _pragma('foreign_keys') == 1
+        db.session.remove()
+        db.engine.dispose()
+
+def test_testing_config_is_in_memory():
+    app = create_app(TestingConfig)
+    assert app.config['TESTING']
+    assert 'poolclass' not in app.config['SQLALCHEMY_ENGINE_OPTIONS']
+    with app.app_context():
+        db.create_all()
+        assert _pragma('foreign_keys') == 1
+        assert db.session.execute(text('SELECT count(*) FROM user')).scalar() == 0
+
+def test_mysql_config_keeps_pool_options():
+    assert Config.engine_options()['pool_pre_ping'] is True
+    assert SQLiteConfig.engine_options() == {}
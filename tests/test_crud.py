@@ -1,22 +1,23 @@
 import pytest
 from app import create_app, db
+from config import TestingConfig
 from app.models import User, Team, Player, Game, GameStats, BattingOrder
 from app.crud import (
     create_user, get_user_by_id, get_user_by_username, get_user_by_email,
     update_user, delete_user,
     create_team, get_team_by_id, get_teams_by_user, update_team, delete_team,
-    create_player, get_player_by_id, get_players_by_team, update_player, delete_player,
+    create_player, bulk_create_players, get_player_by_id, get_players_by_team, update_player, delete_player,
     create_game, get_game_by_id, get_games_by_team, update_game, delete_game,
     create_game_stats, get_game_stats, update_game_stats,
-    create_batting_order, get_batting_order, update_batting_order, delete_batting_order
+    create_batting_order, set_batting_order, get_batting_order, update_batting_order, delete_batting_order,
+    unit_of_work, in_unit_of_work, page_games_by_team, page_players_by_team, page_teams_by_user
 )
 from datetime import datetime
+from sqlalchemy import event, func, select
 
 @pytest.fixture
 def app():
-    app = create_app()
-    app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = app.config['SQLALCHEMY_DATABASE_URI'] + '_test'
+    app = create_app(TestingConfig)
     
     with app.app_context():
         db.create_all()
@@ -214,4 +215,145 @@ def test_batting_order_crud(app):
 
         # Delete
         assert delete_batting_order(batting_order.id)
-        assert len(get_batting_order(game.id)) == 0 
\ No newline at end of file
+        assert len(get_batting_order(game.id)) == 0 
+
+# Unit of work Tests
+def _visible_teams(user_id):
+    # Read on a connection of its own, outside the session's transaction
+    with db.engine.connect() as other:
+        return other.execute(select(func.count()).select_from(Team).where(Team.user_id == user_id)).scalar()
+
+def test_unit_of_work_commits_once(tmp_path):
+    # A file database, so the second connection is really a different one
+    class FileConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path}/softball.db'
+
+    app = create_app(FileConfig)
+    with app.app_context():
+        db.create_all()
+        user = create_user('testuser', 'test@example.com', 'password123')
+        commits = []
+        event.listen(db.session(), 'after_commit', commits.append)
+        with unit_of_work():
+            assert in_unit_of_work()
+            team = create_team('Test Team', user.id)
+            assert team.id is not None
+            players = [create_player(f'Player {i}', team.id, i) for i in range(15)]
+            game = create_game(datetime.utcnow(), 'Opponent Team', team.id)
+            for order_number, player in enumerate(players[:10], start=1):
+                create_batting_order(game.id, player.id, order_number)
+            with unit_of_work():
+                update_team(team.id, {'name': 'Renamed Team'})
+            # Nothing is visible outside the transaction until the outer block exits
+            assert db.session.info['crud_unit_of_work_depth'] == 1
+            assert commits == []
+            assert _visible_teams(user.id) == 0
+        assert not in_unit_of_work()
+        assert len(commits) == 1
+        assert _visible_teams(user.id) == 1
+
+        db.session.expire_all()
+        assert get_team_by_id(team.id).name == 'Renamed Team'
+        assert len(get_players_by_team(team.id)) == 15
+        assert [bo.player_id for bo in get_batting_order(game.id)] == [p.id for p in players[:10]]
+        db.session.remove()
+        db.engine.dispose()
+
+def test_unit_of_work_rolls_back(app):
+    with app.app_context():
+        user = create_user('testuser', 'test@example.com', 'password123')
+        with pytest.raises(RuntimeError):
+            with unit_of_work():
+                team = create_team('Test Team', user.id)
+                create_player('Test Player', team.id)
+                raise RuntimeError('abort')
+        assert not in_unit_of_work()
+        assert get_teams_by_user(user.id) == []
+
+# Bulk roster and lineup Tests
+def test_bulk_create_players(app):
+    with app.app_context():
+        user = create_user('testuser', 'test@example.com', 'password123')
+        team = create_team('Test Team', user.id)
+
+        count = bulk_create_players(team.id, [
+            {'name': f'Player {i}', 'number': i} for i in range(12)
+        ] + [{'name': 'No Number'}])
+        assert count == 13
+
+        players = get_players_by_team(team.id)
+        assert len(players) == 13
+        assert {p.number for p in players} == set(range(12)) | {None}
+        assert bulk_create_players(team.id, []) == 0
+
+def test_set_batting_order(app):
+    with app.app_context():
+        user = create_user('testuser', 'test@example.com', 'password123')
+        team = create_team('Test Team', user.id)
+        bulk_create_players(team.id, [{'name': f'Player {i}', 'number': i} for i in range(12)])
+        player_ids = [p.id for p in get_players_by_team(team.id)]
+        game = create_game(datetime.utcnow(), 'Opponent Team', team.id)
+
+        lineup = set_batting_order(game.id, player_ids[:10])
+        assert [bo.player_id for bo in lineup] == player_ids[:10]
+        assert [bo.order_number for bo in lineup] == list(range(1, 11))
+
+        # Swapping the lineup replaces every row
+        reordered = list(reversed(player_ids[2:]))
+        lineup = set_batting_order(game.id, reordered)
+        assert [bo.player_id for bo in lineup] == reordered
+        assert [bo.player_id for bo in get_batting_order(game.id)] == reordered
+
+        assert set_batting_order(game.id, []) == []
+
+def test_keyset_pages(app):
+    with app.app_context():
+        user = create_user('testuser', 'test@example.com', 'password123')
+        team = create_team('Test Team', user.id)
+        # Three games share each date, so the id breaks the ties
+        for n in range(10):
+            create_game(datetime(2025, 5, 1 + n // 3), f'Opponent {n}', team.id)
+        create_game(datetime(2025, 5, 1), 'Elsewhere', create_team('Other Team', user.id).id)
+
+        seen, after = [], None
+        while True:
+            page = page_games_by_team(team.id, after=after, limit=4)
+            assert all(isinstance(game, Game) for game in page.items)
+            seen.extend(page.items)
+            after = page.next_cursor
+            if after is None:
+                break
+        assert [len(seen), len(set(seen))] == [10, 10]
+        assert seen == get_games_by_team(team.id)
+        assert [(game.date, game.id) for game in seen] == sorted((game.date, game.id) for game in seen)
+
+        # Projections come back as plain rows, with the ordering columns added
+        page = page_games_by_team(team.id, limit=3, columns=['opponent', 'team_runs'])
+        assert page.items[0]._fields == ('opponent', 'team_runs', 'date', 'id')
+        assert page.next_cursor == (page.items[-1].date, page.items[-1].id)
+        rest = page_games_by_team(team.id, after=page.next_cursor, limit=100, columns=['opponent'])
+        assert [row.opponent for row in page.items + rest.items] == [game.opponent for game in seen]
+        assert rest.next_cursor is None
+
+        with pytest.raises(ValueError, match='unknown game columns: password'):
+            page_games_by_team(team.id, columns=['opponent', 'password'])
+        with pytest.raises(ValueError, match='limit'):
+            page_games_by_team(team.id, limit=0)
+
+def test_roster_and_team_pages_order_by_name(app):
+    with app.app_context():
+        user = create_user('testuser', 'test@example.com', 'password123')
+        teams = [create_team(name, user.id).id for name in ('Owls', 'Bats', 'Moths')]
+        bulk_create_players(teams[0], [{'name': name} for name in ('Cy', 'Al', 'Bo', 'Al')])
+
+        first = page_teams_by_user(user.id, limit=2, columns=['name'])
+        assert [row.name for row in first.items] == ['Bats', 'Moths']
+        assert [team.name for team in page_teams_by_user(user.id, after=first.next_cursor).items] == ['Owls']
+        assert [team.name for team in get_teams_by_user(user.id)] == ['Bats', 'Moths', 'Owls']
+
+        first = page_players_by_team(teams[0], limit=2)
+        second = page_players_by_team(teams[0], after=first.next_cursor, limit=2)
+        assert [player.name for player in first.items + second.items] == ['Al', 'Al', 'Bo', 'Cy']
+        assert first.items[0].id < first.items[1].id
+        assert second.next_cursor is None
+        assert first.items + second.items == get_players_by_team(teams[0])
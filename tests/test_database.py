@@ -6,6 +6,7 @@ import os
 # Load environment variables
 load_dotenv()
 
+@pytest.mark.skipif(not os.getenv('MYSQL_HOST'), reason='needs a live MySQL; set the MYSQL_* variables')
 def test_database_connection():
     """Test that we can connect to the database"""
     # Get individual connection parameters
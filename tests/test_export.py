@@ -0,0 +1,93 @@
+import io
+import json
+import pytest
+from app import create_app, db
+from config import TestingConfig
+from app.crud import create_user, create_team, bulk_create_players
+from app.export import EXPORT_COLUMNS, iter_partitions, write_export, export_response
+from app.generator import generate_league
+from app.models import Player, Game, AtBat
+from app.scorebook import import_scorebook, read_csv
+from sqlalchemy import select
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def league(app):
+    generate_league(teams=3, games_per_team=2, seed=11)
+
+def test_csv_export_streams_every_at_bat_in_order(league):
+    out = io.StringIO()
+    written = write_export(out, 'csv', partition_size=25)
+
+    rows = [row for _, row in read_csv(io.StringIO(out.getvalue()))]
+    assert written == len(rows) == AtBat.query.count()
+    assert list(rows[0]) == list(EXPORT_COLUMNS)
+    keys = [(row['date'], int(row['game_id']), int(row['inning']), int(row['at_bat_id'])) for row in rows]
+    assert keys == sorted(keys)
+    assert {row['event'] for row in rows} == {'at_bat'}
+
+def test_ndjson_export_and_filters(league):
+    team_id = db.session.execute(select(Game.team_id).order_by(Game.id)).scalars().first()
+    out = io.StringIO()
+    written = write_export(out, 'ndjson', team_id=team_id, season=2025)
+
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert written == len(lines) > 0
+    assert list(lines[0]) == list(EXPORT_COLUMNS)
+    assert lines[0]['date'].startswith('2025-')
+    team_games = {game.id for game in Game.query.filter_by(team_id=team_id)}
+    assert {line['game_id'] for line in lines} == team_games
+
+    assert write_export(io.StringIO(), 'ndjson', season=2019) == 0
+
+def test_partitions_are_bounded(league):
+    sizes = [len(partition) for partition in iter_partitions(partition_size=40)]
+    assert max(sizes) <= 40
+    assert sum(sizes) == AtBat.query.count()
+
+    with pytest.raises(ValueError):
+        write_export(io.StringIO(), 'xml')
+
+def test_export_response_is_streamed(app, league):
+    app.add_url_rule('/export.csv', 'export_csv', lambda: export_response('csv', season=2025))
+    response = app.test_client().get('/export.csv')
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'text/csv'
+    assert 'play-by-play-2025.csv' in response.headers['Content-Disposition']
+    assert response.get_data(as_text=True).count('\n') == AtBat.query.count() + 1
+
+def test_exported_csv_imports_into_another_database(app, league):
+    team_id = db.session.execute(select(Game.team_id).order_by(Game.id)).scalars().first()
+    roster = [{'name': name, 'number': number} for name, number in
+              db.session.execute(select(Player.name, Player.number).where(Player.team_id == team_id))]
+    exported = io.StringIO()
+    count = write_export(exported, 'csv', team_id=team_id)
+
+    other = create_app(TestingConfig)
+    with other.app_context():
+        db.create_all()
+        user = create_user('importer', 'importer@example.com', 'password123')
+        team = create_team('Imported', user.id)
+        bulk_create_players(team.id, roster)
+        report = import_scorebook(io.StringIO(exported.getvalue()), team.id, fmt='csv')
+        assert (report.games, report.at_bats) == (2, count)
+        db.session.remove()
+        db.drop_all()
+
+def test_export_plays_cli(app, league, tmp_path):
+    path = tmp_path / 'plays.ndjson'
+    result = app.test_cli_runner().invoke(args=['export-plays', str(path), '--format', 'ndjson'])
+
+    assert result.exit_code == 0, result.output
+    assert len(path.read_text().splitlines()) == AtBat.query.count()
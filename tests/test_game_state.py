@@ -0,0 +1,162 @@
+import pytest
+from app import create_app, db
+from config import TestingConfig
+from app.crud import create_user, create_team, create_player, create_game, get_game_stats, \
+    set_batting_order
+from app.aggregation import compute_game_totals
+from app.game_state import GameState, GameStateError, Event
+from app.models import Inning, AtBat, Out, Steal
+from datetime import datetime
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def game(app):
+    user = create_user('testuser', 'test@example.com', 'password123')
+    team = create_team('Test Team', user.id)
+    players = [create_player(f'Player {n}', team.id, n).id for n in range(1, 5)]
+    game = create_game(datetime(2025, 5, 1, 18), 'Rivals', team.id)
+    return game.id, players
+
+def test_count_walks_and_strikes_out(game):
+    game_id, lineup = game
+    state = GameState(game_id, lineup)
+
+    for pitch in ('ball', 'strike', 'ball', 'foul', 'foul', 'ball', 'ball'):
+        state.pitch(pitch)
+    assert state.bases == [lineup[0], None, None]
+    assert (state.balls, state.strikes, state.batter_id) == (0, 0, lineup[1])
+
+    for pitch in ('strike', 'foul', 'strike'):
+        state.pitch(pitch)
+    assert state.outs == 1
+    assert state.batter_id == lineup[2]
+
+    with pytest.raises(GameStateError):
+        state.pitch('slider')
+
+def test_runners_advance_and_score(game):
+    game_id, lineup = game
+    state = GameState(game_id, lineup)
+
+    state.at_bat('single')
+    state.at_bat('walk')
+    assert state.bases == [lineup[1], lineup[0], None]
+    state.at_bat('double')
+    assert state.bases == [None, lineup[2], lineup[1]]
+    assert state.team_runs == 1
+    state.at_bat('sacrifice_fly')
+    assert (state.team_runs, state.outs, state.bases) == (2, 1, [None, lineup[2], None])
+    state.steal(2)
+    state.steal(3)
+    assert (state.team_runs, state.bases) == (3, [None, None, None])
+    state.at_bat('sacrifice_fly')
+    assert state.outs == 2
+    assert state.pending[-1].values == (lineup[0], 'flyout', 1)
+
+    with pytest.raises(GameStateError):
+        state.steal(1)
+
+def test_three_outs_end_the_half(game):
+    game_id, lineup = game
+    state = GameState(game_id, lineup, team_bats_first=True)
+
+    state.at_bat('single')
+    state.steal(1, success=False)
+    state.at_bat('groundout')
+    state.at_bat('flyout')
+    assert (state.inning, state.half, state.outs, state.team_batting) == (1, 1, 0, False)
+
+    with pytest.raises(GameStateError):
+        state.at_bat('single')
+    state.opponent_scores(2)
+    state.end_half()
+    assert (state.inning, state.team_batting) == (2, True)
+    assert state.to_dict()['line_score'] == {'team': [0, 0], 'opponent': [2, 0]}
+
+def test_flush_writes_rows_through_crud(game):
+    game_id, lineup = game
+    state = GameState(game_id, lineup)
+    state.at_bat('single')
+    state.steal(1)
+    state.at_bat('home_run')
+    state.at_bat('strikeout')
+    assert AtBat.query.count() == 0
+
+    writes = state.flush()
+    assert [write.kind for write in writes] == ['inning', 'at_bat', 'steal', 'at_bat', 'at_bat', 'out']
+    assert all(write.row_id for write in writes)
+    assert state.flush() == []
+
+    inning = Inning.query.one()
+    assert (inning.inning_number, inning.team_runs) == (1, 2)
+    assert AtBat.query.count() == 3
+    assert Steal.query.one().at_bat_id == writes[1].row_id
+    assert Out.query.one().out_type == 'strikeout'
+    assert get_game_stats(game_id, lineup[1]).rbis == 2
+    assert compute_game_totals(game_id)[lineup[0]]['stolen_bases'] == 1
+
+    state.at_bat('groundout')
+    state.at_bat('groundout')
+    state.opponent_scores(1)
+    state.end_half()
+    state.flush()
+    assert Inning.query.count() == 2
+    assert db.session.get(Inning, writes[0].row_id).opponent_runs == 1
+
+def test_failed_flush_keeps_pending_writes(game):
+    game_id, lineup = game
+    state = GameState(game_id, [lineup[0], 999999])
+    state.at_bat('single')
+    state.at_bat('single')
+
+    with pytest.raises(Exception):
+        state.flush()
+    assert len(state.pending) == 3
+    assert Inning.query.count() == 0
+
+def test_restore_rebuilds_state(game):
+    game_id, lineup = game
+    state = GameState(game_id, lineup)
+    events = [Event('at_bat', result='double'), Event('at_bat', result='groundout'),
+              Event('steal', base=2), Event('at_bat', result='walk'),
+              Event('runner_out', base=1, result='pickoff'), Event('at_bat', result='flyout'),
+              Event('opponent_runs', runs=3), Event('end_half'), Event('at_bat', result='single'),
+              Event('at_bat', result='triple'), Event('at_bat', result='walk')]
+    for event in events:
+        state.apply(event)
+    state.flush()
+    db.session.expunge_all()
+
+    restored = GameState.restore(game_id)
+    assert restored.to_dict() == state.to_dict()
+    assert restored.pending == []
+
+    restored.at_bat('home_run')
+    restored.flush()
+    assert db.session.get(Inning, restored.inning_ids[2]).team_runs == 4
+    assert GameState.restore(999) is None
+
+def test_restore_replays_steals_and_runner_outs_in_order(game):
+    game_id, lineup = game
+    set_batting_order(game_id, lineup)
+    state = GameState(game_id, lineup)
+    state.at_bat('single')
+    state.at_bat('single')
+    # The runner on second is out before the runner on first steals second
+    state.runner_out(2)
+    state.steal(1)
+    state.flush()
+    db.session.expunge_all()
+
+    restored = GameState.restore(game_id)
+    assert restored.to_dict() == state.to_dict()
+    assert restored.bases == [None, lineup[1], None]
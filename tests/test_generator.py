@@ -0,0 +1,117 @@
+import pytest
+from app import create_app, db
+from config import TestingConfig
+from app.aggregation import compute_game_totals, compute_line_score, DERIVED_COLUMNS, \
+    DERIVED_LINE_SCORE_COLUMNS
+from app.bulk import Ids
+from app.crud import get_games_by_team, get_players_by_team
+from app.generator import generate_league
+from app.models import User, Team, Player, Game, Inning, BattingOrder, AtBat, Out, Steal, GameStats
+from sqlalchemy import select, func, insert
+from datetime import datetime
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def _at_bat_results():
+    return db.session.execute(select(AtBat.batter_id, AtBat.result).order_by(AtBat.id)).all()
+
+def test_generate_league_row_counts(app):
+    counts = generate_league(teams=3, games_per_team=2, players_per_team=11, lineup_size=9,
+                             innings=5, seed=1, chunk_size=50)
+
+    assert counts['user'] == User.query.count() == 3
+    assert counts['team'] == Team.query.count() == 3
+    assert counts['player'] == Player.query.count() == 33
+    assert counts['game'] == Game.query.count() == 6
+    assert counts['inning'] == Inning.query.count() == 30
+    assert counts['batting_order'] == BattingOrder.query.count() == 54
+    assert counts['game_stats'] == GameStats.query.count() == 54
+    assert counts['at_bat'] == AtBat.query.count() > 0
+    assert counts['out'] == Out.query.count() > 0
+    assert counts['steal'] == Steal.query.count()
+
+def test_generate_league_commits_chunks_around_other_writers(app, monkeypatch):
+    reserve = Ids.reserve
+    walk_ins = []
+
+    def reserve_after_other_writer(self):
+        if self.next[Game]:
+            # Another writer adds a game while the chunk's locks are released
+            walk_ins.append(self.next[Game])
+            db.session.execute(insert(Game).values(date=datetime(2025, 6, 1), opponent='Walk-in', team_id=1))
+        reserve(self)
+
+    monkeypatch.setattr(Ids, 'reserve', reserve_after_other_writer)
+    counts = generate_league(teams=3, games_per_team=2, innings=5, seed=1, chunk_size=50)
+
+    assert len(walk_ins) > 1
+    assert Game.query.count() == counts['game'] + len(walk_ins)
+    assert Game.query.filter_by(opponent='Walk-in').count() == len(walk_ins)
+    assert BattingOrder.query.join(Game, BattingOrder.game_id == Game.id).filter(
+        Game.opponent == 'Walk-in').count() == 0
+
+def test_generated_stats_match_recount(app):
+    generate_league(teams=2, games_per_team=3, seed=7, chunk_size=100)
+
+    for game in Game.query.all():
+        totals = compute_game_totals(game.id)
+        for stats in GameStats.query.filter_by(game_id=game.id):
+            expected = totals.get(stats.player_id, dict.fromkeys(DERIVED_COLUMNS, 0))
+            assert {name: getattr(stats, name) for name in DERIVED_COLUMNS} == expected
+
+        # Every run is scored by someone and driven in on an at-bat
+        runs = db.session.execute(
+            select(func.sum(Inning.team_runs)).where(Inning.game_id == game.id)
+        ).scalar()
+        assert runs == sum(stats.runs for stats in GameStats.query.filter_by(game_id=game.id))
+        assert runs == sum(stats.rbis for stats in GameStats.query.filter_by(game_id=game.id))
+        assert {name: getattr(game, name) for name in DERIVED_LINE_SCORE_COLUMNS} == compute_line_score(game.id)
+
+def test_half_innings_stop_at_three_outs(app):
+    generate_league(teams=2, games_per_team=2, seed=3)
+
+    outs_per_inning = db.session.execute(
+        select(func.count(Out.id)).join(AtBat, Out.at_bat_id == AtBat.id).group_by(AtBat.inning_id)
+    ).scalars().all()
+    assert outs_per_inning and max(outs_per_inning) <= 3
+
+def test_generate_league_is_deterministic(app):
+    generate_league(teams=2, games_per_team=2, seed=42)
+    first = _at_bat_results()
+    db.drop_all()
+    db.create_all()
+    generate_league(teams=2, games_per_team=2, seed=42)
+    assert _at_bat_results() == first
+
+    generate_league(teams=2, games_per_team=2, seed=43)
+    assert [result for _, result in _at_bat_results()[len(first):]] != [result for _, result in first]
+
+def test_regenerating_refreshes_cached_teams(app):
+    generate_league(teams=2, games_per_team=2, seed=1)
+    team_id = Team.query.first().id
+    assert len(get_games_by_team(team_id)) == 2
+    assert len(get_players_by_team(team_id)) == 12
+
+    # A fresh league reuses the ids the cache still holds
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    generate_league(teams=2, games_per_team=3, players_per_team=11, lineup_size=9, seed=2)
+    assert len(get_games_by_team(team_id)) == 3
+    assert len(get_players_by_team(team_id)) == 11
+
+def test_generate_league_cli(app):
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['generate-league', '--teams', '2', '--games-per-team', '1', '--seed', '5'])
+
+    assert result.exit_code == 0, result.output
+    assert Game.query.count() == 2
+    assert 'at_bat' in result.output
@@ -0,0 +1,147 @@
+import random
+import pytest
+from app import create_app, db
+from config import TestingConfig
+from app.crud import (
+    create_user, create_team, create_player, create_game, create_inning, create_at_bat, create_steal,
+    create_game_stats, update_game_stats, delete_at_bat, update_game, unit_of_work
+)
+from app.leaderboard import leaderboards, Leader
+from app.stats import leaders
+from datetime import datetime
+from sqlalchemy import event
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def league(app):
+    user = create_user('testuser', 'test@example.com', 'password123')
+    team = create_team('Test Team', user.id)
+    players = [create_player(f'Player {n}', team.id, n).id for n in range(1, 7)]
+    games = {season: create_game(datetime(season, 5, 1), 'Rivals', team.id).id for season in (2024, 2025)}
+    return players, games
+
+def _same_as_full_scan(stat, season=None, min_at_bats=0):
+    expected = leaders(stat, limit=100, min_at_bats=min_at_bats, season=season)
+    got = leaderboards.leaders(stat, season, limit=100, min_at_bats=min_at_bats or None)
+    assert [(leader.player_id, leader.value) for leader in got] == expected
+
+def test_events_update_loaded_boards(league):
+    players, games = league
+    rng = random.Random(7)
+    inning = create_inning(games[2025], 1)
+    old_inning = create_inning(games[2024], 1)
+    for stat in ('hits', 'rbis', 'stolen_bases', 'avg', 'ops'):
+        assert leaderboards.leaders(stat, 2025, min_at_bats=10) == []
+        leaderboards.leaders(stat, min_at_bats=10)
+    loads = leaderboards.loads
+
+    at_bats = []
+    for _ in range(60):
+        result = rng.choice(('single', 'double', 'home_run', 'walk', 'groundout', 'strikeout'))
+        at_bat = create_at_bat(rng.choice((inning, inning, old_inning)).id, rng.choice(players), result,
+                               rbis=rng.randint(0, 2))
+        at_bats.append(at_bat.id)
+        if rng.random() < 0.2:
+            create_steal(at_bat.id, rng.choice(players), 1, 2, rng.random() < 0.7)
+    for at_bat_id in at_bats[:10]:
+        delete_at_bat(at_bat_id)
+    update_game_stats(games[2025], players[0], {'runs': 4, 'hits': 9})
+
+    assert leaderboards.loads == loads
+    for stat in ('hits', 'rbis', 'runs', 'stolen_bases', 'walks'):
+        _same_as_full_scan(stat, 2025)
+        _same_as_full_scan(stat)
+    for stat in ('avg', 'ops'):
+        _same_as_full_scan(stat, 2025, min_at_bats=10)
+        _same_as_full_scan(stat, min_at_bats=10)
+
+def test_reads_do_not_touch_the_database(league):
+    players, games = league
+    inning = create_inning(games[2025], 1)
+    create_at_bat(inning.id, players[0], 'single')
+    leaderboards.leaders('hits', 2025)
+
+    statements = []
+    event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    create_at_bat(inning.id, players[1], 'double')
+    del statements[:]
+    assert [leader.player_id for leader in leaderboards.leaders('hits', 2025)] == players[:2]
+    assert statements == []
+
+def test_rolled_back_changes_are_dropped(league):
+    players, games = league
+    inning = create_inning(games[2025], 1)
+    create_at_bat(inning.id, players[0], 'single')
+    assert leaderboards.leaders('hits', 2025) == [Leader(1, players[0], 1)]
+
+    with pytest.raises(RuntimeError):
+        with unit_of_work():
+            create_at_bat(inning.id, players[0], 'single')
+            create_at_bat(inning.id, players[1], 'home_run')
+            raise RuntimeError('scorekeeper went home')
+    assert leaderboards.leaders('hits', 2025) == [Leader(1, players[0], 1)]
+
+    with unit_of_work():
+        create_at_bat(inning.id, players[1], 'home_run')
+    assert leaderboards.leaders('hits', 2025) == [Leader(1, players[0], 1), Leader(1, players[1], 1)]
+
+def test_board_loaded_mid_transaction_is_not_counted_twice(league):
+    players, games = league
+    inning = create_inning(games[2025], 1)
+    create_at_bat(inning.id, players[0], 'single')
+    with unit_of_work():
+        create_at_bat(inning.id, players[0], 'double')
+        # The open transaction reads its own double
+        assert leaderboards.leaders('hits') == [Leader(1, players[0], 2)]
+    assert leaderboards.leaders('hits') == [Leader(1, players[0], 2)]
+    leaderboards.rebuild()
+    assert leaderboards.leaders('hits') == [Leader(1, players[0], 2)]
+
+def test_ties_and_qualifiers(league):
+    players, games = league
+    lines = [(12, 6), (10, 5), (20, 10), (9, 5), (12, 4), (3, 3)]
+    for player_id, (at_bats, hits) in zip(players, lines):
+        create_game_stats(games[2025], player_id)
+        update_game_stats(games[2025], player_id, {'at_bats': at_bats, 'hits': hits})
+
+    # 10 hits; then 6; then 5, 5 and 4 ... the tie at the cutoff is kept
+    hits = leaderboards.leaders('hits', 2025, limit=3)
+    assert [(leader.rank, leader.value) for leader in hits] == [(1, 10), (2, 6), (3, 5), (3, 5)]
+    # .500 three ways; 9 and 3 at-bats do not qualify
+    avg = leaderboards.leaders('avg', 2025, limit=2)
+    assert [(leader.rank, leader.player_id) for leader in avg] == \
+        [(1, players[0]), (1, players[1]), (1, players[2])]
+    assert [leader.player_id for leader in leaderboards.leaders('avg', 2025, min_at_bats=15)] == [players[2]]
+    with pytest.raises(ValueError, match='at least 10 at-bats'):
+        leaderboards.leaders('avg', 2025, min_at_bats=5)
+    with pytest.raises(ValueError, match='stat must be one of'):
+        leaderboards.leaders('saves', 2025)
+
+    # Crossing the qualifier adds a player to the rate boards
+    update_game_stats(games[2025], players[3], {'at_bats': 10})
+    assert leaderboards.leaders('avg', 2025, limit=1) == \
+        [Leader(1, players[0], 0.5), Leader(1, players[1], 0.5), Leader(1, players[2], 0.5),
+         Leader(1, players[3], 0.5)]
+
+def test_moving_a_game_reloads_the_boards(league):
+    players, games = league
+    create_game_stats(games[2024], players[0])
+    update_game_stats(games[2024], players[0], {'hits': 3})
+    assert leaderboards.leaders('hits', 2025) == []
+    loads = leaderboards.loads
+
+    update_game(games[2024], {'date': datetime(2025, 6, 1)})
+    assert leaderboards.leaders('hits', 2025) == [Leader(1, players[0], 3)]
+    assert leaderboards.loads == loads + 1
+
+    leaderboards.invalidate()
+    assert leaderboards.stats()['boards'] == []
@@ -0,0 +1,107 @@
+import re
+import threading
+import pytest
+from app import create_app, db
+from config import TestingConfig
+from app.crud import create_user, create_team, get_team_by_id
+from app.metrics import Histogram, HistogramFamily, metrics
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def _value(text, sample):
+    match = re.search(rf'^{re.escape(sample)} (\S+)$', text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+def test_histogram_sums_every_threads_shard():
+    histogram = Histogram((0.1, 1.0))
+
+    def observe():
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+
+    threads = [threading.Thread(target=observe) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    observe()
+
+    counts, total = histogram.snapshot()
+    # Buckets are cumulative and inclusive of their upper bound
+    assert counts == [10, 15, 20]
+    assert total == pytest.approx(5 * 3.65)
+    # The finished threads' shards were folded in; only this thread's is live
+    assert len(histogram._shards) == 1
+
+def test_short_lived_threads_do_not_pile_up_shards():
+    histogram = Histogram((0.1,))
+    for _ in range(500):
+        thread = threading.Thread(target=histogram.observe, args=(0.05,))
+        thread.start()
+        thread.join()
+
+    assert len(histogram._shards) == 0
+    assert histogram.snapshot() == ([500, 500], pytest.approx(25.0))
+
+def test_family_renders_prometheus_text():
+    family = HistogramFamily('test_seconds', 'Test latency.', ('route',), bounds=(0.5,))
+    family.labels('say "hi"\n').observe(0.25)
+    with pytest.raises(ValueError, match='takes labels route'):
+        family.labels('a', 'b')
+
+    lines = []
+    family.render(lines)
+    assert lines == [
+        '# HELP test_seconds Test latency.',
+        '# TYPE test_seconds histogram',
+        'test_seconds_bucket{route="say \\"hi\\"\\n",le="0.5"} 1',
+        'test_seconds_bucket{route="say \\"hi\\"\\n",le="+Inf"} 1',
+        'test_seconds_sum{route="say \\"hi\\"\\n"} 0.25',
+        'test_seconds_count{route="say \\"hi\\"\\n"} 1',
+    ]
+
+def test_metrics_endpoint(app):
+    client = app.test_client()
+    before = _value(client.get('/metrics').get_data(as_text=True),
+                    'softball_crud_seconds_count{function="get_team_by_id"}')
+    user = create_user('testuser', 'test@example.com', 'password123')
+    team = create_team('Test Team', user.id)
+    get_team_by_id(team.id)
+    get_team_by_id(team.id)
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type == 'text/plain; version=0.0.4; charset=utf-8'
+    text = response.get_data(as_text=True)
+    assert _value(text, 'softball_crud_seconds_count{function="get_team_by_id"}') == before + 2
+    assert _value(text, 'softball_crud_seconds_bucket{function="get_team_by_id",le="+Inf"}') == before + 2
+    # The first scrape has finished by now; this one is still running
+    assert _value(text, 'softball_request_seconds_count{endpoint="metrics.scrape",method="GET"}') >= 1
+    assert _value(text, 'softball_cache_hit_ratio{backend="LRUCache"}') == 0.5
+    for sample in ('softball_db_pool_checkouts_total', 'softball_feed_subscribers',
+                   'softball_leaderboard_loads_total'):
+        assert _value(text, sample) is not None
+    assert 'softball_db_queries_total' not in text
+
+def test_disabled_metrics_skip_timing():
+    class QuietConfig(TestingConfig):
+        METRICS_ENABLED = False
+
+    app = create_app(QuietConfig)
+    with app.app_context():
+        db.create_all()
+        histogram = metrics.crud_seconds.labels('create_user')
+        count = histogram.snapshot()[0][-1]
+        create_user('testuser', 'test@example.com', 'password123')
+        assert histogram.snapshot()[0][-1] == count
+        assert app.test_client().get('/metrics').status_code == 200
+        db.session.remove()
+        db.drop_all()
@@ -1,13 +1,14 @@
 import pytest
+from sqlalchemy import event
 from app import create_app, db
-from app.models import User, Team, Player, Game
+from config import TestingConfig
+from app.models import User, Team, Player, Game, Principal, load_user
+from app.crud import create_user, update_user, delete_user
 from datetime import datetime
 
 @pytest.fixture
 def app():
-    app = create_app()
-    app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = app.config['SQLALCHEMY_DATABASE_URI'] + '_test'
+    app = create_app(TestingConfig)
     
     with app.app_context():
         db.create_all()
@@ -130,4 +131,32 @@ def test_relationships(app):
         assert team.players.count() == 2
         assert team.games.count() == 1
         assert player1.team == team
-        assert game.team == team 
\ No newline at end of file
+        assert game.team == team 
+
+def test_load_user_caches_slim_principal(app):
+    with app.app_context():
+        user = create_user('testuser', 'test@example.com', 'password123')
+        user_id = user.id
+
+        principal = load_user(str(user_id))
+        assert isinstance(principal, Principal)
+        assert principal.get_id() == str(user_id)
+        assert principal.username == 'testuser'
+        assert principal.is_authenticated
+        assert not hasattr(principal, 'password_hash')
+
+        # Later requests are served from the identity cache
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            assert load_user(str(user_id)) == principal
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        assert statements == []
+
+        # Writes through crud invalidate the cached identity
+        update_user(user_id, {'username': 'renamed'})
+        assert load_user(str(user_id)).username == 'renamed'
+        assert delete_user(user_id)
+        assert load_user(str(user_id)) is None
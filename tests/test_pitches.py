@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+from app import create_app, db
+from config import TestingConfig
+from app.crud import create_user, create_team, create_player, create_game, create_inning, create_at_bat
+from app.game_state import GameState, GameStateError
+from app.models import AtBat
+from app.pitches import (
+    PITCH_TYPES, MAX_PITCHES, encode_pitches, decode_pitches, parse_pitch_string, format_pitch_string,
+    unpack_codes, count_after, pitch_matrix, pitch_lengths, pitch_type_totals, first_pitch_strike_rate,
+    load_pitch_matrix,
+)
+from datetime import datetime
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def team(app):
+    user = create_user('testuser', 'test@example.com', 'password123')
+    team = create_team('Test Team', user.id)
+    players = [create_player(f'Player {n}', team.id, n).id for n in range(1, 4)]
+    return team.id, players
+
+def test_encode_decode_roundtrip():
+    pitches = ['ball', 'called_strike', 'foul', 'foul', 'ball', 'in_play']
+    data = encode_pitches(pitches)
+
+    assert len(data) == 3
+    assert decode_pitches(data) == pitches
+    assert format_pitch_string(data) == 'BCFFBX'
+    # An odd count pads the last nibble
+    assert decode_pitches(encode_pitches(PITCH_TYPES)) == list(PITCH_TYPES)
+    assert len(encode_pitches(PITCH_TYPES)) == 5
+    assert parse_pitch_string(' bsx\n') == encode_pitches(['ball', 'swinging_strike', 'in_play'])
+    assert decode_pitches(None) == decode_pitches(b'') == []
+
+    with pytest.raises(ValueError, match='Unknown pitch'):
+        parse_pitch_string('BQ')
+    with pytest.raises(ValueError, match='at most'):
+        encode_pitches('F' * (MAX_PITCHES + 1))
+
+def test_count_after_follows_the_foul_rule():
+    assert count_after(unpack_codes(parse_pitch_string('BCFFFB'))) == (2, 2)
+    assert count_after(unpack_codes(parse_pitch_string('CFT'))) == (0, 3)
+    assert count_after(unpack_codes(parse_pitch_string('IIII'))) == (4, 0)
+
+def test_pitch_matrix_matches_scalar_decode():
+    blobs = [parse_pitch_string(text) for text in ('BCX', 'CCS', 'X', 'BBBCB', 'FFFFFFFFX')] + [None]
+    matrix = pitch_matrix(blobs)
+
+    assert matrix.shape == (6, 32)
+    for row, blob in zip(matrix, blobs):
+        codes = unpack_codes(blob)
+        assert list(row[:len(codes)]) == codes
+        assert not row[len(codes):].any()
+    assert list(pitch_lengths(matrix)) == [3, 3, 1, 5, 9, 0]
+    totals = pitch_type_totals(matrix)
+    assert (totals['ball'], totals['foul'], totals['in_play']) == (5, 8, 3)
+    # Strikes first on CCS, X and FFF...X; balls first on BCX and BBBCB
+    assert first_pitch_strike_rate(matrix) == pytest.approx(3 / 5)
+    assert first_pitch_strike_rate(pitch_matrix([])) == 0.0
+
+def test_load_pitch_matrix_by_team_and_season(team):
+    team_id, (batter, _, _) = team
+    spring = create_inning(create_game(datetime(2025, 5, 1), 'Rivals', team_id).id, 1)
+    last_year = create_inning(create_game(datetime(2024, 5, 1), 'Rivals', team_id).id, 1)
+    create_at_bat(spring.id, batter, 'single', pitches=parse_pitch_string('CX'))
+    create_at_bat(spring.id, batter, 'walk', balls=4, pitches=parse_pitch_string('BBBB'))
+    create_at_bat(spring.id, batter, 'groundout')
+    create_at_bat(last_year.id, batter, 'flyout', pitches=parse_pitch_string('X'))
+
+    assert load_pitch_matrix(team_id).shape[0] == 3
+    season = load_pitch_matrix(team_id, 2025)
+    assert season.dtype == np.uint8
+    assert sorted(pitch_lengths(season)) == [2, 4]
+    assert first_pitch_strike_rate(season) == 0.5
+
+def test_game_state_records_pitch_sequences(team):
+    team_id, lineup = team
+    game_id = create_game(datetime(2025, 5, 1), 'Rivals', team_id).id
+    state = GameState(game_id, lineup)
+
+    for pitch in ('ball', 'swinging_strike', 'foul', 'foul'):
+        state.pitch(pitch)
+    assert state.to_dict()['pitches'] == ['ball', 'swinging_strike', 'foul', 'foul']
+    state.at_bat('single')
+    for pitch in 'CCB':
+        state.pitch(pitch)
+    state.pitch('hit_by_pitch')
+    state.at_bat('groundout')
+    with pytest.raises(GameStateError, match='Unknown pitch'):
+        state.pitch('knuckler')
+    state.flush()
+
+    at_bats = AtBat.query.order_by(AtBat.id).all()
+    assert [format_pitch_string(at_bat.pitches) for at_bat in at_bats] == ['BSFFX', 'CCBH', '']
+    assert [(at_bat.result, at_bat.balls, at_bat.strikes) for at_bat in at_bats] == \
+        [('single', 1, 2), ('hit_by_pitch', 1, 2), ('groundout', 0, 0)]
+    assert at_bats[2].pitches is None
@@ -0,0 +1,128 @@
+import random
+import pytest
+from app import create_app, db
+from config import TestingConfig
+from app.crud import create_user, create_team, create_player, create_game, recount_game_stats
+from app.aggregation import DERIVED_COLUMNS
+from app.game_state import GameState, Event, GameStateError
+from app.models import Inning, AtBat, Out, Steal, GameStats
+from app.play_log import PlayLog
+from datetime import datetime
+
+RESULTS = ('single', 'double', 'home_run', 'walk', 'strikeout', 'groundout', 'flyout', 'sacrifice_fly')
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def game(app):
+    user = create_user('testuser', 'test@example.com', 'password123')
+    team = create_team('Test Team', user.id)
+    players = [create_player(f'Player {n}', team.id, n).id for n in range(1, 10)]
+    game = create_game(datetime(2025, 5, 1, 18), 'Rivals', team.id)
+    return game.id, players
+
+def _events(count, seed=5):
+    """A random but valid event stream, checked against a scratch state."""
+    rng = random.Random(seed)
+    state = GameState(0, [1])
+    state.persist = False
+    events = []
+    while len(events) < count:
+        if not state.team_batting:
+            event = Event('opponent_runs', runs=rng.randint(0, 2)) if rng.random() < 0.5 else Event('end_half')
+        elif any(state.bases) and rng.random() < 0.15:
+            base = rng.choice([index + 1 for index, runner in enumerate(state.bases) if runner])
+            event = Event('steal', base=base, success=rng.random() < 0.7)
+        else:
+            event = Event('at_bat', result=rng.choice(RESULTS))
+        try:
+            state.apply(event)
+        except GameStateError:
+            continue
+        events.append(event)
+    return events
+
+def _stats(game_id):
+    db.session.expire_all()
+    return {stats.player_id: tuple(getattr(stats, name) for name in DERIVED_COLUMNS)
+            for stats in GameStats.query.filter_by(game_id=game_id)}
+
+def test_state_at_replays_from_snapshots(game):
+    game_id, lineup = game
+    log = PlayLog(GameState(game_id, lineup), snapshot_every=8)
+    events = _events(60)
+    states = []
+    for event in events:
+        states.append(log.record(event).to_dict())
+
+    assert sorted(log.snapshots) == list(range(0, 61, 8))
+    for index in (1, 8, 9, 37, 60):
+        assert log.state_at(index).to_dict() == states[index - 1]
+    with pytest.raises(IndexError):
+        log.state_at(61)
+
+    count = log.state.plate_appearances // 2
+    replayed = log.state_after_plate_appearance(count)
+    assert replayed.plate_appearances == count
+    assert log.state_after_plate_appearance(count + 1000) is None
+
+def test_undo_and_redo_in_memory(game):
+    game_id, lineup = game
+    log = PlayLog(GameState(game_id, lineup), snapshot_every=4)
+    events = _events(30)
+    for event in events:
+        log.record(event)
+    final = log.state.to_dict()
+
+    for _ in range(11):
+        log.undo()
+    assert log.state.to_dict() == log.state_at(19).to_dict()
+    # The first inning row was queued before the log started
+    assert log.state.pending[1:] == [write for entry in log.entries[:19] for write in entry.writes]
+    for _ in range(11):
+        log.redo()
+    assert log.state.to_dict() == final
+    assert log.redo() is None
+
+    # A new event after an undo drops the undone tail
+    log.undo()
+    log.undo()
+    log.record(Event('end_half'))
+    assert len(log.entries) == len(log) == 29
+    assert max(log.snapshots) <= 28
+
+def test_undo_after_flush_reverses_only_its_rows(game):
+    game_id, lineup = game
+    log = PlayLog(GameState(game_id, lineup))
+    for event in _events(40, seed=9):
+        log.record(event)
+    log.flush()
+    rows = (AtBat.query.count(), Out.query.count(), Steal.query.count(), Inning.query.count())
+
+    undone = [log.undo() for _ in range(15)]
+    log.flush()
+    removed = [write.kind for entry in undone for write in entry.writes]
+    assert (AtBat.query.count(), Out.query.count(), Steal.query.count(), Inning.query.count()) == (
+        rows[0] - removed.count('at_bat'), rows[1] - removed.count('out'),
+        rows[2] - removed.count('steal'), rows[3] - removed.count('inning'))
+
+    incremental = _stats(game_id)
+    recount_game_stats(game_id)
+    assert _stats(game_id) == incremental
+    db.session.expunge_all()
+    assert GameState.restore(game_id).to_dict() == log.state.to_dict()
+
+    for _ in range(15):
+        log.redo()
+    log.flush()
+    assert AtBat.query.count() == rows[0]
+    db.session.expunge_all()
+    assert GameState.restore(game_id).to_dict() == log.state.to_dict()
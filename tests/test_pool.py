@@ -0,0 +1,87 @@
+import sys
+import threading
+import types
+import pytest
+from sqlalchemy import create_engine, exc, text
+from app.pool import PoolMetrics, TimedQueuePool, pool_metrics
+from config import Config
+
+class CloudSQLConfig(Config):
+    CLOUD_SQL_INSTANCE = 'project:region:instance'
+    DB_POOL_SIZE = 3
+    DB_MAX_OVERFLOW = 2
+    DB_POOL_RECYCLE = 600
+
+def test_engine_options():
+    options = CloudSQLConfig.engine_options()
+    assert options['poolclass'] is TimedQueuePool
+    assert options['pool_size'] == 3
+    assert options['max_overflow'] == 2
+    assert options['pool_recycle'] == 600
+    assert options['pool_pre_ping'] is True
+    assert callable(options['creator'])
+
+    class DirectConfig(CloudSQLConfig):
+        CLOUD_SQL_INSTANCE = None
+    assert 'creator' not in DirectConfig.engine_options()
+
+def test_connector_uses_the_subclass_settings(monkeypatch):
+    calls = []
+
+    class Connector:
+        def connect(self, instance, driver, **kwargs):
+            calls.append((instance, driver, kwargs))
+            return 'connection'
+
+    monkeypatch.setitem(sys.modules, 'google.cloud.sql.connector', types.SimpleNamespace(Connector=Connector))
+
+    class ReportingConfig(CloudSQLConfig):
+        MYSQL_USER = 'reporter'
+        MYSQL_PASSWORD = 'secret'
+        MYSQL_DB = 'softball'
+
+    assert ReportingConfig.engine_options()['creator']() == 'connection'
+    assert calls == [('project:region:instance', 'pymysql',
+                      {'user': 'reporter', 'password': 'secret', 'db': 'softball'})]
+
+def test_pool_metrics_and_bounded_checkout(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path}/pool.db', poolclass=TimedQueuePool,
+                           pool_size=1, max_overflow=0, pool_timeout=0.05)
+    pool_metrics.install(engine)
+    pool_metrics.install(engine)  # idempotent
+    pool_metrics.reset()
+
+    first = engine.connect()
+    first.execute(text('SELECT 1'))
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    stats = pool_metrics.snapshot()
+    assert stats['checkouts'] == 1
+    assert stats['checked_out'] == 1
+    assert stats['timeouts'] == 1
+    assert stats['wait_seconds_max'] >= 0.05
+    assert stats['pool_size'] >= 1
+
+    # A waiter gets the connection as soon as it is returned
+    release = threading.Timer(0.01, first.close)
+    release.start()
+    with engine.connect() as second:
+        second.execute(text('SELECT 1'))
+    release.join()
+    stats = pool_metrics.snapshot()
+    assert stats['checkouts'] == 2
+    assert stats['checkins'] == 2
+    assert stats['checked_out'] == 0
+    assert stats['peak_checked_out'] == 1
+    assert stats['connects'] == 1
+    engine.dispose()
+
+def test_metrics_are_independent():
+    metrics = PoolMetrics()
+    metrics.observe_wait(0.2)
+    metrics.observe_wait(0.1, timed_out=True)
+    stats = metrics.snapshot()
+    assert stats['waits'] == 2
+    assert stats['timeouts'] == 1
+    assert stats['wait_seconds_total'] == pytest.approx(0.3)
+    assert stats['wait_seconds_max'] == pytest.approx(0.2)
@@ -0,0 +1,129 @@
+import pytest
+from sqlalchemy import create_engine, insert, select, text, tuple_
+from app import db
+from app.models import User, Team, Player, Game, Inning, BattingOrder, GameStats, AtBat, Out, Steal
+from app.export import play_by_play_query
+from datetime import datetime
+
+# The lookups app.crud runs on every page, with the index each must use
+HOT_LOOKUPS = [
+    ('game_stats by game and player',
+     select(GameStats).filter_by(game_id=7, player_id=3), 'game_stats'),
+    ('batting order for a game',
+     select(BattingOrder).filter_by(game_id=7).order_by(BattingOrder.order_number), 'batting_order'),
+    ('players by team', select(Player).filter_by(team_id=2), 'player'),
+    ('games by team', select(Game).filter_by(team_id=2), 'game'),
+    ('teams by user', select(Team).filter_by(user_id=1), 'team'),
+    ('innings for a game',
+     select(Inning).filter_by(game_id=7).order_by(Inning.inning_number), 'inning'),
+    ('at-bats for an inning', select(AtBat).filter_by(inning_id=11), 'at_bat'),
+    ('outs for an at-bat', select(Out).filter_by(at_bat_id=21), 'out'),
+    ('steals for an at-bat', select(Steal).filter_by(at_bat_id=21), 'steal'),
+]
+
+# Keyset pages, which must seek along an index already in page order
+PAGES = [
+    ('schedule page', select(Game).filter_by(team_id=2)
+     .where(tuple_(Game.date, Game.id) > (datetime(2025, 5, 1), 40)).order_by(Game.date, Game.id).limit(51),
+     'game'),
+    ('roster page', select(Player).filter_by(team_id=2)
+     .where(tuple_(Player.name, Player.id) > ('Player 20', 20)).order_by(Player.name, Player.id).limit(51),
+     'player'),
+    ('teams page', select(Team).filter_by(user_id=1)
+     .where(tuple_(Team.name, Team.id) > ('Team 1', 1)).order_by(Team.name, Team.id).limit(51), 'team'),
+]
+
+# Reads of indexed columns only, which must be answered from the index
+# without touching the table: pages projected to their ordering columns
+# (crud's columns= argument) and the scorebook's check for existing innings
+COVERING = [
+    ('schedule page of ids and dates', select(Game.id, Game.date).filter_by(team_id=2)
+     .where(tuple_(Game.date, Game.id) > (datetime(2025, 5, 1), 40)).order_by(Game.date, Game.id).limit(51),
+     'game'),
+    ('roster page of names', select(Player.id, Player.name).filter_by(team_id=2)
+     .where(tuple_(Player.name, Player.id) > ('Player 20', 20)).order_by(Player.name, Player.id).limit(51),
+     'player'),
+    ('teams page of names', select(Team.id, Team.name).filter_by(user_id=1)
+     .where(tuple_(Team.name, Team.id) > ('Team 1', 1)).order_by(Team.name, Team.id).limit(51), 'team'),
+    ('game has innings', select(Inning.id).filter_by(game_id=7).limit(1), 'inning'),
+]
+
+def _populate(engine, games):
+    players_per_team = 12
+    teams = games // 20
+    users = teams // 4
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {'id': u, 'username': f'user{u}', 'email': f'user{u}@example.com'} for u in range(1, users + 1)
+        ])
+        conn.execute(insert(Team), [
+            {'id': t, 'name': f'Team {t}', 'user_id': (t - 1) % users + 1} for t in range(1, teams + 1)
+        ])
+        conn.execute(insert(Player), [
+            {'id': p, 'name': f'Player {p}', 'team_id': (p - 1) // players_per_team + 1}
+            for p in range(1, teams * players_per_team + 1)
+        ])
+        conn.execute(insert(Game), [
+            {'id': g, 'date': datetime(2025, 5, 1), 'opponent': 'Opponent', 'team_id': (g - 1) % teams + 1}
+            for g in range(1, games + 1)
+        ])
+        conn.execute(insert(BattingOrder), [
+            {'game_id': g, 'player_id': n, 'order_number': n}
+            for g in range(1, games + 1) for n in range(1, players_per_team + 1)
+        ])
+        conn.execute(insert(GameStats), [
+            {'game_id': g, 'player_id': n} for g in range(1, games + 1) for n in range(1, players_per_team + 1)
+        ])
+        conn.execute(insert(Inning), [
+            {'id': (g - 1) * 7 + i, 'game_id': g, 'inning_number': i}
+            for g in range(1, games + 1) for i in range(1, 8)
+        ])
+        at_bats = [
+            {'id': inning * 4 + k, 'inning_id': inning, 'batter_id': k + 1, 'result': 'single'}
+            for inning in range(1, games * 7 + 1) for k in range(4)
+        ]
+        conn.execute(insert(AtBat), at_bats)
+        conn.execute(insert(Out), [{'at_bat_id': row['id'], 'out_type': 'flyout'} for row in at_bats[::2]])
+        conn.execute(insert(Steal), [
+            {'at_bat_id': row['id'], 'from_base': 1, 'to_base': 2, 'success': True} for row in at_bats[::5]
+        ])
+        conn.execute(text('ANALYZE'))
+
+def _plan(engine, statement):
+    sql = str(statement.compile(engine, compile_kwargs={'literal_binds': True}))
+    with engine.connect() as conn:
+        return [row[-1] for row in conn.execute(text('EXPLAIN QUERY PLAN ' + sql))]
+
+@pytest.mark.parametrize('games', [200, 4000])
+def test_hot_lookups_use_indexes(games):
+    engine = create_engine('sqlite://')
+    db.metadata.create_all(engine)
+    _populate(engine, games)
+
+    for name, statement, table in HOT_LOOKUPS + PAGES:
+        plan = _plan(engine, statement)
+        detail = f'{name}: {plan}'
+        assert any(step.startswith(f'SEARCH {table} USING') and 'INDEX' in step for step in plan), detail
+        assert not any(step.startswith('SCAN') for step in plan), detail
+        assert not any('TEMP B-TREE' in step for step in plan), detail
+
+    for name, statement, table in COVERING:
+        plan = _plan(engine, statement)
+        assert [step for step in plan if step.startswith(f'SEARCH {table} USING COVERING INDEX')], \
+            f'{name}: {plan}'
+        assert not any('TEMP B-TREE' in step for step in plan), f'{name}: {plan}'
+    engine.dispose()
+
+@pytest.mark.parametrize('games', [200, 4000])
+def test_play_by_play_export_streams_without_sorting(games):
+    # The export walks games in date order through indexes, so the database
+    # never has to buffer the whole season in a sorter
+    engine = create_engine('sqlite://')
+    db.metadata.create_all(engine)
+    _populate(engine, games)
+
+    for statement in (play_by_play_query(), play_by_play_query(team_id=2), play_by_play_query(season=2025)):
+        plan = _plan(engine, statement)
+        assert not any('TEMP B-TREE' in step for step in plan), plan
+        assert not any(step.startswith('SCAN') and 'INDEX' not in step for step in plan), plan
+    engine.dispose()
@@ -0,0 +1,93 @@
+import pytest
+from app import create_app, db
+from config import TestingConfig
+from app.crud import (
+    create_user, create_team, bulk_create_players, get_players_by_team, get_team_by_id, update_team,
+    create_game, get_games_by_team
+)
+from app.query_stats import query_stats, query_budget, QueryBudgetExceeded
+from datetime import datetime
+from sqlalchemy import event
+
+class InstrumentedConfig(TestingConfig):
+    QUERY_STATS_ENABLED = True
+    QUERY_STATS_N_PLUS_ONE = 5
+
+@pytest.fixture
+def app():
+    app = create_app(InstrumentedConfig)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def team(app):
+    user = create_user('testuser', 'test@example.com', 'password123')
+    team_id = create_team('Test Team', user.id).id
+    bulk_create_players(team_id, [{'name': f'Player {n}', 'number': n} for n in range(8)])
+    create_game(datetime(2025, 5, 1), 'Opponent Team', team_id)
+    query_stats.reset()
+    return team_id
+
+def test_statements_are_charged_to_the_outer_crud_call(team):
+    get_games_by_team(team)
+    get_games_by_team(team)  # cached
+    update_team(team, {'name': 'Renamed'})
+
+    stats = query_stats.stats()
+    games = stats['functions']['crud.get_games_by_team']
+    assert (games['calls'], games['queries'], games['max_queries']) == (2, 1, 1)
+    assert games['seconds'] > 0
+    # update_team looks the team up through get_team_by_id, which is not counted separately
+    assert stats['functions']['crud.update_team']['queries'] >= 1
+    assert 'crud.get_team_by_id' not in stats['functions']
+    assert stats['queries'] == sum(line['queries'] for line in stats['functions'].values())
+    assert 0 < len(stats['slowest']) <= 10
+    assert stats['slowest'][0]['seconds'] >= stats['slowest'][-1]['seconds']
+
+def test_repeated_statements_are_flagged(team):
+    players = get_players_by_team(team)
+    with query_stats.scope('roster at-bats'):
+        for player in players:
+            player.at_bats.count()
+
+    (suspect,) = query_stats.stats()['n_plus_one']
+    assert suspect['scope'] == 'roster at-bats'
+    assert suspect['repeats'] == 8
+    assert 'FROM at_bat' in suspect['statement']
+
+def test_query_budget(team):
+    db.session.remove()
+    with query_budget(1) as statements:
+        get_team_by_id(team)
+    assert len(statements) <= 1
+
+    players = get_players_by_team(team)
+    with pytest.raises(QueryBudgetExceeded, match=r'8 queries in block, budget 2:\n  8x SELECT'):
+        with query_budget(2):
+            for player in players:
+                player.at_bats.count()
+    # The listener is gone once the block ends
+    players[0].at_bats.count()
+    assert len(statements) <= 1
+
+def test_request_budget(app, team):
+    query_stats.request_budget = 0
+    with pytest.raises(QueryBudgetExceeded, match='GET /games/999/feed, budget 0'):
+        app.test_client().get('/games/999/feed')
+    assert query_stats.stats()['endpoints']['games.feed']['calls'] == 1
+
+def test_disabled_installs_nothing():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        assert not query_stats.enabled
+        assert not event.contains(db.engine, 'after_cursor_execute', query_stats._after_execute)
+        create_user('testuser', 'test@example.com', 'password123')
+        assert query_stats.stats()['queries'] == 0
+        assert query_stats.stats()['functions'] == {}
+        db.session.remove()
+        db.drop_all()
@@ -0,0 +1,181 @@
+import io
+import json
+import pytest
+from app import create_app, db
+from config import TestingConfig
+from app.crud import create_user, create_team, create_player, create_game, create_inning, get_games_by_team
+from app.aggregation import compute_game_totals
+from app.models import Game, Inning, AtBat, Out, Steal, GameStats
+from app.pitches import format_pitch_string
+from app.scorebook import import_scorebook, ScorebookError
+from datetime import datetime
+
+COLUMNS = ('event', 'date', 'opponent', 'inning', 'batter', 'result', 'rbis', 'balls', 'strikes',
+           'player', 'out_type', 'base', 'from_base', 'to_base', 'success', 'team_runs', 'opponent_runs',
+           'pitches')
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def team(app):
+    user = create_user('testuser', 'test@example.com', 'password123')
+    team = create_team('Test Team', user.id)
+    create_player('Ann Lee', team.id, 7)
+    create_player('Bo Diaz', team.id, 12)
+    create_player('Cy Young', team.id, 21)
+    return team
+
+def _csv(rows):
+    lines = [','.join(COLUMNS)]
+    for row in rows:
+        lines.append(','.join(str(row.get(column, '')) for column in COLUMNS))
+    return io.StringIO('\n'.join(lines) + '\n')
+
+def _game(date, opponent='Rivals'):
+    return [
+        {'event': 'at_bat', 'date': date, 'opponent': opponent, 'inning': 1, 'batter': 'Ann Lee',
+         'result': 'single', 'balls': 1, 'strikes': 2},
+        {'event': 'at_bat', 'date': date, 'opponent': opponent, 'inning': 1, 'batter': '#12',
+         'result': 'strikeout', 'strikes': 3},
+        {'event': 'out', 'date': date, 'opponent': opponent, 'inning': 1, 'out_type': 'strikeout'},
+        {'event': 'steal', 'date': date, 'opponent': opponent, 'inning': 1, 'player': 'ann  lee',
+         'from_base': 1, 'to_base': 2, 'success': 'yes'},
+        {'event': 'at_bat', 'date': date, 'opponent': opponent, 'inning': 1, 'batter': '21',
+         'result': 'home_run', 'rbis': 2},
+        {'event': 'inning', 'date': date, 'opponent': opponent, 'inning': 1, 'team_runs': 2,
+         'opponent_runs': 1},
+        {'event': 'at_bat', 'date': date, 'opponent': opponent, 'inning': 2, 'batter': 'Bo Diaz',
+         'result': 'walk', 'balls': 4},
+    ]
+
+def test_import_csv_scorebook(team):
+    report = import_scorebook(_csv(_game('2025-05-01') + _game('2025-05-08', 'Others')), team.id, fmt='csv')
+
+    assert (report.games, report.innings, report.at_bats, report.outs, report.steals) == (2, 4, 8, 2, 2)
+    assert report.rows == 14
+    assert report.rows_per_second > 0
+
+    game = Game.query.filter_by(opponent='Rivals').one()
+    assert game.date == datetime(2025, 5, 1)
+    innings = Inning.query.filter_by(game_id=game.id).order_by(Inning.inning_number).all()
+    assert [(i.team_runs, i.opponent_runs) for i in innings] == [(2, 1), (0, 0)]
+    assert (game.team_runs, game.team_hits, game.opponent_runs, game.opponent_errors) == (2, 2, 1, 0)
+    assert Steal.query.first().success is True
+
+    # GameStats are recounted from the imported rows
+    stats = {s.player_id: s for s in GameStats.query.filter_by(game_id=game.id)}
+    totals = compute_game_totals(game.id)
+    for player_id, values in totals.items():
+        assert {name: getattr(stats[player_id], name) for name in values} == values
+
+def test_import_refreshes_cached_schedule(team):
+    assert get_games_by_team(team.id) == []
+    import_scorebook(_csv(_game('2025-05-01')), team.id, fmt='csv')
+    (game,) = get_games_by_team(team.id)
+    assert (game.opponent, game.team_runs, game.team_hits) == ('Rivals', 2, 2)
+
+def test_import_ndjson_into_scheduled_game(team):
+    scheduled = create_game(datetime(2025, 5, 1), 'Rivals', team.id)
+    source = io.StringIO('\n'.join(json.dumps(row) for row in _game('2025-05-01')) + '\n\n')
+
+    report = import_scorebook(source, team.id, fmt='ndjson')
+
+    assert report.games == 1
+    assert Game.query.count() == 1
+    assert AtBat.query.join(Inning).filter(Inning.game_id == scheduled.id).count() == 4
+
+def test_bad_row_rolls_back_only_its_game(team):
+    second = _game('2025-05-08', 'Others')
+    second[4]['batter'] = 'Nobody'
+    with pytest.raises(ScorebookError) as excinfo:
+        import_scorebook(_csv(_game('2025-05-01') + second), team.id, fmt='csv')
+
+    assert excinfo.value.line == 13
+    assert [game.opponent for game in Game.query.all()] == ['Rivals']
+    assert AtBat.query.count() == 4
+    assert Out.query.count() == 1
+
+def test_ids_are_reserved_after_the_game_is_read(team, monkeypatch):
+    from app import scorebook
+    reserved = []
+    next_id = scorebook.next_id
+    monkeypatch.setattr(scorebook, 'next_id', lambda model: reserved.append(model) or next_id(model))
+
+    second = _game('2025-05-08', 'Others')
+    second[-1]['batter'] = 'Nobody'
+    with pytest.raises(ScorebookError):
+        import_scorebook(_csv(_game('2025-05-01') + second), team.id, fmt='csv', chunk_size=2)
+
+    # Only the game that was read in full took the next_id locks
+    assert len(reserved) == 6
+    game = Game.query.one()
+    assert [at_bat.inning.game_id for at_bat in AtBat.query.all()] == [game.id] * 4
+    assert Out.query.one().at_bat_id == AtBat.query.order_by(AtBat.id)[1].id
+
+def test_pitch_sequences_are_packed(team):
+    rows = _game('2025-05-01')
+    rows[0]['pitches'] = 'bcfX'
+    import_scorebook(_csv(rows), team.id, fmt='csv')
+
+    at_bats = AtBat.query.order_by(AtBat.id).all()
+    assert format_pitch_string(at_bats[0].pitches) == 'BCFX'
+    assert at_bats[1].pitches is None
+
+    rows[0].update(date='2025-05-08', pitches='BZ')
+    with pytest.raises(ScorebookError, match="pitches: Unknown pitch 'Z'"):
+        import_scorebook(_csv(rows), team.id, fmt='csv')
+
+@pytest.mark.parametrize('change, message', [
+    ({'balls': 'four'}, 'balls must be an integer'),
+    ({'strikes': 5}, 'strikes 5 is out of range'),
+    ({'result': 'x' * 40}, 'result is longer than 32'),
+    ({'event': 'pitch'}, 'event must be one of'),
+    ({'date': '05/01/2025'}, 'is not ISO 8601'),
+    ({'batter': ''}, 'batter is required'),
+])
+def test_invalid_rows_are_rejected(team, change, message):
+    rows = _game('2025-05-01')
+    rows[0].update(change)
+    with pytest.raises(ScorebookError, match=message):
+        import_scorebook(_csv(rows), team.id, fmt='csv')
+    assert AtBat.query.count() == 0
+
+def test_ambiguous_player_and_orphan_out(team):
+    create_player('Dee Lee', team.id, 7)
+    with pytest.raises(ScorebookError, match="'#7' is ambiguous"):
+        import_scorebook(_csv([dict(_game('2025-05-01')[0], batter='#7')]), team.id, fmt='csv')
+
+    with pytest.raises(ScorebookError, match='out row before any at_bat'):
+        import_scorebook(_csv([_game('2025-05-01')[2]]), team.id, fmt='csv')
+
+def test_games_must_be_contiguous_and_new(team):
+    first, second = _game('2025-05-01'), _game('2025-05-08')
+    with pytest.raises(ScorebookError, match='not contiguous'):
+        import_scorebook(_csv(first[:2] + second + first[2:]), team.id, fmt='csv')
+
+    played = create_game(datetime(2025, 6, 1), 'Rivals', team.id)
+    create_inning(played.id, 1)
+    with pytest.raises(ScorebookError, match='already has play-by-play'):
+        import_scorebook(_csv(_game('2025-06-01')), team.id, fmt='csv')
+
+def test_import_scorebook_cli(app, team, tmp_path):
+    path = tmp_path / 'season.csv'
+    path.write_text(_csv(_game('2025-05-01')).getvalue())
+
+    result = app.test_cli_runner().invoke(
+        args=['import-scorebook', str(path), '--team-id', str(team.id)])
+    assert result.exit_code == 0, result.output
+    assert 'rows/s' in result.output
+
+    result = app.test_cli_runner().invoke(
+        args=['import-scorebook', str(path), '--team-id', str(team.id)])
+    assert result.exit_code != 0
+    assert 'already has play-by-play' in result.output
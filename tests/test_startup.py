@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only load once a Cloud SQL connection is actually made
+DEFERRED_PREFIXES = ('google.cloud.sql', 'aiohttp')
+# Modules create_app() must not load either: numpy waits for the pitch and
+# season stats that use it
+APP_DEFERRED_PREFIXES = DEFERRED_PREFIXES + ('numpy',)
+
+# Cumulative import budgets in microseconds, to catch regressions like an
+# eager connector import rather than to benchmark. The app takes about
+# 0.7 s here.
+CONFIG_IMPORT_BUDGET_US = 200_000
+APP_IMPORT_BUDGET_US = 1_200_000
+
+def _import_times(code):
+    """Run code in a fresh interpreter with -X importtime; map module -> cumulative us."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+def test_config_import_is_cheap():
+    times = _import_times('import config')
+    assert not [name for name in times if name.startswith(DEFERRED_PREFIXES)]
+    assert 'pymysql' not in times
+    assert times['config'] < CONFIG_IMPORT_BUDGET_US
+
+def test_create_app_defers_cloud_sql_stack():
+    times = _import_times('from app import create_app; create_app()')
+    assert not [name for name in times if name.startswith(APP_DEFERRED_PREFIXES)]
+    assert times['app'] < APP_IMPORT_BUDGET_US
@@ -0,0 +1,96 @@
+import random
+import pytest
+from app import create_app, db
+from config import TestingConfig
+from app.crud import (
+    create_user, create_team, create_player, create_game,
+    create_game_stats, update_game_stats
+)
+from app.stats import COUNT_COLUMNS, player_stats, leaders
+from datetime import datetime
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def _build_league(rng):
+    user = create_user('testuser', 'test@example.com', 'password123')
+    lines = []
+    for team_number in range(2):
+        team = create_team(f'Team {team_number}', user.id)
+        players = [create_player(f'Player {team_number}-{i}', team.id, i) for i in range(5)]
+        for season in (2024, 2025):
+            for _ in range(3):
+                game = create_game(datetime(season, rng.randint(4, 8), 1), 'Opponent', team.id)
+                for player in players:
+                    at_bats = rng.randint(0, 4)
+                    hits = rng.randint(0, at_bats)
+                    line = {
+                        'at_bats': at_bats, 'hits': hits, 'doubles': min(hits, rng.randint(0, 1)),
+                        'triples': 0, 'home_runs': 1 if hits > 1 else 0, 'runs': rng.randint(0, 2),
+                        'rbis': rng.randint(0, 3), 'strikeouts': rng.randint(0, 2),
+                        'walks': rng.randint(0, 1), 'stolen_bases': rng.randint(0, 1),
+                        'caught_stealing': 0,
+                    }
+                    create_game_stats(game.id, player.id)
+                    update_game_stats(game.id, player.id, line)
+                    lines.append((team.id, season, player.id, line))
+    return lines
+
+def _expected(lines, team_id=None, season=None):
+    totals = {}
+    for line_team, line_season, player_id, line in lines:
+        if team_id is not None and line_team != team_id:
+            continue
+        if season is not None and line_season != season:
+            continue
+        row = totals.setdefault(player_id, dict.fromkeys(COUNT_COLUMNS, 0))
+        for name in COUNT_COLUMNS:
+            row[name] += line[name]
+    return totals
+
+def test_player_stats_matches_python(app):
+    with app.app_context():
+        lines = _build_league(random.Random(7))
+        team_id = lines[0][0]
+        for scope in ({}, {'team_id': team_id}, {'season': 2025}, {'team_id': team_id, 'season': 2024}):
+            expected = _expected(lines, **scope)
+            stats = player_stats(**scope)
+            assert sorted(expected) == stats['player_id'].tolist()
+            for index, player_id in enumerate(stats['player_id'].tolist()):
+                row = expected[player_id]
+                for name in COUNT_COLUMNS:
+                    assert stats[name][index] == row[name]
+                avg = row['hits'] / row['at_bats'] if row['at_bats'] else 0.0
+                on_base = row['at_bats'] + row['walks']
+                obp = (row['hits'] + row['walks']) / on_base if on_base else 0.0
+                bases = row['hits'] + row['doubles'] + 2 * row['triples'] + 3 * row['home_runs']
+                slg = bases / row['at_bats'] if row['at_bats'] else 0.0
+                assert stats['avg'][index] == pytest.approx(avg)
+                assert stats['obp'][index] == pytest.approx(obp)
+                assert stats['slg'][index] == pytest.approx(slg)
+                assert stats['ops'][index] == pytest.approx(obp + slg)
+
+def test_leaders(app):
+    with app.app_context():
+        lines = _build_league(random.Random(11))
+        expected = _expected(lines)
+        top_hits = leaders('hits', limit=3)
+        assert [hits for _, hits in top_hits] == sorted((r['hits'] for r in expected.values()), reverse=True)[:3]
+
+        qualified = {pid: r for pid, r in expected.items() if r['at_bats'] >= 20}
+        top_avg = leaders('avg', limit=100, min_at_bats=20)
+        assert {pid for pid, _ in top_avg} == set(qualified)
+        assert [avg for _, avg in top_avg] == sorted((avg for _, avg in top_avg), reverse=True)
+
+def test_empty_scope(app):
+    with app.app_context():
+        stats = player_stats(season=1999)
+        assert len(stats['player_id']) == 0
+        assert leaders('ops', season=1999) == []
@@ -0,0 +1,145 @@
+import json
+import time
+import pytest
+from app import create_app, db
+from config import TestingConfig
+from app.crud import create_user, create_team, create_player, create_game, create_inning, create_at_bat, \
+    get_game_stats
+from app.models import AtBat, Out, Steal
+from app.write_behind import WriteBehindQueue
+from datetime import datetime
+from sqlalchemy import event
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def at_bats(app):
+    user = create_user('testuser', 'test@example.com', 'password123')
+    team = create_team('Test Team', user.id)
+    player = create_player('Ann Lee', team.id, 7)
+    game = create_game(datetime(2025, 5, 1, 18), 'Rivals', team.id)
+    inning = create_inning(game.id, 1)
+    return game.id, player.id, [create_at_bat(inning.id, player.id, 'single').id for _ in range(3)]
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+def _count(at_bat_id):
+    db.session.expire_all()
+    at_bat = db.session.get(AtBat, at_bat_id)
+    return at_bat.balls, at_bat.strikes
+
+def test_count_updates_collapse_into_one_update(app, at_bats):
+    game_id, player_id, (first, second, third) = at_bats
+    statements = []
+    event.listen(db.engine, 'before_cursor_execute',
+                 lambda conn, cursor, statement, params, context, executemany:
+                 statements.append((statement, executemany)))
+    queue = WriteBehindQueue(app, max_delay=60)
+
+    for balls, strikes in ((1, 0), (1, 1), (2, 1), (3, 1), (3, 2)):
+        queue.count(first, balls, strikes)
+    queue.count(second, 0, 1)
+    queue.out(second, player_id, 'strikeout')
+    queue.steal(third, player_id, 1, 2, True)
+    assert _count(first) == (0, 0)
+
+    assert queue.flush(timeout=5)
+    assert (_count(first), _count(second)) == ((3, 2), (0, 1))
+    updates = [(statement, executemany) for statement, executemany in statements
+               if statement.startswith('UPDATE at_bat')]
+    assert updates == [(updates[0][0], True)]
+    stats = queue.stats()
+    assert (stats['written'], stats['coalesced'], stats['batches'], stats['pending']) == (8, 4, 1, 0)
+    assert get_game_stats(game_id, player_id).strikeouts == 1
+    assert Steal.query.count() == 1
+    queue.close()
+
+def test_batches_flush_on_size_and_time(app, at_bats):
+    _, _, (first, _, _) = at_bats
+    by_size = WriteBehindQueue(app, max_batch=4, max_delay=60)
+    for strikes in range(4):
+        by_size.count(first, 0, strikes)
+    _wait_for(lambda: by_size.stats()['written'] == 4)
+    by_size.close()
+
+    by_time = WriteBehindQueue(app, max_batch=1000, max_delay=0.05)
+    by_time.count(first, 2, 0)
+    _wait_for(lambda: by_time.stats()['written'] == 1)
+    assert _count(first) == (2, 0)
+    by_time.close()
+
+    with pytest.raises(RuntimeError):
+        by_time.count(first, 0, 0)
+    with pytest.raises(ValueError):
+        by_size.submit('homer', first)
+
+def test_rejected_rows_are_set_aside(app, at_bats):
+    _, player_id, (first, _, _) = at_bats
+    queue = WriteBehindQueue(app, max_delay=60)
+    queue.out(first, player_id, 'flyout', 1)
+    queue.out(999999, player_id, 'flyout', 1)
+    queue.count(first, 1, 1)
+
+    assert queue.flush(timeout=5)
+    assert [operation.args[0] for operation, _ in queue.failed] == [999999]
+    assert Out.query.count() == 1
+    assert _count(first) == (1, 1)
+    queue.close()
+
+def test_journal_replays_unacknowledged_operations(app, at_bats, tmp_path):
+    _, player_id, (first, second, _) = at_bats
+    journal = tmp_path / 'write-behind.jsonl'
+    # A crash after operation 2 was written but before 3 and 4 were
+    records = [{'seq': 1, 'kind': 'count', 'args': [first, 1, 0]},
+               {'seq': 2, 'kind': 'count', 'args': [first, 2, 0]},
+               {'done': 2},
+               {'seq': 3, 'kind': 'out', 'args': [second, player_id, 'popout', 1, None]},
+               {'seq': 4, 'kind': 'count', 'args': [second, 0, 2]}]
+    journal.write_text(''.join(json.dumps(record) + '\n' for record in records) + '{"seq": 5, "ki')
+
+    queue = WriteBehindQueue(app, max_delay=60, journal_path=str(journal))
+    assert queue.flush(timeout=5)
+    assert Out.query.one().out_type == 'popout'
+    assert _count(second) == (0, 2)
+    assert _count(first) == (0, 0)
+    assert journal.read_text() == ''
+
+    assert queue.count(first, 3, 0) == 5
+    lines = [json.loads(line) for line in journal.read_text().splitlines()]
+    assert lines == [{'seq': 5, 'kind': 'count', 'args': [first, 3, 0]}]
+    queue.close()
+    assert journal.read_text() == ''
+
+def test_replay_after_commit_skips_written_operations(app, at_bats, tmp_path):
+    _, player_id, (first, second, _) = at_bats
+    journal = tmp_path / 'write-behind.jsonl'
+    queue = WriteBehindQueue(app, max_delay=60, journal_path=str(journal))
+    queue.out(second, player_id, 'popout', 1)
+    queue.steal(second, player_id, 1, 2, True)
+    assert queue.flush(timeout=5)
+    queue.close()
+
+    # A crash after the batch committed but before its marker reached the journal
+    records = [{'seq': 1, 'kind': 'out', 'args': [second, player_id, 'popout', 1, None]},
+               {'seq': 2, 'kind': 'steal', 'args': [second, player_id, 1, 2, True]}]
+    journal.write_text(''.join(json.dumps(record) + '\n' for record in records))
+
+    queue = WriteBehindQueue(app, max_delay=60, journal_path=str(journal))
+    assert len(queue) == 0
+    assert queue.count(first, 1, 0) == 3
+    assert queue.flush(timeout=5)
+    assert (Out.query.count(), Steal.query.count()) == (1, 1)
+    assert _count(first) == (1, 0)
+    queue.close()